@@ -0,0 +1,142 @@
+"""Measures the cold start of the AWS Lambda handler.
+
+Reports the slowest imports of the handler module and the time from a fresh
+interpreter to the first response of the health endpoint. Run with the API's
+environment variables set:
+
+    python docker/aws/benchmark_startup.py
+"""  # noqa: INP001
+import argparse
+import json
+import os
+import pathlib
+import subprocess
+import sys
+
+HANDLER_DIR = pathlib.Path(__file__).parent
+SOURCE_DIR = HANDLER_DIR.parent.parent / "src"
+
+# The handler module is named `lambda`, a keyword, so it cannot be imported with
+# an import statement.
+IMPORT_SCRIPT = "import importlib; importlib.import_module('lambda')"
+
+FIRST_RESPONSE_SCRIPT = """
+import time
+
+start = time.perf_counter()
+import importlib
+
+lambda_handler = importlib.import_module("lambda")
+
+imported = time.perf_counter()
+event = {
+    "version": "1.0",
+    "resource": "/api/v1/health",
+    "path": "/api/v1/health",
+    "httpMethod": "GET",
+    "headers": {"Host": "localhost"},
+    "multiValueHeaders": {},
+    "queryStringParameters": None,
+    "multiValueQueryStringParameters": None,
+    "requestContext": {
+        "resourcePath": "/api/v1/health",
+        "httpMethod": "GET",
+        "path": "/api/v1/health",
+        "stage": "benchmark",
+    },
+    "pathParameters": None,
+    "stageVariables": None,
+    "body": None,
+    "isBase64Encoded": False,
+}
+response = lambda_handler.handler(event, None)
+responded = time.perf_counter()
+print(imported - start, responded - start, response["statusCode"])
+"""
+
+
+def _environment() -> dict[str, str]:
+    """Returns the environment for the benchmark interpreters."""
+    environment = os.environ.copy()
+    paths = [str(HANDLER_DIR), str(SOURCE_DIR), environment.get("PYTHONPATH")]
+    environment["PYTHONPATH"] = os.pathsep.join(filter(None, paths))
+    return environment
+
+
+def import_times(top: int) -> list[tuple[int, str]]:
+    """Measures the cumulative import time of each module of the handler.
+
+    Args:
+        top: The number of slowest modules to return.
+
+    Returns:
+        The cumulative import time in microseconds and name of the slowest
+        top-level and first-party modules.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_SCRIPT],  # noqa: S603
+        capture_output=True,
+        check=True,
+        env=_environment(),
+        text=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Nested imports are indented by two spaces per level.
+        is_top_level = len(name) - len(name.lstrip()) <= 1
+        if is_top_level or name.strip().startswith("linguaweb_api"):
+            times.append((int(cumulative), name.strip()))
+    return sorted(times, reverse=True)[:top]
+
+
+def first_response(runs: int) -> list[dict[str, float | int]]:
+    """Measures the time to the first response in fresh interpreters.
+
+    Args:
+        runs: The number of interpreters to start.
+
+    Returns:
+        Per run, the time to import the handler and the time to the first
+        response in milliseconds, and the status code of the response.
+    """
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", FIRST_RESPONSE_SCRIPT],  # noqa: S603
+            capture_output=True,
+            check=True,
+            env=_environment(),
+            text=True,
+        ).stdout.split()
+        results.append(
+            {
+                "import_ms": round(float(output[0]) * 1000, 1),
+                "first_response_ms": round(float(output[1]) * 1000, 1),
+                "status_code": int(output[2]),
+            },
+        )
+    return results
+
+
+def main() -> None:
+    """Runs the benchmark and prints the results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    report = {
+        "imports_us": [
+            {"module": name, "cumulative": cumulative}
+            for cumulative, name in import_times(args.top)
+        ],
+        "runs": first_response(args.runs),
+    }
+    print(json.dumps(report, indent=2))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -2,5 +2,10 @@
 import mangum
 
 from linguaweb_api import main
+from linguaweb_api.core import migrations
+from linguaweb_api.microservices import sql
 
-handler = mangum.Mangum(main.app)
+# Mangum runs the lifespan events on every invocation, so the schema version
+# is checked once per cold start instead.
+migrations.check(sql.Database().engine)
+handler = mangum.Mangum(main.app, lifespan="off")
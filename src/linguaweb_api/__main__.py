@@ -0,0 +1,293 @@
+"""Command line interface for the API."""
+import argparse
+import asyncio
+import logging
+import pathlib
+import sys
+import time
+from typing import get_args
+
+from sqlalchemy import orm
+
+from linguaweb_api.core import config, migrations
+from linguaweb_api.microservices import s3, sql
+from linguaweb_api.routers.admin import controller, schemas
+
+settings = config.get_settings()
+LOGGER_NAME = settings.LOGGER_NAME
+INGEST_CONCURRENCY = settings.INGEST_CONCURRENCY
+INGEST_MAX_ATTEMPTS = settings.INGEST_MAX_ATTEMPTS
+
+LANGUAGES = get_args(schemas.Language)
+AGES = (6, 9, 12)
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+def migrate(args: argparse.Namespace) -> None:
+    """Applies pending migrations of the database schema.
+
+    Args:
+        args: The parsed command line arguments.
+    """
+    engine = sql.Database().engine
+    version = migrations.check(engine) if args.check else migrations.migrate(engine)
+    logger.info("Database schema is at version %s.", version)
+
+
+def worker(args: argparse.Namespace) -> None:
+    """Processes ingestion items from the database work queue.
+
+    Args:
+        args: The parsed command line arguments.
+    """
+    processed = asyncio.run(
+        controller.run_worker(
+            batch_size=args.batch_size,
+            poll_interval=args.poll_interval,
+            once=args.once,
+        ),
+    )
+    logger.info("Processed %s ingestion items.", processed)
+
+
+def ingest(args: argparse.Namespace) -> None:
+    """Adds words to the database without going through the API.
+
+    Args:
+        args: The parsed command line arguments.
+    """
+    word_requests = _read_ingest_words(args.file, args.languages, args.ages)
+    with sql.session_scope() as session:
+        if args.resume is not None:
+            run_id = args.resume
+            controller.reset_ingestion_attempts(run_id, session)
+            total = sum(controller.get_ingestion_run(run_id, session).items.values())
+        else:
+            keys, new_keys = controller.get_new_words(word_requests, session)
+            print(  # noqa: T201
+                f"{len(keys)} words, of which {len(new_keys)} are new.",
+            )
+            if args.dry_run or not new_keys:
+                return
+            run_id = controller.create_ingestion_run(session, new_keys).id
+            total = len(new_keys)
+
+        print(f"Ingestion run {run_id}: {total} words.")  # noqa: T201
+        run = asyncio.run(_process_run(run_id, total, session, args))
+
+    print(f"Ingestion run {run_id} {run.status}: {run.items}")  # noqa: T201
+    if run.status != "completed":
+        sys.exit(1)
+
+
+def regenerate(args: argparse.Namespace) -> None:
+    """Regenerates the tasks of words generated with outdated prompts.
+
+    Args:
+        args: The parsed command line arguments.
+    """
+    with sql.session_scope() as session:
+        regeneration = asyncio.run(
+            controller.regenerate_words(
+                session,
+                s3.S3(),
+                dry_run=args.dry_run,
+                concurrency=args.concurrency,
+            ),
+        )
+    print(  # noqa: T201
+        f"{regeneration.words} outdated words, tasks: {regeneration.tasks}, "
+        f"failed: {regeneration.failed}",
+    )
+    if regeneration.failed:
+        sys.exit(1)
+
+
+async def _process_run(
+    run_id: int,
+    total: int,
+    session: orm.Session,
+    args: argparse.Namespace,
+) -> schemas.IngestionRun:
+    """Processes an ingestion run in batches, printing the progress.
+
+    Args:
+        run_id: The ID of the ingestion run.
+        total: The number of words in the run.
+        session: The database session.
+        args: The parsed command line arguments.
+
+    Returns:
+        The ingestion run after processing.
+    """
+    s3_client = s3.S3()
+    worker_id = f"ingest-{run_id}"
+    start = time.perf_counter()
+    while await controller.process_items(
+        session,
+        s3_client,
+        worker_id,
+        run_id=run_id,
+        limit=args.batch_size,
+        max_attempts=INGEST_MAX_ATTEMPTS,
+        concurrency=args.concurrency,
+    ):
+        run = controller.get_ingestion_run(run_id, session)
+        committed = run.items.get("committed", 0)
+        elapsed = time.perf_counter() - start
+        print(  # noqa: T201
+            f"{committed}/{total} words committed in {elapsed:.0f} s "
+            f"({committed / elapsed:.2f} words/s).",
+            flush=True,
+        )
+    return controller.get_ingestion_run(run_id, session)
+
+
+def _read_ingest_words(
+    file: pathlib.Path | None,
+    languages: list[schemas.Language],
+    ages: list[int],
+) -> list[schemas.WordRequest]:
+    """Reads the words to ingest.
+
+    Args:
+        file: A CSV or text file of words. Lines without a language or age are
+            added for each of the given languages and ages. If None, the
+            preset words of each language are used.
+        languages: The languages to add words for.
+        ages: The ages to add words for.
+
+    Returns:
+        The words to ingest.
+    """
+    word_requests: list[schemas.WordRequest] = []
+    for language in languages:
+        path = file or controller.get_preset_word_file(language)
+        for age in ages:
+            with path.open("rb") as word_file:
+                word_requests.extend(
+                    controller.parse_word_file(word_file, language, age),
+                )
+    return word_requests
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Runs the command line interface.
+
+    Args:
+        argv: The command line arguments, defaults to `sys.argv`.
+    """
+    parser = argparse.ArgumentParser(
+        prog="linguaweb_api",
+        description="Maintenance commands for the LinguaWeb API.",
+    )
+    subparsers = parser.add_subparsers(required=True)
+
+    migrate_parser = subparsers.add_parser(
+        "migrate",
+        help="Create or upgrade the database schema to the latest version.",
+    )
+    migrate_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only check that the schema is up to date.",
+    )
+    migrate_parser.set_defaults(function=migrate)
+
+    worker_parser = subparsers.add_parser(
+        "worker",
+        help="Process queued ingestion runs.",
+    )
+    worker_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.INGEST_CONCURRENCY,
+        help="The number of items to claim at a time.",
+    )
+    worker_parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=5.0,
+        help="The number of seconds to wait when the queue is empty.",
+    )
+    worker_parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Stop once the queue is empty.",
+    )
+    worker_parser.set_defaults(function=worker)
+
+    ingest_parser = subparsers.add_parser(
+        "ingest",
+        help="Add words to the database from the preset word files or a file.",
+    )
+    ingest_parser.add_argument(
+        "file",
+        nargs="?",
+        type=pathlib.Path,
+        help="A CSV or text file of words; defaults to the preset words.",
+    )
+    ingest_parser.add_argument(
+        "--languages",
+        nargs="+",
+        choices=LANGUAGES,
+        default=list(LANGUAGES),
+        help="The languages to add words for.",
+    )
+    ingest_parser.add_argument(
+        "--ages",
+        nargs="+",
+        type=int,
+        default=list(AGES),
+        help="The ages to add words for.",
+    )
+    ingest_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=INGEST_CONCURRENCY,
+        help="The number of words to generate at a time.",
+    )
+    ingest_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=100,
+        help="The number of words to checkpoint and report progress on at a time.",
+    )
+    ingest_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report how many words would be added.",
+    )
+    ingest_parser.add_argument(
+        "--resume",
+        type=int,
+        metavar="RUN_ID",
+        help="Resume an earlier ingestion run instead of starting a new one.",
+    )
+    ingest_parser.set_defaults(function=ingest)
+
+    regenerate_parser = subparsers.add_parser(
+        "regenerate",
+        help="Regenerate the tasks of words generated with outdated prompts.",
+    )
+    regenerate_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=INGEST_CONCURRENCY,
+        help="The number of words to regenerate at a time.",
+    )
+    regenerate_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report how many words and tasks are outdated.",
+    )
+    regenerate_parser.set_defaults(function=regenerate)
+
+    args = parser.parse_args(argv)
+    config.initialize_logger()
+    args.function(args)
+
+
+if __name__ == "__main__":
+    main()
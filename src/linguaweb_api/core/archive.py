@@ -0,0 +1,102 @@
+"""ZIP archives that are written as streams."""
+import hashlib
+import zipfile
+
+# A fixed timestamp for all entries, so that an archive and its hash only
+# depend on its content.
+DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+class ZipStream:
+    """A ZIP archive that hands out its bytes as its entries are added.
+
+    The archive is written to a stream that cannot seek, so that `zipfile`
+    writes it strictly in order, with the sizes of the entries after their
+    data. This lets an archive be sent or hashed while it is built, without
+    holding more than one entry in memory.
+
+    Attributes:
+        hash: The SHA-256 hash of the bytes handed out so far.
+        size: The number of bytes handed out so far.
+    """
+
+    def __init__(self) -> None:
+        """Initializes a new instance of the ZipStream class."""
+        self.hash = hashlib.sha256()
+        self.size = 0
+        self._writer = _BufferWriter()
+        self._archive = zipfile.ZipFile(self._writer, "w")
+
+    def add(
+        self,
+        name: str,
+        data: bytes,
+        compress_type: int = zipfile.ZIP_STORED,
+    ) -> bytes:
+        """Adds an entry to the archive.
+
+        Args:
+            name: The name of the entry.
+            data: The content of the entry.
+            compress_type: The compression of the entry. Defaults to none, as
+                audio is already compressed.
+
+        Returns:
+            The bytes of the archive written for the entry.
+        """
+        info = zipfile.ZipInfo(name, date_time=DATE_TIME)
+        info.compress_type = compress_type
+        self._archive.writestr(info, data)
+        return self._drain()
+
+    def finish(self) -> bytes:
+        """Completes the archive.
+
+        Returns:
+            The remaining bytes of the archive, i.e. its central directory.
+        """
+        self._archive.close()
+        return self._drain()
+
+    def _drain(self) -> bytes:
+        """Returns and hashes the bytes written since the last call."""
+        data = self._writer.drain()
+        self.hash.update(data)
+        self.size += len(data)
+        return data
+
+
+class _BufferWriter:
+    """A write-only stream that collects the bytes written to it."""
+
+    def __init__(self) -> None:
+        """Initializes a new instance of the _BufferWriter class."""
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        """Collects data.
+
+        Args:
+            data: The data to write.
+
+        Returns:
+            The number of bytes written.
+        """
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        """Does nothing, as the data is collected in memory."""
+
+    def close(self) -> None:
+        """Does nothing, as the data is collected in memory."""
+
+    def drain(self) -> bytes:
+        """Returns the collected data and clears it.
+
+        Returns:
+            The data written since the last call.
+        """
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
@@ -0,0 +1,118 @@
+"""In-memory caching and request coalescing utilities."""
+import asyncio
+import collections
+from collections import abc
+from typing import Generic, TypeVar
+
+KeyType = TypeVar("KeyType", bound=abc.Hashable)
+ValueType = TypeVar("ValueType")
+
+
+class LRUCache(Generic[KeyType, ValueType]):
+    """A bounded in-memory cache with least-recently-used eviction.
+
+    Attributes:
+        max_size: The maximum number of entries kept in the cache.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """Initializes a new instance of the LRUCache class.
+
+        Args:
+            max_size: The maximum number of entries kept in the cache. A value
+                of zero or less disables the cache.
+        """
+        self.max_size = max_size
+        self._entries = collections.OrderedDict[KeyType, ValueType]()
+
+    def get(self, key: KeyType) -> ValueType | None:
+        """Returns a cached value and marks it as recently used.
+
+        Args:
+            key: The key of the entry.
+
+        Returns:
+            The cached value, or None if the key is not cached.
+        """
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def set(self, key: KeyType, value: ValueType) -> None:
+        """Stores a value, evicting the least recently used entry if needed.
+
+        Args:
+            key: The key of the entry.
+            value: The value to store.
+        """
+        if self.max_size <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Removes all entries from the cache."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        """Returns the number of cached entries."""
+        return len(self._entries)
+
+
+class SingleFlight(Generic[KeyType, ValueType]):
+    """Coalesces concurrent calls with the same key into a single execution.
+
+    The first caller for a key runs the coroutine; callers that arrive while it
+    is still running await the same result instead of starting their own. If
+    the running caller is cancelled, the waiting callers start over, so that one
+    of them runs the coroutine instead.
+    """
+
+    def __init__(self) -> None:
+        """Initializes a new instance of the SingleFlight class."""
+        self._in_flight: dict[KeyType, asyncio.Future[ValueType]] = {}
+
+    async def run(
+        self,
+        key: KeyType,
+        function: abc.Callable[[], abc.Awaitable[ValueType]],
+    ) -> ValueType:
+        """Runs the function, or joins an in-flight run with the same key.
+
+        Args:
+            key: The key identifying identical calls.
+            function: A callable returning the awaitable to run.
+
+        Returns:
+            The result of the (shared) call.
+        """
+        while (in_flight := self._in_flight.get(key)) is not None:
+            try:
+                return await asyncio.shield(in_flight)
+            except _RunCancelledError:
+                continue
+
+        future: asyncio.Future[ValueType] = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await function()
+        except asyncio.CancelledError:
+            future.set_exception(_RunCancelledError())
+            future.exception()  # Mark as retrieved if nobody joined this call.
+            raise
+        except Exception as exception_info:
+            future.set_exception(exception_info)
+            future.exception()  # Mark as retrieved if nobody joined this call.
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._in_flight[key]
+
+
+class _RunCancelledError(Exception):
+    """Raised in the callers that joined a run whose own caller was cancelled."""
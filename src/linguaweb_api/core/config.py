@@ -1,13 +1,18 @@
 """Settings for the API."""
+import atexit
 import enum
 import functools
 import logging
 import pathlib
-from typing import NotRequired, TypedDict
+import queue
+from logging import handlers
+from typing import Literal, NotRequired, TypedDict
 
 import pydantic
 import pydantic_settings
 
+from linguaweb_api.core import log
+
 DATA_DIR = pathlib.Path(__file__).parent.parent / "data"
 
 
@@ -69,9 +74,21 @@ class Settings(pydantic_settings.BaseSettings):  # type: ignore[valid-type, misc
 
     LOGGER_NAME: str = pydantic.Field("LinguaWeb API")
     LOGGER_VERBOSITY: int | None = pydantic.Field(
-        logging.DEBUG,
+        logging.INFO,
         json_schema_extra={"env": "LOGGER_VERBOSITY"},
     )
+    LOGGER_FORMAT: Literal["json", "text"] = pydantic.Field(
+        "json",
+        json_schema_extra={"env": "LOGGER_FORMAT"},
+    )
+    LOGGER_DEBUG_SAMPLE_RATE: float = pydantic.Field(
+        1.0,
+        json_schema_extra={"env": "LOGGER_DEBUG_SAMPLE_RATE"},
+    )
+    LOGGER_REQUEST_SAMPLE_RATE: float = pydantic.Field(
+        1.0,
+        json_schema_extra={"env": "LOGGER_REQUEST_SAMPLE_RATE"},
+    )
 
     API_KEY: pydantic.SecretStr = pydantic.Field(
         ...,
@@ -108,6 +125,69 @@ class Settings(pydantic_settings.BaseSettings):  # type: ignore[valid-type, misc
         json_schema_extra={"env": "OPENAI_STT_MODEL"},
     )
 
+    INGEST_CONCURRENCY: int = pydantic.Field(
+        8,
+        json_schema_extra={"env": "INGEST_CONCURRENCY"},
+    )
+    INGEST_BATCH_SIZE: int = pydantic.Field(
+        500,
+        json_schema_extra={"env": "INGEST_BATCH_SIZE"},
+    )
+
+    INGEST_MAX_ATTEMPTS: int = pydantic.Field(
+        3,
+        json_schema_extra={"env": "INGEST_MAX_ATTEMPTS"},
+    )
+    INGEST_CLAIM_SECONDS: float = pydantic.Field(
+        600.0,
+        json_schema_extra={"env": "INGEST_CLAIM_SECONDS"},
+    )
+
+    EXPORT_BATCH_SIZE: int = pydantic.Field(
+        1000,
+        json_schema_extra={"env": "EXPORT_BATCH_SIZE"},
+    )
+
+    DOWNLOAD_MAX_WORDS: int = pydantic.Field(
+        50,
+        json_schema_extra={"env": "DOWNLOAD_MAX_WORDS"},
+    )
+    DOWNLOAD_CONCURRENCY: int = pydantic.Field(
+        8,
+        json_schema_extra={"env": "DOWNLOAD_CONCURRENCY"},
+    )
+
+    TRANSCODE_WORKERS: int = pydantic.Field(
+        2,
+        json_schema_extra={"env": "TRANSCODE_WORKERS"},
+    )
+
+    CHECK_MAX_EDIT_DISTANCE: int = pydantic.Field(
+        1,
+        json_schema_extra={"env": "CHECK_MAX_EDIT_DISTANCE"},
+    )
+
+    TRANSCRIPTION_CACHE_SIZE: int = pydantic.Field(
+        1024,
+        json_schema_extra={"env": "TRANSCRIPTION_CACHE_SIZE"},
+    )
+    TRANSCRIPTION_CACHE_PERSIST: bool = pydantic.Field(
+        False,  # noqa: FBT003
+        json_schema_extra={"env": "TRANSCRIPTION_CACHE_PERSIST"},
+    )
+    TRANSCRIPTION_JOB_MAX_SIZE: int = pydantic.Field(
+        25 * 1024 * 1024,
+        json_schema_extra={"env": "TRANSCRIPTION_JOB_MAX_SIZE"},
+    )
+    TRANSCRIPTION_CHUNK_SECONDS: float = pydantic.Field(
+        30.0,
+        json_schema_extra={"env": "TRANSCRIPTION_CHUNK_SECONDS"},
+    )
+    TRANSCRIPTION_CONCURRENCY: int = pydantic.Field(
+        4,
+        json_schema_extra={"env": "TRANSCRIPTION_CONCURRENCY"},
+    )
+
     S3_ENDPOINT_URL: str | None = pydantic.Field(
         None,
         json_schema_extra={"env": "S3_ENDPOINT_URL"},
@@ -163,19 +243,43 @@ def get_settings() -> Settings:
 
 
 def initialize_logger() -> None:
-    """Initializes the logger for the API."""
+    """Initializes the logger for the API.
+
+    Records are put on a queue and written to stderr by a background thread, so
+    that logging never blocks the event loop on I/O. Debug records are sampled
+    at `LOGGER_DEBUG_SAMPLE_RATE`.
+
+    Calling this again, e.g. when both the CLI and the app initialize the
+    logger, has no effect.
+    """
     settings = get_settings()
     logger = logging.getLogger(settings.LOGGER_NAME)
+    if any(isinstance(handler, log.QueueHandler) for handler in logger.handlers):
+        return
     if settings.LOGGER_VERBOSITY is not None:
         logger.setLevel(settings.LOGGER_VERBOSITY)
+    if settings.LOGGER_DEBUG_SAMPLE_RATE < 1:
+        logger.addFilter(log.SamplingFilter(settings.LOGGER_DEBUG_SAMPLE_RATE))
 
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)s - %(funcName)s - %(message)s",  # noqa: E501
-    )
+    formatter: logging.Formatter
+    if settings.LOGGER_FORMAT == "json":
+        formatter = log.JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(request_id)s - %(filename)s:%(lineno)s - %(funcName)s - %(message)s",  # noqa: E501
+        )
 
-    handler = logging.StreamHandler()
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    queue_handler = log.QueueHandler(log_queue)
+    queue_handler.addFilter(log.RequestContextFilter())
+    logger.addHandler(queue_handler)
+
+    listener = handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
 
 
 def open_api_specification() -> list[OpenApiTag]:
@@ -194,6 +298,10 @@ def open_api_specification() -> list[OpenApiTag]:
             "name": "health",
             "description": "Operations related to the health of the API.",
         },
+        {
+            "name": "metrics",
+            "description": "Operations related to the metrics of the API.",
+        },
         {
             "name": "speech",
             "description": "Operations related to speech transcription.",
@@ -0,0 +1,131 @@
+"""Logging handlers, filters and formatters for the API."""
+import copy
+import json
+import logging
+import random
+from logging import handlers
+
+from linguaweb_api.core import timing
+
+# Attributes present on every LogRecord; anything else was passed as `extra`.
+_RECORD_ATTRIBUTES = frozenset(
+    logging.LogRecord("", 0, "", 0, "", (), None).__dict__,
+) | {"message", "asctime", "request_id", "timings"}
+
+
+class QueueHandler(handlers.QueueHandler):
+    """Puts records on a queue for a listener thread to write.
+
+    The standard handler merges the exception into the message and drops it,
+    which leaves nothing for a structured formatter on the listener's side.
+    This handler keeps the exception as text in `exc_text` instead.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Prepares a record for the queue.
+
+        The message is merged with its arguments and the exception is
+        rendered as text, as both may refer to objects that must not cross
+        threads or be pickled.
+
+        Args:
+            record: The log record.
+
+        Returns:
+            A copy of the record with the merged message and exception text.
+        """
+        prepared = copy.copy(record)
+        prepared.message = record.getMessage()
+        prepared.msg = prepared.message
+        prepared.args = None
+        if record.exc_info and not record.exc_text:
+            prepared.exc_text = logging.Formatter().formatException(record.exc_info)
+        prepared.exc_info = None
+        return prepared
+
+
+class RequestContextFilter(logging.Filter):
+    """Attaches the ID and dependency timings of the current request.
+
+    Must run in the thread that emits the record, as the request context is not
+    available in the thread that writes the logs.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Adds `request_id` and `timings` attributes to the record.
+
+        Args:
+            record: The log record.
+
+        Returns:
+            Always True; no records are dropped.
+        """
+        record.request_id = timing.get_request_id()
+        record.timings = timing.get_timings()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Passes only a fraction of the records at or below a given level."""
+
+    def __init__(self, rate: float, level: int = logging.DEBUG) -> None:
+        """Initializes a new instance of the SamplingFilter class.
+
+        Args:
+            rate: The fraction of records to keep, between 0 and 1.
+            level: Records at or below this level are sampled; more severe
+                records are always kept.
+        """
+        super().__init__()
+        self.rate = rate
+        self.level = level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Decides whether to keep a record.
+
+        Args:
+            record: The log record.
+
+        Returns:
+            Whether the record is kept.
+        """
+        if record.levelno > self.level:
+            return True
+        return random.random() < self.rate  # noqa: S311
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Formats a record as JSON.
+
+        Args:
+            record: The log record.
+
+        Returns:
+            The record as a JSON object with the time, level, logger, location,
+            message, request ID, timings and any extra attributes.
+        """
+        document = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "location": f"{record.filename}:{record.lineno}",
+            "function": record.funcName,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "timings": getattr(record, "timings", None),
+        }
+        document.update(
+            {
+                key: value
+                for key, value in record.__dict__.items()
+                if key not in _RECORD_ATTRIBUTES
+            },
+        )
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            document["exception"] = record.exc_text
+        return json.dumps(document, default=str)
@@ -0,0 +1,287 @@
+"""In-process metrics exposed in the Prometheus text format."""
+import bisect
+import threading
+from abc import ABC, abstractmethod
+from collections import abc
+
+LabelValues = tuple[str, ...]
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+class _Metric(ABC):
+    """Base class of a metric with labels.
+
+    Attributes:
+        name: The name of the metric.
+        documentation: The help text of the metric.
+        label_names: The names of the labels of the metric.
+    """
+
+    metric_type = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: abc.Sequence[str] = (),
+    ) -> None:
+        """Initializes a new metric.
+
+        Args:
+            name: The name of the metric.
+            documentation: The help text of the metric.
+            label_names: The names of the labels of the metric.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def render(self) -> list[str]:
+        """Renders the metric in the Prometheus text format.
+
+        Returns:
+            The lines of the metric, including its HELP and TYPE lines.
+        """
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+            *self._render_samples(),
+        ]
+
+    @abstractmethod
+    def _render_samples(self) -> list[str]:
+        """Renders the samples of the metric, one line per sample."""
+
+    def _format_labels(
+        self,
+        values: LabelValues,
+        extra: abc.Mapping[str, str] | None = None,
+    ) -> str:
+        """Formats label values as a Prometheus label set.
+
+        Args:
+            values: The values of the metric's labels.
+            extra: Additional labels, such as the bucket of a histogram.
+
+        Returns:
+            The label set, or an empty string if there are no labels.
+        """
+        labels = {**dict(zip(self.label_names, values, strict=True)), **(extra or {})}
+        if not labels:
+            return ""
+        escaped = (f'{key}="{_escape(value)}"' for key, value in labels.items())
+        return "{" + ",".join(escaped) + "}"
+
+
+class Counter(_Metric):
+    """A monotonically increasing count."""
+
+    metric_type = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: abc.Sequence[str] = (),
+    ) -> None:
+        """Initializes a new instance of the Counter class.
+
+        Args:
+            name: The name of the metric.
+            documentation: The help text of the metric.
+            label_names: The names of the labels of the metric.
+        """
+        super().__init__(name, documentation, label_names)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        """Increments the counter.
+
+        Args:
+            label_values: The values of the labels, in order.
+            amount: The amount to increment by.
+        """
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def _render_samples(self) -> list[str]:
+        with self._lock:
+            return [
+                f"{self.name}_total{self._format_labels(labels)} {value}"
+                for labels, value in self._values.items()
+            ]
+
+
+class Gauge(_Metric):
+    """A value that can go up and down."""
+
+    metric_type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: abc.Sequence[str] = (),
+    ) -> None:
+        """Initializes a new instance of the Gauge class.
+
+        Args:
+            name: The name of the metric.
+            documentation: The help text of the metric.
+            label_names: The names of the labels of the metric.
+        """
+        super().__init__(name, documentation, label_names)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        """Increments the gauge.
+
+        Args:
+            label_values: The values of the labels, in order.
+            amount: The amount to increment by.
+        """
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        """Decrements the gauge.
+
+        Args:
+            label_values: The values of the labels, in order.
+            amount: The amount to decrement by.
+        """
+        self.inc(*label_values, amount=-amount)
+
+    def _render_samples(self) -> list[str]:
+        with self._lock:
+            return [
+                f"{self.name}{self._format_labels(labels)} {value}"
+                for labels, value in self._values.items()
+            ]
+
+
+class Histogram(_Metric):
+    """A distribution of observed values in cumulative buckets."""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: abc.Sequence[str] = (),
+        buckets: abc.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Initializes a new instance of the Histogram class.
+
+        Args:
+            name: The name of the metric.
+            documentation: The help text of the metric.
+            label_names: The names of the labels of the metric.
+            buckets: The upper bounds of the buckets, in increasing order.
+        """
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(buckets)
+        self._counts: dict[LabelValues, list[int]] = {}
+        self._sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Records an observation.
+
+        Args:
+            value: The observed value.
+            label_values: The values of the labels, in order.
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            if label_values not in self._counts:
+                self._counts[label_values] = [0] * (len(self.buckets) + 1)
+                self._sums[label_values] = 0
+            self._counts[label_values][index] += 1
+            self._sums[label_values] += value
+
+    def _render_samples(self) -> list[str]:
+        lines = []
+        with self._lock:
+            for labels, counts in self._counts.items():
+                cumulative = 0
+                bounds = [*(str(bucket) for bucket in self.buckets), "+Inf"]
+                for bound, count in zip(bounds, counts, strict=True):
+                    cumulative += count
+                    bucket_labels = self._format_labels(labels, {"le": bound})
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                label_set = self._format_labels(labels)
+                lines.append(f"{self.name}_sum{label_set} {self._sums[labels]}")
+                lines.append(f"{self.name}_count{label_set} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    """Escapes a label value for the Prometheus text format.
+
+    Args:
+        value: The label value.
+
+    Returns:
+        The value with backslashes, quotes and newlines escaped.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUESTS = Counter(
+    "linguaweb_http_requests",
+    "Number of HTTP requests.",
+    ("method", "route", "status"),
+)
+REQUEST_DURATION = Histogram(
+    "linguaweb_http_request_duration_seconds",
+    "Duration of HTTP requests in seconds.",
+    ("method", "route", "status"),
+)
+DEPENDENCY_DURATION = Histogram(
+    "linguaweb_dependency_duration_seconds",
+    "Duration of calls to dependencies (db, s3, llm, stt, transcode) in seconds.",
+    ("dependency", "operation"),
+)
+DEPENDENCY_IN_FLIGHT = Gauge(
+    "linguaweb_dependency_in_flight",
+    "Number of calls to dependencies that are currently in progress.",
+    ("dependency", "operation"),
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "linguaweb_db_pool_checked_out_connections",
+    "Number of database connections currently checked out of the pool.",
+)
+
+REGISTRY: tuple[_Metric, ...] = (
+    REQUESTS,
+    REQUEST_DURATION,
+    DEPENDENCY_DURATION,
+    DEPENDENCY_IN_FLIGHT,
+    DB_POOL_CHECKED_OUT,
+)
+
+
+def render() -> str:
+    """Renders all registered metrics in the Prometheus text format.
+
+    Returns:
+        The metrics, one sample per line.
+    """
+    lines = [line for metric in REGISTRY for line in metric.render()]
+    return "\n".join(lines) + "\n"
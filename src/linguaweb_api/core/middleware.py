@@ -1,34 +1,45 @@
 """Middleware for the FastAPI application."""
 import logging
+import random
 import uuid
 from collections import abc
 from typing import Any
 
-import fastapi
-
-from linguaweb_api.core import config
+from linguaweb_api.core import config, metrics, timing
 
 settings = config.get_settings()
+LOGGER_REQUEST_SAMPLE_RATE = settings.LOGGER_REQUEST_SAMPLE_RATE
 logger = logging.getLogger(settings.LOGGER_NAME)
 
+REQUEST_ID_HEADER = b"x-request-id"
+MAX_REQUEST_ID_LENGTH = 128
+UNMATCHED_ROUTE = "<unmatched>"
+
+Scope = abc.MutableMapping[str, Any]
+Message = abc.MutableMapping[str, Any]
+Receive = abc.Callable[[], abc.Awaitable[Message]]
+Send = abc.Callable[[Message], abc.Awaitable[None]]
+ASGIApp = abc.Callable[[Scope, Receive, Send], abc.Awaitable[None]]
+
+
+class RequestTimingMiddleware:  # pylint: disable=too-few-public-methods
+    """Pure ASGI middleware that times requests and their dependencies.
 
-class RequestLoggerMiddleware:  # pylint: disable=too-few-public-methods
-    """Middleware that logs incoming requests."""
+    Every HTTP response receives an `X-Request-ID` header, propagated from the
+    request if present, and a `Server-Timing` header with the time spent in the
+    database, S3, OpenAI and ffmpeg. Request counts and durations are recorded
+    per route and status, and a sample of the requests is logged.
+    """
 
-    def __init__(self, app: fastapi.FastAPI) -> None:
-        """Initializes a new instance of the RequestLoggerMiddleware class.
+    def __init__(self, app: ASGIApp) -> None:
+        """Initializes a new instance of the RequestTimingMiddleware class.
 
         Args:
-            app: The FastAPI instance to apply middleware to.
+            app: The ASGI application to apply middleware to.
         """
         self.app = app
 
-    async def __call__(
-        self,
-        scope: dict[str, Any],
-        receive: abc.Callable[[], abc.Awaitable[dict[str, Any]]],
-        send: abc.Callable[[abc.MutableMapping[str, Any]], abc.Awaitable[None]],
-    ) -> None:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Middleware method that handles incoming HTTP requests.
 
         Args:
@@ -41,16 +52,61 @@ class RequestLoggerMiddleware:  # pylint: disable=too-few-public-methods
             await self.app(scope, receive, send)
             return
 
-        request = fastapi.Request(scope, receive=receive)
-        request_id = uuid.uuid4()
+        request_id = _get_header(scope, REQUEST_ID_HEADER)
+        if not request_id or len(request_id) > MAX_REQUEST_ID_LENGTH:
+            request_id = uuid.uuid4().hex
+        status_code = 500
+
+        with timing.request_context(request_id) as context:
+
+            async def send_with_headers(message: Message) -> None:
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (REQUEST_ID_HEADER, request_id.encode("latin-1")),
+                        (b"server-timing", context.server_timing().encode("latin-1")),
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_headers)
+            finally:
+                duration = context.elapsed()
+                # Use the route template rather than the path to bound the number
+                # of label values.
+                route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+                labels = (scope["method"], route, str(status_code))
+                metrics.REQUESTS.inc(*labels)
+                metrics.REQUEST_DURATION.observe(duration, *labels)
+                if random.random() < LOGGER_REQUEST_SAMPLE_RATE:  # noqa: S311
+                    logger.info(
+                        "Finished request: %s - %s %s - %s - %.1f ms",
+                        request_id,
+                        scope["method"],
+                        scope["path"],
+                        status_code,
+                        duration * 1000,
+                        extra={
+                            "route": route,
+                            "status_code": status_code,
+                            "duration_ms": round(duration * 1000, 1),
+                        },
+                    )
+
 
-        logger.info(
-            "Starting request: %s - %s - %s",
-            request_id,
-            request.method,
-            request.url.path,
-        )
+def _get_header(scope: Scope, name: bytes) -> str | None:
+    """Returns the value of a request header without parsing all headers.
 
-        await self.app(scope, receive, send)
+    Args:
+        scope: The ASGI scope of the request.
+        name: The lowercase name of the header.
 
-        logger.info("Finished request: %s.", request_id)
+    Returns:
+        The value of the header, or None if it is absent.
+    """
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
@@ -0,0 +1,490 @@
+"""Versioned migrations of the database schema.
+
+The version of the schema is stored in the single row of the `schema_version`
+table. Processes check it with one query at startup; migrations are applied
+explicitly with `python -m linguaweb_api migrate` or `POST /admin/migrate`.
+
+To change the schema, update the models and append a migration to
+`MIGRATIONS` that brings an existing database to the same state. A new
+database is created from the models directly and stamped with the latest
+version, so migrations only ever run against existing databases. Migrations
+should be idempotent, as the baseline may already have created the tables
+they alter. They add columns and indexes by name rather than everything the
+models declare, as the models also declare the columns and indexes of later
+migrations, which may depend on steps that have not run yet.
+
+Migrations import what only they need, such as NumPy for computing word
+vectors, when they run, as every process imports this module to check the
+version.
+"""
+import json
+import logging
+from collections import abc
+from typing import NamedTuple
+
+import sqlalchemy
+from sqlalchemy import exc
+
+from linguaweb_api.core import config, models, readability
+from linguaweb_api.microservices import sql
+
+settings = config.get_settings()
+LOGGER_NAME = settings.LOGGER_NAME
+
+logger = logging.getLogger(LOGGER_NAME)
+
+READABILITY_COLUMNS = (
+    "syllables",
+    "description_reading_ease",
+    "description_grade",
+    "jeopardy_reading_ease",
+    "jeopardy_grade",
+)
+
+
+class SchemaVersionError(RuntimeError):
+    """Raised when the database schema is older than the code expects."""
+
+
+class Migration(NamedTuple):
+    """A step that upgrades the schema to a version.
+
+    Attributes:
+        version: The version of the schema after the migration.
+        description: A short description of the migration.
+        upgrade: Applies the migration within a transaction.
+    """
+
+    version: int
+    description: str
+    upgrade: abc.Callable[[sqlalchemy.Connection], None]
+
+
+def _create_missing_tables(connection: sqlalchemy.Connection) -> None:
+    """Creates all tables that do not exist yet.
+
+    Args:
+        connection: The database connection.
+    """
+    sql.Base.metadata.create_all(connection)
+
+
+def _alter_table(
+    table: sqlalchemy.Table,
+    columns: abc.Sequence[str] = (),
+    indexes: abc.Sequence[str] = (),
+) -> abc.Callable[[sqlalchemy.Connection], None]:
+    """Creates a migration that adds columns and indexes to a table.
+
+    Args:
+        table: The table as declared by the models.
+        columns: The names of the columns to add.
+        indexes: The names of the indexes to create.
+
+    Returns:
+        The upgrade function of the migration.
+    """
+
+    def upgrade(connection: sqlalchemy.Connection) -> None:
+        _add_columns(connection, table, *columns)
+        _create_indexes(connection, table, *indexes)
+
+    return upgrade
+
+
+def _add_columns(
+    connection: sqlalchemy.Connection,
+    table: sqlalchemy.Table,
+    *names: str,
+) -> None:
+    """Adds columns of a table that do not exist yet.
+
+    Columns are added as nullable or with their server default, as existing
+    rows have no values for them. Foreign keys are added along with their
+    columns, so that upgraded and new databases have the same constraints.
+    Only the named columns are added, as the models may declare columns that
+    later migrations add.
+
+    Args:
+        connection: The database connection.
+        table: The table as declared by the models.
+        names: The names of the columns.
+    """
+    inspector = sqlalchemy.inspect(connection)
+    existing = {column["name"] for column in inspector.get_columns(table.name)}
+    preparer = connection.dialect.identifier_preparer
+    for name in names:
+        if name in existing:
+            continue
+        column = table.columns[name]
+        column_type = column.type.compile(dialect=connection.dialect)
+        default = ""
+        if column.server_default is not None:
+            default_text = column.server_default.arg  # type: ignore[attr-defined]
+            default = f" DEFAULT {default_text}"
+        references = "".join(
+            f" REFERENCES {preparer.format_table(foreign_key.column.table)} "
+            f"({preparer.format_column(foreign_key.column)})"
+            for foreign_key in column.foreign_keys
+        )
+        connection.execute(
+            sqlalchemy.text(
+                f"ALTER TABLE {preparer.format_table(table)} "
+                f"ADD COLUMN {preparer.format_column(column)} "
+                f"{column_type}{default}{references}",
+            ),
+        )
+
+
+def _create_indexes(
+    connection: sqlalchemy.Connection,
+    table: sqlalchemy.Table,
+    *names: str,
+) -> None:
+    """Creates indexes of a table that do not exist yet.
+
+    Args:
+        connection: The database connection.
+        table: The table as declared by the models.
+        names: The names of the indexes.
+    """
+    indexes = {str(index.name): index for index in table.indexes}
+    for name in names:
+        indexes[name].create(connection, checkfirst=True)
+
+
+def _add_word_unique_index(connection: sqlalchemy.Connection) -> None:
+    """Removes duplicate words and adds the unique index on the word columns.
+
+    The index was declared through a misspelled `__table_args__` before, so
+    existing tables may hold duplicates; the oldest copy is kept.
+
+    Args:
+        connection: The database connection.
+    """
+    words = models.Word.__table__
+    oldest = (
+        sqlalchemy.select(sqlalchemy.func.min(words.c.id))
+        .group_by(words.c.word, words.c.language, words.c.age)
+        .scalar_subquery()
+    )
+    connection.execute(sqlalchemy.delete(words).where(words.c.id.not_in(oldest)))
+    _create_indexes(connection, words, "uq_words_word_language_age")  # type: ignore[arg-type]
+
+
+def _add_task_versions(connection: sqlalchemy.Connection) -> None:
+    """Adds the prompt versions of the tasks to words and ingestion items.
+
+    Args:
+        connection: The database connection.
+    """
+    for table in (models.Word.__table__, models.IngestionItem.__table__):
+        _add_columns(connection, table, "task_versions")  # type: ignore[arg-type]
+
+
+def _store_terms_as_json(connection: sqlalchemy.Connection) -> None:
+    """Converts the comma separated synonyms and antonyms to JSON arrays.
+
+    Values that are already JSON arrays are kept. On PostgreSQL, the columns
+    are changed to JSONB, after which the columns of words are indexed.
+
+    Args:
+        connection: The database connection.
+    """
+    postgres = connection.dialect.name == "postgresql"
+    preparer = connection.dialect.identifier_preparer
+    columns = ("synonyms", "antonyms")
+    for table in (models.Word.__table__, models.IngestionItem.__table__):
+        table_name = preparer.format_table(table)  # type: ignore[arg-type]
+        if postgres:
+            for column in columns:
+                connection.execute(
+                    sqlalchemy.text(
+                        f"ALTER TABLE {table_name} ALTER COLUMN {column} TYPE TEXT",
+                    ),
+                )
+        rows = connection.execute(
+            sqlalchemy.text(f"SELECT id, synonyms, antonyms FROM {table_name}"),  # noqa: S608
+        ).all()
+        if rows:
+            connection.execute(
+                sqlalchemy.text(
+                    f"UPDATE {table_name} SET synonyms = :synonyms, "  # noqa: S608
+                    "antonyms = :antonyms WHERE id = :id",
+                ),
+                [
+                    {
+                        "id": id_,
+                        "synonyms": _terms_to_json(synonyms),
+                        "antonyms": _terms_to_json(antonyms),
+                    }
+                    for id_, synonyms, antonyms in rows
+                ],
+            )
+        if postgres:
+            for column in columns:
+                connection.execute(
+                    sqlalchemy.text(
+                        f"ALTER TABLE {table_name} ALTER COLUMN {column} "
+                        f"TYPE JSONB USING {column}::jsonb",
+                    ),
+                )
+    _create_indexes(
+        connection,
+        models.Word.__table__,  # type: ignore[arg-type]
+        "ix_words_synonyms",
+        "ix_words_antonyms",
+    )
+
+
+def _terms_to_json(value: str | None) -> str | None:
+    """Converts a comma separated list of terms to a JSON array.
+
+    Args:
+        value: The comma separated terms, or a JSON array of terms.
+
+    Returns:
+        The terms as a JSON array.
+    """
+    if value is None:
+        return None
+    try:
+        terms = json.loads(value)
+    except json.JSONDecodeError:
+        terms = None
+    if not isinstance(terms, list):
+        terms = models.split_terms(value)
+    return json.dumps(terms)
+
+
+def _add_word_trigram_index(connection: sqlalchemy.Connection) -> None:
+    """Adds the trigram index for searching words on PostgreSQL.
+
+    Args:
+        connection: The database connection.
+    """
+    if connection.dialect.name == "postgresql":
+        connection.execute(sqlalchemy.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    _create_indexes(connection, models.Word.__table__, "ix_words_word_trgm")  # type: ignore[arg-type]
+
+
+def _add_word_vectors(connection: sqlalchemy.Connection) -> None:
+    """Adds the vector column to words and computes the vectors.
+
+    Args:
+        connection: The database connection.
+    """
+    from linguaweb_api.core import vectors
+
+    words = models.Word.__table__
+    _add_columns(connection, words, "vector")  # type: ignore[arg-type]
+    rows = connection.execute(
+        sqlalchemy.select(words.c.id, words.c.word, words.c.synonyms).where(
+            words.c.vector.is_(None),
+        ),
+    ).all()
+    if rows:
+        connection.execute(
+            sqlalchemy.update(words)
+            .where(words.c.id == sqlalchemy.bindparam("word_id"))
+            .values(vector=sqlalchemy.bindparam("word_vector")),
+            [
+                {"word_id": id_, "word_vector": vectors.encode(word, synonyms or [])}
+                for id_, word, synonyms in rows
+            ],
+        )
+
+
+def _add_word_readability(connection: sqlalchemy.Connection) -> None:
+    """Adds the readability columns to words and computes their values.
+
+    Args:
+        connection: The database connection.
+    """
+    words = models.Word.__table__
+    _add_columns(connection, words, *READABILITY_COLUMNS)  # type: ignore[arg-type]
+    _create_indexes(
+        connection,
+        words,  # type: ignore[arg-type]
+        *(f"ix_words_{column}" for column in READABILITY_COLUMNS),
+    )
+    rows = connection.execute(
+        sqlalchemy.select(
+            words.c.id,
+            words.c.word,
+            words.c.description,
+            words.c.jeopardy,
+            words.c.language,
+        ).where(words.c.syllables.is_(None)),
+    ).all()
+    for row in rows:
+        metrics = readability.measure(row._asdict(), row.language)
+        connection.execute(
+            sqlalchemy.update(words).where(words.c.id == row.id).values(**metrics),
+        )
+
+
+def _add_word_bank_version(connection: sqlalchemy.Connection) -> None:
+    """Adds the version of the word bank and stamps the existing words with it.
+
+    Existing words are stamped with version 1, so that clients syncing from
+    version 0 receive all of them.
+
+    Args:
+        connection: The database connection.
+    """
+    words = models.Word.__table__
+    bank = models.WordBank.__table__
+    sql.Base.metadata.create_all(
+        connection,
+        tables=[bank, models.WordTombstone.__table__],  # type: ignore[list-item]
+    )
+    _add_columns(connection, words, "version")  # type: ignore[arg-type]
+    _create_indexes(connection, words, "ix_words_version")  # type: ignore[arg-type]
+    if connection.execute(sqlalchemy.select(bank.c.id)).first() is None:
+        connection.execute(sqlalchemy.insert(bank).values(version=0))
+    stamped = connection.execute(
+        sqlalchemy.update(words).where(words.c.version == 0).values(version=1),
+    )
+    if stamped.rowcount:
+        connection.execute(
+            sqlalchemy.update(bank).where(bank.c.version < 1).values(version=1),
+        )
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(1, "Create missing tables.", _create_missing_tables),
+    Migration(2, "Add unique index on words.", _add_word_unique_index),
+    Migration(3, "Add ingestion tables.", _create_missing_tables),
+    Migration(
+        4,
+        "Add claims to ingestion items.",
+        _alter_table(
+            models.IngestionItem.__table__,  # type: ignore[arg-type]
+            columns=("claimed_by", "claimed_until"),
+            indexes=("ix_ingestion_items_state_claimed_until",),
+        ),
+    ),
+    Migration(5, "Add task versions to words and ingestion items.", _add_task_versions),
+    Migration(6, "Store synonyms and antonyms as JSON.", _store_terms_as_json),
+    Migration(7, "Add trigram index on words.", _add_word_trigram_index),
+    Migration(8, "Add vectors to words.", _add_word_vectors),
+    Migration(9, "Add readability metrics to words.", _add_word_readability),
+    Migration(10, "Add the version of the word bank.", _add_word_bank_version),
+    Migration(11, "Add bundles table.", _create_missing_tables),
+    Migration(
+        12,
+        "Add audio renditions to S3 files.",
+        _alter_table(
+            models.S3File.__table__,  # type: ignore[arg-type]
+            columns=("source_id", "rendition"),
+            indexes=("uq_s3_files_source_rendition",),
+        ),
+    ),
+)
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def get_version(connection: sqlalchemy.Connection) -> int | None:
+    """Returns the version of the schema.
+
+    Args:
+        connection: The database connection.
+
+    Returns:
+        The version of the schema, 0 if the version table is empty, or None
+        if the version table does not exist.
+    """
+    try:
+        version = connection.execute(
+            sqlalchemy.select(models.SchemaVersion.version),
+        ).scalar()
+    except (exc.OperationalError, exc.ProgrammingError):
+        return None
+    return version or 0
+
+
+def check(engine: sqlalchemy.Engine) -> int:
+    """Checks that the schema is at least at the latest version.
+
+    Args:
+        engine: The database engine.
+
+    Returns:
+        The version of the schema.
+
+    Raises:
+        SchemaVersionError: If the schema is older than the latest version.
+    """
+    with engine.connect() as connection:
+        version = get_version(connection) or 0
+    if version < LATEST_VERSION:
+        msg = (
+            f"Database schema is at version {version}, expected {LATEST_VERSION}. "
+            "Run `python -m linguaweb_api migrate`."
+        )
+        raise SchemaVersionError(msg)
+    if version > LATEST_VERSION:
+        logger.warning(
+            "Database schema version %s is newer than this release (%s).",
+            version,
+            LATEST_VERSION,
+        )
+    return version
+
+
+def migrate(engine: sqlalchemy.Engine) -> int:
+    """Brings the schema to the latest version.
+
+    Args:
+        engine: The database engine.
+
+    Returns:
+        The version of the schema after migrating.
+    """
+    with engine.begin() as connection:
+        # Inspect rather than rely on a failing query, which would abort the
+        # transaction on PostgreSQL.
+        tables = sqlalchemy.inspect(connection).get_table_names()
+        if not tables:
+            logger.info("Creating database schema at version %s.", LATEST_VERSION)
+            sql.Base.metadata.create_all(connection)
+            _set_version(connection, LATEST_VERSION)
+            return LATEST_VERSION
+        version = 0
+        if models.SchemaVersion.__tablename__ in tables:
+            version = get_version(connection) or 0
+
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        logger.info(
+            "Migrating database schema to version %s: %s",
+            migration.version,
+            migration.description,
+        )
+        with engine.begin() as connection:
+            migration.upgrade(connection)
+            _set_version(connection, migration.version)
+        version = migration.version
+    return version
+
+
+def _set_version(connection: sqlalchemy.Connection, version: int) -> None:
+    """Stores the version of the schema.
+
+    Args:
+        connection: The database connection.
+        version: The version of the schema.
+    """
+    models.SchemaVersion.metadata.create_all(
+        connection,
+        tables=[models.SchemaVersion.__table__],
+    )
+    updated = connection.execute(
+        sqlalchemy.update(models.SchemaVersion).values(version=version),
+    )
+    if not updated.rowcount:
+        connection.execute(
+            sqlalchemy.insert(models.SchemaVersion).values(version=version),
+        )
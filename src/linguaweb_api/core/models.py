@@ -1,9 +1,9 @@
 """Basic settings for all SQL tables."""
 import datetime
-from typing import Any
 
 import sqlalchemy
-from sqlalchemy import orm, types
+from sqlalchemy import orm
+from sqlalchemy.dialects import postgresql
 
 from linguaweb_api.microservices import sql
 
@@ -25,61 +25,95 @@ class BaseTable(sql.Base):
     )
 
 
-class CommaSeparatedList(types.TypeDecorator):
-    """A custom SQLAlchemy for comma separated lists."""
+# Lists of terms are JSON arrays, stored as JSONB on PostgreSQL so that they can
+# be searched with a GIN index.
+TermList = sqlalchemy.JSON().with_variant(postgresql.JSONB(), "postgresql")
 
-    impl = sqlalchemy.String(1024)
 
-    def process_bind_param(self, value: Any | None, _dialect: Any) -> str | None:  # noqa: ANN401
-        """Converts a list of strings to a comma separated string.
+def split_terms(text: str) -> list[str]:
+    """Splits a comma separated list of terms, as generated by GPT.
 
-        Args:
-            value: The list of strings or a comma separated string.
-            dialect: The dialect.
+    Args:
+        text: The comma separated terms.
 
-        Returns:
-            str | None: The comma separated string.
-        """
-        if value is None:
-            return None
-        if isinstance(value, list):
-            return ",".join(value)
-        return value
-
-    def process_result_value(
-        self,
-        value: Any | None,  # noqa: ANN401
-        _dialect: Any,  # noqa: ANN401
-    ) -> list[str] | None:
-        """Converts a comma separated string to a list of strings.
-
-        Args:
-            value: The comma separated string.
-            dialect: The dialect.
-
-        Returns:
-            list[str]: The list of strings.
-        """
-        if value is None:
-            return None
-        return [string.strip() for string in value.split(",")]
+    Returns:
+        The stripped terms, without empty and duplicate terms.
+    """
+    terms = (term.strip() for term in text.split(","))
+    return list(dict.fromkeys(term for term in terms if term))
 
 
 class Word(BaseTable):
     """Table for text tasks."""
 
     __tablename__ = "words"
-    __tableargs__ = (sqlalchemy.UniqueConstraint("word", "language", "age"),)
+    __table_args__ = (
+        sqlalchemy.Index(
+            "uq_words_word_language_age",
+            "word",
+            "language",
+            "age",
+            unique=True,
+        ),
+        sqlalchemy.Index(
+            "ix_words_word_trgm",
+            "word",
+            postgresql_using="gin",
+            postgresql_ops={"word": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        sqlalchemy.Index(
+            "ix_words_synonyms",
+            "synonyms",
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+        sqlalchemy.Index(
+            "ix_words_antonyms",
+            "antonyms",
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
 
     word: orm.Mapped[str] = orm.mapped_column(sqlalchemy.String(64))
     description: orm.Mapped[str] = orm.mapped_column(sqlalchemy.String(1024))
-    synonyms: orm.Mapped[str] = orm.mapped_column(CommaSeparatedList)
-    antonyms: orm.Mapped[str] = orm.mapped_column(CommaSeparatedList)
+    synonyms: orm.Mapped[list[str]] = orm.mapped_column(TermList)
+    antonyms: orm.Mapped[list[str]] = orm.mapped_column(TermList)
     jeopardy: orm.Mapped[str] = orm.mapped_column(sqlalchemy.String(1024))
     language: orm.Mapped[str] = orm.mapped_column(
         sqlalchemy.String(16),
     )
     age: orm.Mapped[int] = orm.mapped_column(sqlalchemy.Integer)
+    task_versions: orm.Mapped[dict[str, dict[str, str]] | None] = orm.mapped_column(
+        sqlalchemy.JSON,
+    )
+    vector: orm.Mapped[bytes | None] = orm.mapped_column(sqlalchemy.LargeBinary)
+
+    syllables: orm.Mapped[int | None] = orm.mapped_column(
+        sqlalchemy.Integer,
+        index=True,
+    )
+    description_reading_ease: orm.Mapped[float | None] = orm.mapped_column(
+        sqlalchemy.Float,
+        index=True,
+    )
+    description_grade: orm.Mapped[float | None] = orm.mapped_column(
+        sqlalchemy.Float,
+        index=True,
+    )
+    jeopardy_reading_ease: orm.Mapped[float | None] = orm.mapped_column(
+        sqlalchemy.Float,
+        index=True,
+    )
+    jeopardy_grade: orm.Mapped[float | None] = orm.mapped_column(
+        sqlalchemy.Float,
+        index=True,
+    )
+
+    # The version of the word bank in which the word was last written.
+    version: orm.Mapped[int] = orm.mapped_column(
+        sqlalchemy.Integer,
+        server_default="0",
+        index=True,
+    )
 
     s3_id: orm.Mapped[int] = orm.mapped_column(
         sqlalchemy.ForeignKey("s3_files.id"),
@@ -91,13 +125,205 @@ class Word(BaseTable):
     )
 
 
+# The trigram index on words needs the pg_trgm extension.
+sqlalchemy.event.listen(
+    Word.__table__,
+    "before_create",
+    sqlalchemy.DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(
+        dialect="postgresql",
+    ),
+)
+
+
 class S3File(BaseTable):
-    """Table for tracking files on S3."""
+    """Table for tracking files on S3.
+
+    A rendition of an audio file, e.g. a low-bitrate encoding for mobile
+    clients, is a file of its own that refers to its source file.
+    """
 
     __tablename__ = "s3_files"
+    __table_args__ = (
+        sqlalchemy.Index(
+            "uq_s3_files_source_rendition",
+            "source_id",
+            "rendition",
+            unique=True,
+        ),
+    )
 
     s3_key: orm.Mapped[str] = orm.mapped_column(sqlalchemy.String(1024), unique=True)
+    source_id: orm.Mapped[int | None] = orm.mapped_column(
+        sqlalchemy.ForeignKey("s3_files.id"),
+    )
+    rendition: orm.Mapped[str | None] = orm.mapped_column(sqlalchemy.String(32))
     words: orm.Mapped[list["Word"]] = orm.relationship(
         back_populates="s3_file",
         cascade="all, delete-orphan",
     )
+
+
+class Transcription(BaseTable):
+    """Table for caching speech-to-text results by audio content."""
+
+    __tablename__ = "transcriptions"
+    __table_args__ = (sqlalchemy.UniqueConstraint("audio_hash", "language", "model"),)
+
+    audio_hash: orm.Mapped[str] = orm.mapped_column(sqlalchemy.String(64))
+    language: orm.Mapped[str] = orm.mapped_column(sqlalchemy.String(16))
+    model: orm.Mapped[str] = orm.mapped_column(sqlalchemy.String(32))
+    transcription: orm.Mapped[str] = orm.mapped_column(sqlalchemy.Text)
+
+
+class TranscriptionJob(BaseTable):
+    """Table for tracking chunked transcriptions of long recordings."""
+
+    __tablename__ = "transcription_jobs"
+
+    status: orm.Mapped[str] = orm.mapped_column(
+        sqlalchemy.String(16),
+        default="pending",
+    )
+    language: orm.Mapped[str] = orm.mapped_column(sqlalchemy.String(16))
+    chunks_total: orm.Mapped[int | None] = orm.mapped_column(sqlalchemy.Integer)
+    chunks_completed: orm.Mapped[int] = orm.mapped_column(
+        sqlalchemy.Integer,
+        default=0,
+    )
+    transcription: orm.Mapped[str | None] = orm.mapped_column(sqlalchemy.Text)
+    error: orm.Mapped[str | None] = orm.mapped_column(sqlalchemy.String(1024))
+
+
+class WordBank(BaseTable):
+    """Table holding the single row with the version of the word bank.
+
+    The version is incremented in the transaction of every write to the words,
+    and the written rows are stamped with it. Incrementing locks the row, so
+    writes commit in the order of their versions.
+    """
+
+    __tablename__ = "word_bank"
+
+    version: orm.Mapped[int] = orm.mapped_column(sqlalchemy.Integer)
+
+
+class WordTombstone(BaseTable):
+    """Table for the words that were deleted, so that clients can sync them."""
+
+    __tablename__ = "word_tombstones"
+
+    word_id: orm.Mapped[int] = orm.mapped_column(sqlalchemy.Integer)
+    version: orm.Mapped[int] = orm.mapped_column(sqlalchemy.Integer, index=True)
+
+
+class Bundle(BaseTable):
+    """Table for the offline bundles of the words of a language and age.
+
+    A bundle is a ZIP archive in S3 with a manifest of the words and their
+    audio. The archive is stored under its content hash, which serves as its
+    ETag. While a bundle is rebuilt, the archive of the previous build remains
+    available.
+
+    The status is "pending" while the bundle is built, "completed" once its
+    archive is stored and "failed" if the build failed.
+    """
+
+    __tablename__ = "bundles"
+    __table_args__ = (
+        sqlalchemy.Index(
+            "uq_bundles_language_age",
+            "language",
+            "age",
+            unique=True,
+        ),
+    )
+
+    language: orm.Mapped[str] = orm.mapped_column(sqlalchemy.String(16))
+    age: orm.Mapped[int] = orm.mapped_column(sqlalchemy.Integer)
+    status: orm.Mapped[str] = orm.mapped_column(
+        sqlalchemy.String(16),
+        default="pending",
+    )
+    s3_key: orm.Mapped[str | None] = orm.mapped_column(sqlalchemy.String(1024))
+    content_hash: orm.Mapped[str | None] = orm.mapped_column(sqlalchemy.String(64))
+    size: orm.Mapped[int | None] = orm.mapped_column(sqlalchemy.BigInteger)
+    word_count: orm.Mapped[int | None] = orm.mapped_column(sqlalchemy.Integer)
+    error: orm.Mapped[str | None] = orm.mapped_column(sqlalchemy.String(1024))
+
+
+class SchemaVersion(BaseTable):
+    """Table holding the single row with the version of the database schema."""
+
+    __tablename__ = "schema_version"
+
+    version: orm.Mapped[int] = orm.mapped_column(sqlalchemy.Integer)
+
+
+class IngestionRun(BaseTable):
+    """Table for tracking runs that add words to the database.
+
+    The status is "running" while the run is processed, "completed" once all
+    its items are committed and "failed" if any item could not be processed.
+    """
+
+    __tablename__ = "ingestion_runs"
+
+    status: orm.Mapped[str] = orm.mapped_column(
+        sqlalchemy.String(16),
+        default="running",
+    )
+    items: orm.Mapped[list["IngestionItem"]] = orm.relationship(
+        back_populates="run",
+        cascade="all, delete-orphan",
+    )
+
+
+class IngestionItem(BaseTable):
+    """Table for checkpointing the words of an ingestion run.
+
+    An item moves from "pending" to "generated" once its text tasks are
+    stored, to "uploaded" once its audio is on S3, and to "committed" once its
+    word is in the words table. Failed attempts keep the state and record
+    the error, so a resumed run continues from the last checkpoint.
+
+    Items double as a work queue: a worker claims an item by setting
+    `claimed_by` and a lease in `claimed_until`, after which other workers
+    skip it until the lease expires.
+    """
+
+    __tablename__ = "ingestion_items"
+    __table_args__ = (
+        sqlalchemy.Index("ix_ingestion_items_run_id_state", "run_id", "state"),
+        sqlalchemy.Index(
+            "ix_ingestion_items_state_claimed_until",
+            "state",
+            "claimed_until",
+        ),
+    )
+
+    run_id: orm.Mapped[int] = orm.mapped_column(
+        sqlalchemy.ForeignKey("ingestion_runs.id"),
+    )
+    word: orm.Mapped[str] = orm.mapped_column(sqlalchemy.String(64))
+    language: orm.Mapped[str] = orm.mapped_column(sqlalchemy.String(16))
+    age: orm.Mapped[int] = orm.mapped_column(sqlalchemy.Integer)
+    state: orm.Mapped[str] = orm.mapped_column(
+        sqlalchemy.String(16),
+        default="pending",
+    )
+    description: orm.Mapped[str | None] = orm.mapped_column(sqlalchemy.String(1024))
+    synonyms: orm.Mapped[list[str] | None] = orm.mapped_column(TermList)
+    antonyms: orm.Mapped[list[str] | None] = orm.mapped_column(TermList)
+    jeopardy: orm.Mapped[str | None] = orm.mapped_column(sqlalchemy.String(1024))
+    s3_key: orm.Mapped[str | None] = orm.mapped_column(sqlalchemy.String(1024))
+    task_versions: orm.Mapped[dict[str, dict[str, str]] | None] = orm.mapped_column(
+        sqlalchemy.JSON,
+    )
+    attempts: orm.Mapped[int] = orm.mapped_column(sqlalchemy.Integer, default=0)
+    error: orm.Mapped[str | None] = orm.mapped_column(sqlalchemy.String(1024))
+    claimed_by: orm.Mapped[str | None] = orm.mapped_column(sqlalchemy.String(128))
+    claimed_until: orm.Mapped[datetime.datetime | None] = orm.mapped_column(
+        sqlalchemy.DateTime(timezone=True),
+    )
+
+    run: orm.Mapped["IngestionRun"] = orm.relationship(back_populates="items")
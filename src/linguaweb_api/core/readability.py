@@ -0,0 +1,106 @@
+"""Readability metrics of the generated texts of words.
+
+The metrics are computed once when a word's texts are generated and stored in
+indexed columns, so that selecting words by reading level needs no text
+analysis.
+
+Syllables are counted with the hyphenation dictionaries of Pyphen, which is
+what textstat uses for words missing from its English pronunciation
+dictionary. Using Pyphen directly keeps the counts identical across languages
+and avoids textstat downloading that dictionary at runtime. Pyphen is imported
+when the first dictionary is loaded.
+"""
+import functools
+import re
+from collections import abc
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pyphen
+
+TEXT_COLUMNS = ("description", "jeopardy")
+DEFAULT_LANGUAGE = "en_US"
+
+_WORD_PATTERN = re.compile(r"[^\W\d_]+(?:['\u2019][^\W\d_]+)*")
+_SENTENCE_END_PATTERN = re.compile(r"[.!?]+")
+
+
+def measure(values: abc.Mapping[str, object], language: str) -> dict[str, float]:
+    """Computes the readability columns of a word's row.
+
+    Only the metrics of the texts present in `values` are computed, so that
+    regenerating one task only recomputes its own metrics.
+
+    Args:
+        values: The values of the word's columns, e.g. `word` and
+            `description`.
+        language: The language of the texts, e.g. "en-US".
+
+    Returns:
+        The values of the readability columns: the syllable count of the word,
+        and the Flesch reading ease and Flesch-Kincaid grade of each text.
+    """
+    dictionary = _get_dictionary(language)
+    metrics: dict[str, float] = {}
+    if isinstance(word := values.get("word"), str):
+        metrics["syllables"] = sum(
+            _count_syllables(part, dictionary) for part in _WORD_PATTERN.findall(word)
+        )
+    for column in TEXT_COLUMNS:
+        if isinstance(text := values.get(column), str):
+            reading_ease, grade = _flesch(text, dictionary)
+            metrics[f"{column}_reading_ease"] = reading_ease
+            metrics[f"{column}_grade"] = grade
+    return metrics
+
+
+def _flesch(text: str, dictionary: "pyphen.Pyphen") -> tuple[float, float]:
+    """Computes the Flesch reading ease and Flesch-Kincaid grade of a text.
+
+    Args:
+        text: The text.
+        dictionary: The hyphenation dictionary of the text's language.
+
+    Returns:
+        The reading ease and the grade. An empty text is maximally easy.
+    """
+    words = _WORD_PATTERN.findall(text)
+    if not words:
+        return 100.0, 0.0
+    sentences = max(len(_SENTENCE_END_PATTERN.findall(text.rstrip() + ".")), 1)
+    syllables = sum(_count_syllables(word, dictionary) for word in words)
+    words_per_sentence = len(words) / sentences
+    syllables_per_word = syllables / len(words)
+    reading_ease = 206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word
+    grade = 0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59
+    return round(reading_ease, 2), round(grade, 2)
+
+
+def _count_syllables(word: str, dictionary: "pyphen.Pyphen") -> int:
+    """Estimates the number of syllables of a single word.
+
+    Args:
+        word: The word.
+        dictionary: The hyphenation dictionary of the word's language.
+
+    Returns:
+        The number of hyphenation points plus one.
+    """
+    return len(dictionary.positions(word.lower())) + 1
+
+
+@functools.lru_cache
+def _get_dictionary(language: str) -> "pyphen.Pyphen":
+    """Loads the hyphenation dictionary of a language.
+
+    Args:
+        language: The language, e.g. "en-US".
+
+    Returns:
+        The dictionary of the language, or the English one if Pyphen has no
+        dictionary for it.
+    """
+    import pyphen
+
+    locale = pyphen.language_fallback(language.replace("-", "_"))
+    return pyphen.Pyphen(lang=locale or DEFAULT_LANGUAGE)
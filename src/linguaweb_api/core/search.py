@@ -0,0 +1,253 @@
+"""In-memory indexes for searching words."""
+import bisect
+import collections
+from collections import abc
+from typing import NamedTuple
+
+# The default similarity threshold of pg_trgm's `%` operator.
+DEFAULT_THRESHOLD = 0.3
+
+
+class Match(NamedTuple):
+    """A key that matches a search query.
+
+    Attributes:
+        key: The key of the matching entry.
+        score: The trigram similarity between the query and the entry.
+        prefix: Whether the entry starts with the query.
+    """
+
+    key: int
+    score: float
+    prefix: bool
+
+
+def trigrams(text: str) -> frozenset[str]:
+    """Returns the trigrams of a text the way pg_trgm computes them.
+
+    Each word is lowercased and padded with two spaces in front and one
+    behind, so that short words and word starts weigh more.
+
+    Args:
+        text: The text.
+
+    Returns:
+        The set of trigrams.
+    """
+    result: set[str] = set()
+    for word in text.lower().split():
+        padded = f"  {word} "
+        result.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return frozenset(result)
+
+
+class TrigramIndex:
+    """An in-memory index for prefix and typo-tolerant matching of short texts.
+
+    Fuzzy matches are ranked by trigram similarity, the same measure as
+    pg_trgm's `similarity()`, so that results on SQLite resemble those on
+    PostgreSQL. A key may have several texts, e.g. a word and its synonyms,
+    in which case its best matching text counts.
+    """
+
+    def __init__(self, entries: abc.Iterable[tuple[int, str]]) -> None:
+        """Initializes a new instance of the TrigramIndex class.
+
+        Args:
+            entries: The key and text of each entry.
+        """
+        self._keys: list[int] = []
+        self._sizes: list[int] = []
+        self._postings: collections.defaultdict[
+            str,
+            list[int],
+        ] = collections.defaultdict(list)
+        sorted_texts = []
+        for entry, (key, text) in enumerate(entries):
+            entry_trigrams = trigrams(text)
+            self._keys.append(key)
+            self._sizes.append(len(entry_trigrams))
+            for trigram in entry_trigrams:
+                self._postings[trigram].append(entry)
+            sorted_texts.append((text.lower(), entry))
+        sorted_texts.sort()
+        self._sorted_texts = [text for text, _ in sorted_texts]
+        self._sorted_entries = [entry for _, entry in sorted_texts]
+
+    def __len__(self) -> int:
+        """Returns the number of entries in the index."""
+        return len(self._keys)
+
+    def search(
+        self,
+        query: str,
+        *,
+        threshold: float = DEFAULT_THRESHOLD,
+        keep: abc.Callable[[int], bool] | None = None,
+    ) -> list[Match]:
+        """Finds the entries that start with or resemble a query.
+
+        Args:
+            query: The search query.
+            threshold: The minimum similarity of a fuzzy match.
+            keep: A filter on the keys of the matches.
+
+        Returns:
+            The best match per key, with prefix matches first and then by
+            descending similarity.
+        """
+        query_trigrams = trigrams(query)
+        shared = collections.Counter(
+            entry
+            for trigram in query_trigrams
+            for entry in self._postings.get(trigram, ())
+        )
+        prefix_entries = self._prefix_entries(query.lower())
+
+        matches: dict[int, Match] = {}
+        for entry in shared.keys() | prefix_entries:
+            key = self._keys[entry]
+            if keep is not None and not keep(key):
+                continue
+            count = shared[entry]
+            union = len(query_trigrams) + self._sizes[entry] - count
+            score = count / union if union else 0.0
+            prefix = entry in prefix_entries
+            if score < threshold and not prefix:
+                continue
+            match = Match(key, score, prefix)
+            best = matches.get(key)
+            if best is None or (match.prefix, match.score) > (best.prefix, best.score):
+                matches[key] = match
+        return sorted(matches.values(), key=lambda match: (-match.prefix, -match.score))
+
+    def _prefix_entries(self, prefix: str) -> set[int]:
+        """Returns the entries whose lowercase text starts with a prefix.
+
+        Args:
+            prefix: The lowercase prefix.
+
+        Returns:
+            The indices of the entries.
+        """
+        if not prefix:
+            return set()
+        start = bisect.bisect_left(self._sorted_texts, prefix)
+        end = bisect.bisect_left(self._sorted_texts, prefix + "\uffff", lo=start)
+        return set(self._sorted_entries[start:end])
+
+
+def levenshtein(first: str, second: str) -> int:
+    """Returns the edit distance between two texts.
+
+    Args:
+        first: The first text.
+        second: The second text.
+
+    Returns:
+        The minimum number of insertions, deletions and substitutions that
+        turn one text into the other.
+    """
+    if len(first) < len(second):
+        first, second = second, first
+    previous = list(range(len(second) + 1))
+    for i, first_character in enumerate(first, start=1):
+        current = [i]
+        for j, second_character in enumerate(second, start=1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (first_character != second_character),
+                ),
+            )
+        previous = current
+    return previous[-1]
+
+
+class _BKNode:
+    """A node of a BK-tree.
+
+    Attributes:
+        text: The text of the node.
+        keys: The keys of the entries with this text.
+        children: The child nodes by their distance to this node.
+    """
+
+    __slots__ = ("text", "keys", "children")
+
+    def __init__(self, text: str, key: int) -> None:
+        """Initializes a new instance of the _BKNode class.
+
+        Args:
+            text: The text of the node.
+            key: The key of the first entry with this text.
+        """
+        self.text = text
+        self.keys = {key}
+        self.children: dict[int, _BKNode] = {}
+
+
+class BKTree:
+    """A BK-tree for finding the texts within an edit distance of a query.
+
+    A search only visits the subtrees whose distance to their parent could
+    hold a match, by the triangle inequality, so that a small radius touches
+    a small part of the tree.
+    """
+
+    def __init__(self, entries: abc.Iterable[tuple[int, str]] = ()) -> None:
+        """Initializes a new instance of the BKTree class.
+
+        Args:
+            entries: The key and text of each entry.
+        """
+        self._root: _BKNode | None = None
+        for key, text in entries:
+            self.add(key, text)
+
+    def add(self, key: int, text: str) -> None:
+        """Adds an entry to the tree.
+
+        Args:
+            key: The key of the entry.
+            text: The text of the entry.
+        """
+        if self._root is None:
+            self._root = _BKNode(text, key)
+            return
+        node = self._root
+        while True:
+            distance = levenshtein(text, node.text)
+            if distance == 0:
+                node.keys.add(key)
+                return
+            child = node.children.get(distance)
+            if child is None:
+                node.children[distance] = _BKNode(text, key)
+                return
+            node = child
+
+    def search(self, query: str, max_distance: int) -> set[int]:
+        """Finds the entries within an edit distance of a query.
+
+        Args:
+            query: The query.
+            max_distance: The maximum edit distance of a match.
+
+        Returns:
+            The keys of the matching entries.
+        """
+        keys: set[int] = set()
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = levenshtein(query, node.text)
+            if distance <= max_distance:
+                keys |= node.keys
+            stack.extend(
+                child
+                for child_distance, child in node.children.items()
+                if abs(child_distance - distance) <= max_distance
+            )
+        return keys
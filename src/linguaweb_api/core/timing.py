@@ -0,0 +1,125 @@
+"""Request-scoped timing of calls to the API's dependencies."""
+import collections
+import contextlib
+import contextvars
+import dataclasses
+import time
+from collections import abc
+
+from linguaweb_api.core import metrics
+
+
+@dataclasses.dataclass
+class RequestContext:
+    """Timing state of a single request.
+
+    Attributes:
+        request_id: The ID of the request.
+        start: The `time.perf_counter` value at the start of the request.
+        durations: The total time in seconds spent per dependency.
+        counts: The number of calls per dependency.
+    """
+
+    request_id: str
+    start: float = dataclasses.field(default_factory=time.perf_counter)
+    durations: collections.defaultdict[str, float] = dataclasses.field(
+        default_factory=lambda: collections.defaultdict(float),
+    )
+    counts: collections.Counter[str] = dataclasses.field(
+        default_factory=collections.Counter,
+    )
+
+    def elapsed(self) -> float:
+        """Returns the wall time in seconds since the start of the request."""
+        return time.perf_counter() - self.start
+
+    def server_timing(self) -> str:
+        """Formats the timings as a Server-Timing header value.
+
+        Returns:
+            One metric per dependency with its total duration in milliseconds and
+            the number of calls, followed by the total duration of the request.
+        """
+        metrics = [
+            f'{name};dur={duration * 1000:.1f};desc="count={self.counts[name]}"'
+            for name, duration in self.durations.items()
+        ]
+        metrics.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+_request_context: contextvars.ContextVar[
+    RequestContext | None
+] = contextvars.ContextVar("request_context", default=None)
+
+
+@contextlib.contextmanager
+def request_context(request_id: str) -> abc.Generator[RequestContext, None, None]:
+    """Starts the timing context of a request.
+
+    Args:
+        request_id: The ID of the request.
+
+    Returns:
+        The timing context, which is shared by all tasks and threads started
+        within the request.
+    """
+    context = RequestContext(request_id=request_id)
+    token = _request_context.set(context)
+    try:
+        yield context
+    finally:
+        _request_context.reset(token)
+
+
+def get_request_id() -> str | None:
+    """Returns the ID of the current request, if any."""
+    context = _request_context.get()
+    return context.request_id if context else None
+
+
+def get_timings() -> dict[str, float] | None:
+    """Returns the time in milliseconds spent per dependency in this request."""
+    context = _request_context.get()
+    if context is None:
+        return None
+    return {
+        name: round(duration * 1000, 1) for name, duration in context.durations.items()
+    }
+
+
+def record(dependency: str, operation: str, seconds: float) -> None:
+    """Records the duration of a call to a dependency.
+
+    The duration is added to the current request's timings, if any, and to the
+    dependency's latency histogram.
+
+    Args:
+        dependency: The dependency that was called, e.g. "db" or "s3".
+        operation: The operation performed on the dependency, e.g. "get".
+        seconds: The duration of the call in seconds.
+    """
+    metrics.DEPENDENCY_DURATION.observe(seconds, dependency, operation)
+    context = _request_context.get()
+    if context is not None:
+        context.durations[dependency] += seconds
+        context.counts[dependency] += 1
+
+
+@contextlib.contextmanager
+def span(dependency: str, operation: str) -> abc.Generator[None, None, None]:
+    """Times the enclosed block as a call to a dependency.
+
+    Can be used around both synchronous calls and awaits.
+
+    Args:
+        dependency: The dependency that is called, e.g. "db" or "s3".
+        operation: The operation performed on the dependency, e.g. "get".
+    """
+    metrics.DEPENDENCY_IN_FLIGHT.inc(dependency, operation)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(dependency, operation, time.perf_counter() - start)
+        metrics.DEPENDENCY_IN_FLIGHT.dec(dependency, operation)
@@ -0,0 +1,164 @@
+"""Lexical word vectors for finding related words.
+
+Vectors are computed locally from the character trigrams of a word and the
+terms it is related to (the word itself and its synonyms), each hashed into
+its own half of a fixed number of dimensions. Words that are spelled alike or
+share synonyms are close, which makes them plausible distractors.
+
+Importing this module imports NumPy; import it where it is used to keep it
+out of the cold start.
+"""
+import zlib
+from collections import abc
+from typing import NamedTuple
+
+import numpy as np
+from numpy import typing as npt
+
+from linguaweb_api.core import search
+
+DIMENSIONS = 256
+# The spelling and the terms are hashed into separate halves of the vector, so
+# that they do not collide with each other.
+TERM_OFFSET = DIMENSIONS // 2
+DTYPE = np.float32
+# The weight of the shared terms relative to the spelling.
+TERM_WEIGHT = 1.0
+
+Vector = npt.NDArray[np.float32]
+
+
+def featurize(word: str, synonyms: abc.Iterable[str] = ()) -> Vector:
+    """Computes the vector of a word.
+
+    Args:
+        word: The word.
+        synonyms: The synonyms of the word.
+
+    Returns:
+        The unit-length vector of the word.
+    """
+    spelling = _hash_features(search.trigrams(word), 0, TERM_OFFSET)
+    terms = _hash_features(
+        {term.strip().lower() for term in (word, *synonyms)},
+        TERM_OFFSET,
+        DIMENSIONS - TERM_OFFSET,
+    )
+    return _normalize(_normalize(spelling) + TERM_WEIGHT * _normalize(terms))
+
+
+def encode(word: str, synonyms: abc.Iterable[str] = ()) -> bytes:
+    """Computes the vector of a word in its stored form.
+
+    Args:
+        word: The word.
+        synonyms: The synonyms of the word.
+
+    Returns:
+        The float32 vector as bytes.
+    """
+    return featurize(word, synonyms).tobytes()
+
+
+def decode(data: bytes) -> Vector:
+    """Converts a stored vector back to an array.
+
+    Args:
+        data: The float32 vector as bytes.
+
+    Returns:
+        The vector.
+    """
+    return np.frombuffer(data, dtype=DTYPE)
+
+
+class VectorMatrix(NamedTuple):
+    """The vectors of a group of words, stacked into one matrix.
+
+    Attributes:
+        ids: The IDs of the words, in the order of the rows.
+        matrix: The unit-length vectors of the words, one per row.
+    """
+
+    ids: npt.NDArray[np.int64]
+    matrix: npt.NDArray[np.float32]
+
+    @classmethod
+    def from_rows(cls, rows: abc.Sequence[tuple[int, bytes]]) -> "VectorMatrix":
+        """Stacks stored vectors into a matrix.
+
+        Args:
+            rows: The ID and stored vector of each word.
+
+        Returns:
+            The matrix of the vectors.
+        """
+        ids = np.fromiter((word_id for word_id, _ in rows), dtype=np.int64)
+        matrix = np.frombuffer(b"".join(data for _, data in rows), dtype=DTYPE)
+        return cls(ids, matrix.reshape(len(rows), DIMENSIONS))
+
+    def nearest(
+        self,
+        vector: Vector,
+        k: int,
+        exclude: int | None = None,
+    ) -> list[tuple[int, float]]:
+        """Finds the words whose vectors are most similar to a vector.
+
+        The cosine similarities to all words are computed with a single
+        matrix-vector product, as all vectors have unit length.
+
+        Args:
+            vector: The unit-length query vector.
+            k: The number of words to return.
+            exclude: The ID of a word to leave out, e.g. the query word.
+
+        Returns:
+            The IDs and cosine similarities of the nearest words, most similar
+            first.
+        """
+        scores = self.matrix @ vector
+        if exclude is not None:
+            scores[self.ids == exclude] = -np.inf
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(self.ids[index]), float(scores[index])) for index in top]
+
+
+def _hash_features(features: abc.Iterable[str], offset: int, size: int) -> Vector:
+    """Hashes features into a range of the dimensions of a vector.
+
+    A stable hash is used, as vectors are stored and compared across
+    processes. One bit of the hash sets the sign, so that collisions cancel
+    out on average.
+
+    Args:
+        features: The features.
+        offset: The first dimension of the range.
+        size: The number of dimensions of the range.
+
+    Returns:
+        The unnormalized vector, which is zero outside of the range.
+    """
+    vector = np.zeros(DIMENSIONS, dtype=DTYPE)
+    for feature in features:
+        digest = zlib.crc32(feature.encode("utf-8"))
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        vector[offset + digest % size] += sign
+    return vector
+
+
+def _normalize(vector: Vector) -> Vector:
+    """Scales a vector to unit length.
+
+    Args:
+        vector: The vector.
+
+    Returns:
+        The vector with unit length, or the vector itself if it is zero.
+    """
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
@@ -1,26 +1,47 @@
 """Entrypoint for the API."""
+import contextlib
 import logging
+from collections import abc
 
 import fastapi
 from fastapi import responses
 from fastapi.middleware import cors
 
-from linguaweb_api.core import config, middleware
+from linguaweb_api.core import config, middleware, migrations
 from linguaweb_api.microservices import sql
 from linguaweb_api.routers.admin import views as admin_views
 from linguaweb_api.routers.health import views as health_views
+from linguaweb_api.routers.metrics import views as metrics_views
 from linguaweb_api.routers.speech import views as speech_views
 from linguaweb_api.routers.words import views as words_views
 
 settings = config.get_settings()
 LOGGER_NAME = settings.LOGGER_NAME
+ENVIRONMENT = settings.ENVIRONMENT
 
 config.initialize_logger()
 logger = logging.getLogger(LOGGER_NAME)
 
 
+@contextlib.asynccontextmanager
+async def lifespan(_app: fastapi.FastAPI) -> abc.AsyncGenerator[None, None]:
+    """Checks the database schema version on startup.
+
+    In development, pending migrations are applied. Other environments apply
+    them ahead of deployment with `python -m linguaweb_api migrate`, so that
+    startup costs a single query.
+    """
+    engine = sql.Database().engine
+    if ENVIRONMENT == "development":
+        migrations.migrate(engine)
+    else:
+        migrations.check(engine)
+    yield
+
+
 logger.info("Starting API.")
 app = fastapi.FastAPI(
+    lifespan=lifespan,
     title="LinguaWeb API",
     version="0.0.2",
     contact={
@@ -46,11 +67,7 @@ base_router.include_router(health_views.router)
 base_router.include_router(speech_views.router)
 base_router.include_router(words_views.router)
 app.include_router(base_router)
-
-logger.info("Initializing microservices.")
-logger.debug("Initializing SQL microservice.")
-database = sql.Database()
-database.create_database()
+app.include_router(metrics_views.router)
 
 logger.info("Adding middleware.")
 logger.debug("Adding CORS middleware.")
@@ -61,5 +78,5 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-logger.debug("Adding request logger middleware.")
-app.add_middleware(middleware.RequestLoggerMiddleware)
+logger.debug("Adding request timing middleware.")
+app.add_middleware(middleware.RequestTimingMiddleware)
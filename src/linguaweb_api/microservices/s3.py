@@ -1,10 +1,13 @@
-"""Interactions with an S3/MinIO bucket."""
-import logging
+"""Interactions with an S3/MinIO bucket.
 
-import boto3
-from botocore import errorfactory
+boto3 is imported when a client is created rather than with this module, as
+importing it takes a large share of a cold start.
+"""
+import logging
+from collections import abc
+from typing import IO
 
-from linguaweb_api.core import config
+from linguaweb_api.core import config, timing
 
 settings = config.get_settings()
 S3_BUCKET_NAME = settings.S3_BUCKET_NAME
@@ -13,6 +16,9 @@ S3_ACCESS_KEY = settings.S3_ACCESS_KEY
 S3_SECRET_KEY = settings.S3_SECRET_KEY
 S3_REGION = settings.S3_REGION
 LOGGER_NAME = settings.LOGGER_NAME
+STREAM_CHUNK_SIZE = 1024 * 1024
+# The maximum number of objects that S3 deletes in one request.
+DELETE_BATCH_SIZE = 1000
 
 logger = logging.getLogger(LOGGER_NAME)
 
@@ -31,6 +37,8 @@ class S3:
         Args:
             bucket_name: The name of the bucket.
         """
+        import boto3
+
         logger.debug("Connecting to S3 at: %s", S3_ENDPOINT_URL)
         self.s3 = boto3.resource(
             "s3",
@@ -52,7 +60,8 @@ class S3:
             key: The key of the object.
             data: The data to store in the object.
         """
-        self.bucket.put_object(Key=key, Body=data)
+        with timing.span("s3", "put"):
+            self.bucket.put_object(Key=key, Body=data)
 
     def read(self, key: str) -> bytes:
         """Reads an object from the bucket.
@@ -60,10 +69,52 @@ class S3:
         Args:
             key: The key of the object.
         """
-        return self.bucket.Object(key).get()["Body"].read()
+        with timing.span("s3", "get"):
+            return self.bucket.Object(key).get()["Body"].read()
+
+    def upload(self, key: str, file: IO[bytes]) -> None:
+        """Creates an object from a file, uploading large files in parts.
+
+        Args:
+            key: The key of the object.
+            file: The file to upload, from its current position.
+        """
+        with timing.span("s3", "put"):
+            self.bucket.upload_fileobj(file, key)
+
+    def stream(self, key: str) -> abc.Generator[bytes, None, None]:
+        """Reads an object from the bucket in chunks.
+
+        Args:
+            key: The key of the object.
+
+        Yields:
+            Consecutive chunks of the object.
+        """
+        with timing.span("s3", "get"):
+            body = self.bucket.Object(key).get()["Body"]
+        try:
+            yield from body.iter_chunks(STREAM_CHUNK_SIZE)
+        finally:
+            body.close()
+
+    def delete(self, keys: abc.Sequence[str]) -> None:
+        """Deletes objects from the bucket. Missing objects are ignored.
+
+        Args:
+            keys: The keys of the objects.
+        """
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            batch = keys[start : start + DELETE_BATCH_SIZE]
+            with timing.span("s3", "delete"):
+                self.bucket.delete_objects(
+                    Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+                )
 
     def _is_existing_bucket(self, bucket_name: str) -> bool:
         """Ensure that the bucket exists, and if not, create it."""
+        from botocore import errorfactory
+
         try:
             self.s3.meta.client.head_bucket(Bucket=bucket_name)
         except errorfactory.ClientError:
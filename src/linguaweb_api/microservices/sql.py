@@ -1,12 +1,17 @@
 """A module for interacting with the SQL database."""
+import collections
+import contextlib
+import functools
 import logging
+import time
 from collections import abc
 from typing import Any
 
 import sqlalchemy
-from sqlalchemy import orm, pool
+from sqlalchemy import orm
+from sqlalchemy.dialects import postgresql, sqlite
 
-from linguaweb_api.core import config
+from linguaweb_api.core import config, metrics, timing
 
 settings = config.get_settings()
 LOGGER_NAME = settings.LOGGER_NAME
@@ -21,6 +26,8 @@ logger = logging.getLogger(LOGGER_NAME)
 
 Base = orm.declarative_base()
 
+_table_writes: collections.Counter[str] = collections.Counter()
+
 
 class Database:
     """A class representing a database connection."""
@@ -32,13 +39,7 @@ class Database:
         PostgreSQL database.
         """
         logger.debug("Initializing database.")
-        db_url = self.get_db_url()
-        engine_args: dict[str, Any] = {}
-        if ENVIRONMENT == "development":
-            engine_args["connect_args"] = {"check_same_thread": False}
-            engine_args["poolclass"] = pool.StaticPool
-
-        self.engine = sqlalchemy.create_engine(db_url, **engine_args)
+        self.engine = _get_engine(self.get_db_url())
         self.session_factory = orm.scoped_session(
             orm.sessionmaker(
                 autocommit=False,
@@ -74,6 +75,19 @@ def get_session() -> abc.Generator[orm.Session, None, None]:
 
     Used for dependency injection in FastAPI.
 
+    Returns:
+        orm.Session: A database session.
+    """
+    with session_scope() as session:
+        yield session
+
+
+@contextlib.contextmanager
+def session_scope() -> abc.Generator[orm.Session, None, None]:
+    """Provides a database session that is closed on exit.
+
+    Used for work that outlives a request, such as background tasks.
+
     Returns:
         orm.Session: A database session.
     """
@@ -82,3 +96,138 @@ def get_session() -> abc.Generator[orm.Session, None, None]:
         yield session
     finally:
         session.close()
+
+
+def insert_ignore(
+    session: orm.Session,
+    model: Any,  # noqa: ANN401
+    index_elements: abc.Sequence[str],
+) -> postgresql.Insert | sqlite.Insert:
+    """Creates an INSERT that skips rows violating a unique index.
+
+    Compiles to `INSERT ... ON CONFLICT DO NOTHING` on both PostgreSQL and
+    SQLite.
+
+    Args:
+        session: The database session, used to determine the dialect.
+        model: The model to insert into.
+        index_elements: The columns of the unique index.
+
+    Returns:
+        The insert statement, to which values and a RETURNING clause can be
+        added.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model).on_conflict_do_nothing(
+            index_elements=index_elements,
+        )
+    return sqlite.insert(model).on_conflict_do_nothing(index_elements=index_elements)
+
+
+def json_array_contains(
+    session: orm.Session,
+    column: orm.InstrumentedAttribute[Any],
+    value: str,
+) -> sqlalchemy.ColumnElement[bool]:
+    """Creates a condition that a JSON array column contains a value.
+
+    Compiles to the JSONB containment operator on PostgreSQL, which can use a
+    GIN index, and to a search with `json_each` on SQLite.
+
+    Args:
+        session: The database session, used to determine the dialect.
+        column: The JSON array column.
+        value: The value to search for.
+
+    Returns:
+        The condition, to be used in a WHERE clause.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        return sqlalchemy.type_coerce(column, postgresql.JSONB).contains([value])
+    elements = sqlalchemy.func.json_each(column).table_valued("value")
+    return sqlalchemy.exists().select_from(elements).where(elements.c.value == value)
+
+
+def get_table_writes(table_name: str) -> int:
+    """Returns the number of writes to a table made by this process.
+
+    Used to invalidate in-memory copies of a table's contents.
+
+    Args:
+        table_name: The name of the table.
+
+    Returns:
+        The number of INSERT, UPDATE and DELETE statements executed on the
+        table.
+    """
+    return _table_writes[table_name]
+
+
+@functools.cache
+def _get_engine(db_url: str) -> sqlalchemy.Engine:
+    """Creates the engine for a database URL once per process.
+
+    Sharing the engine lets all sessions draw from the same connection pool,
+    rather than opening a new connection for every request.
+
+    Args:
+        db_url: The URL of the database.
+
+    Returns:
+        The engine.
+    """
+    logger.debug("Creating database engine.")
+    engine_args: dict[str, Any] = {}
+    if db_url.startswith("sqlite"):
+        # Pooled connections are shared between the event loop and worker threads.
+        engine_args["connect_args"] = {"check_same_thread": False}
+
+    engine = sqlalchemy.create_engine(db_url, **engine_args)
+    sqlalchemy.event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    sqlalchemy.event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    sqlalchemy.event.listen(
+        engine,
+        "checkout",
+        lambda *_: metrics.DB_POOL_CHECKED_OUT.inc(),
+    )
+    sqlalchemy.event.listen(
+        engine,
+        "checkin",
+        lambda *_: metrics.DB_POOL_CHECKED_OUT.dec(),
+    )
+    return engine
+
+
+def _before_cursor_execute(
+    _connection: sqlalchemy.Connection,
+    _cursor: Any,  # noqa: ANN401
+    _statement: str,
+    _parameters: Any,  # noqa: ANN401
+    context: Any,  # noqa: ANN401
+    _executemany: bool,  # noqa: FBT001
+) -> None:
+    """Stores the start time of a query on its execution context.
+
+    The context is discarded with the query, so a failed query, for which
+    after_cursor_execute does not fire, leaves nothing behind.
+    """
+    if context is not None:
+        context.query_start = time.perf_counter()
+
+
+def _after_cursor_execute(
+    _connection: sqlalchemy.Connection,
+    _cursor: Any,  # noqa: ANN401
+    _statement: str,
+    _parameters: Any,  # noqa: ANN401
+    context: Any,  # noqa: ANN401
+    _executemany: bool,  # noqa: FBT001
+) -> None:
+    """Records the duration of a query and counts writes to tables."""
+    if context is None:
+        return
+    timing.record("db", "query", time.perf_counter() - context.query_start)
+    if context.isinsert or context.isupdate or context.isdelete:
+        table = getattr(context.compiled.statement, "table", None)
+        if table is not None:
+            _table_writes[table.name] += 1
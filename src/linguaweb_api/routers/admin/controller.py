@@ -1,26 +1,106 @@
-"""Controller for the listening router."""
+"""Controller for the listening router.
+
+NumPy (through `core.vectors`), the OpenAI client and PyYAML are imported by the
+functions that generate words, keeping them out of the import of the API.
+"""
 import asyncio
+import csv
+import datetime
+import hashlib
+import io
+import itertools
+import json
 import logging
+import os
 import pathlib
-from typing import Literal, NamedTuple
+import socket
+import tempfile
+import zipfile
+from collections import abc
+from typing import IO, Any, Literal, NamedTuple, TypeVar
 
 import fastapi
 import pydantic
-import yaml
-from cloai import openai_api
+import sqlalchemy
 from fastapi import status
 from sqlalchemy import orm
 
-from linguaweb_api.core import config, models
-from linguaweb_api.microservices import s3
+from linguaweb_api.core import (
+    archive,
+    cache,
+    config,
+    migrations,
+    models,
+    readability,
+    timing,
+)
+from linguaweb_api.microservices import s3, sql
+from linguaweb_api.routers.admin import schemas
 
 settings = config.get_settings()
 LOGGER_NAME = settings.LOGGER_NAME
 OPENAI_VOICE = settings.OPENAI_VOICE
+OPENAI_GPT_MODEL = settings.OPENAI_GPT_MODEL
+OPENAI_TTS_MODEL = settings.OPENAI_TTS_MODEL
 OPENAI_API_KEY = settings.OPENAI_API_KEY
 PROMPT_FILE = settings.PROMPT_FILE
+INGEST_CONCURRENCY = settings.INGEST_CONCURRENCY
+INGEST_BATCH_SIZE = settings.INGEST_BATCH_SIZE
+INGEST_MAX_ATTEMPTS = settings.INGEST_MAX_ATTEMPTS
+INGEST_CLAIM_SECONDS = settings.INGEST_CLAIM_SECONDS
+EXPORT_BATCH_SIZE = settings.EXPORT_BATCH_SIZE
 logger = logging.getLogger(LOGGER_NAME)
 
+WORD_KEY_COLUMNS = ("word", "language", "age")
+
+WordKey = tuple[str, str, int]
+TaskVersions = dict[str, dict[str, str]]
+LISTENING_TASK = "listening"
+TEXT_TASK_COLUMNS = {
+    "word_description": "description",
+    "word_synonyms": "synonyms",
+    "word_antonyms": "antonyms",
+    "word_jeopardy": "jeopardy",
+}
+TERM_COLUMNS = ("synonyms", "antonyms")
+# The vectors are left out of exports, as they are derived from the words.
+EXPORT_COLUMNS = (
+    models.Word.id,
+    models.Word.word,
+    models.Word.language,
+    models.Word.age,
+    models.Word.description,
+    models.Word.synonyms,
+    models.Word.antonyms,
+    models.Word.jeopardy,
+    models.S3File.s3_key,
+    models.Word.task_versions,
+    models.Word.syllables,
+    models.Word.description_reading_ease,
+    models.Word.description_grade,
+    models.Word.jeopardy_reading_ease,
+    models.Word.jeopardy_grade,
+    models.Word.version,
+    models.Word.time_created,
+    models.Word.time_updated,
+)
+# Bundles are built in a file that moves from memory to disk beyond this size.
+BUNDLE_SPOOL_SIZE = 16 * 1024 * 1024
+BUNDLE_MANIFEST_FIELDS = (
+    "id",
+    "word",
+    "description",
+    "synonyms",
+    "antonyms",
+    "jeopardy",
+)
+ItemType = TypeVar("ItemType")
+
+_WORD_REQUESTS_ADAPTER = pydantic.TypeAdapter(list[schemas.WordRequest])
+
+# Concurrent requests for the same word share one generation run.
+_word_flights = cache.SingleFlight[WordKey, int]()
+
 
 async def add_word(
     word: str,
@@ -31,6 +111,9 @@ async def add_word(
 ) -> models.Word:
     """Adds a word to the database.
 
+    Adding a word that already exists returns the existing word. Concurrent
+    calls for the same word share a single run of the language models.
+
     Args:
         word: The word to add.
         session: The database session.
@@ -43,42 +126,104 @@ async def add_word(
     """
     logger.debug("Adding word.")
     word_model = (
-        session.query(models.Word).filter_by(word=word, language=language).first()
+        session.query(models.Word)
+        .filter_by(word=word, language=language, age=age)
+        .first()
     )
     if word_model:
         return word_model
 
     logger.debug("Word does not exist in database.")
-    text_tasks_promise = _get_text_tasks(word, language, age)
-    listening_bytes_promise = _get_listening_task(word)
-    s3_key = f"{word}_{OPENAI_VOICE.value}_{language}.mp3"
-
-    text_tasks, listening_bytes = await asyncio.gather(
-        text_tasks_promise,
-        listening_bytes_promise,
+    word_id = await _word_flights.run(
+        (word, language, age),
+        lambda: _create_word(word, session, s3_client, language, age),
     )
+    return session.get_one(models.Word, word_id)
+
+
+async def _create_word(
+    word: str,
+    session: orm.Session,
+    s3_client: s3.S3,
+    language: Literal["en-US", "nl-NL", "fr-FR"],
+    age: int,
+) -> int:
+    """Generates the tasks of a word and inserts it unless it already exists.
+
+    Args:
+        word: The word to add.
+        session: The database session.
+        s3_client: The S3 client to use.
+        language: The language of the word.
+        age: The age of the target audience.
+
+    Returns:
+        The ID of the word.
+    """
+    generated = await _generate_word(word, s3_client, language, age)
 
     logger.debug("Creating new word.")
-    existing_s3 = session.query(models.S3File).filter_by(s3_key=s3_key).first()
-    if not existing_s3:
-        existing_s3 = models.S3File(s3_key=s3_key)
-        session.add(existing_s3)
-
-    new_word = models.Word(
-        word=word,
-        description=text_tasks.word_description,
-        synonyms=text_tasks.word_synonyms,
-        antonyms=text_tasks.word_antonyms,
-        jeopardy=text_tasks.word_jeopardy,
-        language=language,
-        age=age,
-        s3_file=existing_s3,
-    )
-    s3_client.create(key=s3_key, data=listening_bytes)
-    session.add(new_word)
+    s3_key = generated.s3_key
+    s3_id = session.execute(
+        sql.insert_ignore(session, models.S3File, ["s3_key"])
+        .values(s3_key=s3_key)
+        .returning(models.S3File.id),
+    ).scalar()
+    if s3_id is None:
+        s3_id = session.execute(
+            sqlalchemy.select(models.S3File.id).filter_by(s3_key=s3_key),
+        ).scalar_one()
+    stale_renditions = _delete_renditions(session, [s3_key])
+
+    # Another process may have inserted the word since it was looked up; the
+    # unique index turns this into a no-op rather than a duplicate.
+    version = _bump_version(session)
+    word_id = session.execute(
+        sql.insert_ignore(session, models.Word, WORD_KEY_COLUMNS)
+        .values(**generated.to_row(s3_id), version=version)
+        .returning(models.Word.id),
+    ).scalar()
+    if word_id is None:
+        word_id = session.execute(
+            sqlalchemy.select(models.Word.id).filter_by(
+                word=word,
+                language=language,
+                age=age,
+            ),
+        ).scalar_one()
     session.commit()
+    s3_client.delete(stale_renditions)
     logger.debug("Added word.")
-    return new_word
+    return word_id
+
+
+def delete_word(word_id: int, session: orm.Session) -> None:
+    """Deletes a word and records its deletion for syncing clients.
+
+    The audio of the word is kept in S3, as it is shared with the word's
+    entries for other ages.
+
+    Args:
+        word_id: The ID of the word.
+        session: The database session.
+
+    Raises:
+        fastapi.HTTPException: 404 if the word does not exist.
+    """
+    logger.debug("Deleting word.")
+    deleted = session.execute(
+        sqlalchemy.delete(models.Word)
+        .where(models.Word.id == word_id)
+        .returning(models.Word.id),
+    ).scalar()
+    if deleted is None:
+        session.rollback()
+        raise fastapi.HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Word not found.",
+        )
+    session.add(models.WordTombstone(word_id=word_id, version=_bump_version(session)))
+    session.commit()
 
 
 async def add_preset_words(
@@ -98,7 +243,7 @@ async def add_preset_words(
         The word models.
     """
     logger.debug("Adding preset words.")
-    promises = []
+    word_requests: list[schemas.WordRequest] = []
 
     languages = ("en-US", "nl-NL", "fr-FR")
     for age in (6, 9, 12):
@@ -107,110 +252,1545 @@ async def add_preset_words(
             if max_words:
                 preset_words = preset_words[:max_words]
 
-            promises.extend(
-                [
-                    add_word(word, session, s3_client, language=language, age=age)  # type: ignore[arg-type]
-                    for word in preset_words
-                ],
+            word_requests.extend(
+                schemas.WordRequest(word=word, language=language, age=age)  # type: ignore[arg-type]
+                for word in preset_words
             )
 
-    word_models = await asyncio.gather(*promises)
+    word_models = await add_words(word_requests, session, s3_client)
     logger.debug("Added preset words.")
     return word_models
 
 
-class _TextTasks(NamedTuple):
-    """Named tuple for the text tasks."""
+async def add_words(
+    word_requests: abc.Iterable[schemas.WordRequest],
+    session: orm.Session,
+    s3_client: s3.S3,
+) -> list[models.Word]:
+    """Adds many words to the database.
 
-    word_description: str
-    word_synonyms: str
-    word_antonyms: str
-    word_jeopardy: str
+    Words that already exist are looked up in batches; the other words are
+    added by an ingestion run, which checkpoints every word so that a failed
+    run can be resumed with `resume_ingestion_run`.
 
+    Args:
+        word_requests: The words to add.
+        session: The database session.
+        s3_client: The S3 client to use.
+
+    Returns:
+        The word models, in the order of the requests, without duplicates.
+
+    Raises:
+        fastapi.HTTPException: 502 if some words could not be added.
+    """
+    logger.debug("Adding words.")
+    keys, missing = get_new_words(word_requests, session)
+    logger.debug("Generating %s of %s words.", len(missing), len(keys))
+
+    if missing:
+        run = create_ingestion_run(session, missing)
+        await run_ingestion(run.id, session, s3_client)
+        if run.status != "completed":
+            msg = (
+                f"Some words could not be added; resume ingestion run {run.id} "
+                "to retry them."
+            )
+            logger.error(msg)
+            raise fastapi.HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=msg,
+            )
+
+    word_ids = _get_word_ids(session, keys)
+    words = {
+        word.id: word
+        for batch in _batched(list(word_ids.values()), INGEST_BATCH_SIZE)
+        for word in session.query(models.Word).filter(models.Word.id.in_(batch))
+    }
+    logger.debug("Added words.")
+    return [words[word_ids[key]] for key in keys]
 
-async def _get_text_tasks(
-    word: str,
-    language: Literal["en-US", "nl-NL", "fr-FR"],
-    age: int,
-) -> _TextTasks:
-    """Runs GPT to get text tasks.
+
+def create_ingestion_run(
+    session: orm.Session,
+    keys: abc.Sequence[WordKey],
+) -> models.IngestionRun:
+    """Creates an ingestion run with a pending item per word.
 
     Args:
-        word: The word to get text tasks for.
-        language: The language to use.
-        age: The age of the target audience.
+        session: The database session.
+        keys: The word, language and age of the words to add.
 
     Returns:
-        The text tasks.
+        The ingestion run.
     """
-    logger.debug("Running GPT.")
-    gpt = openai_api.ChatCompletion(api_key=OPENAI_API_KEY.get_secret_value())
-    prompts = _Prompts.load()
-    if prompts.system is None:
+    run = models.IngestionRun(status="running")
+    session.add(run)
+    session.flush()
+    for batch in _batched(keys, INGEST_BATCH_SIZE):
+        session.execute(
+            sqlalchemy.insert(models.IngestionItem).values(
+                [
+                    {"run_id": run.id, "word": word, "language": language, "age": age}
+                    for word, language, age in batch
+                ],
+            ),
+        )
+    session.commit()
+    return run
+
+
+def get_ingestion_run(run_id: int, session: orm.Session) -> schemas.IngestionRun:
+    """Returns the status of an ingestion run.
+
+    Args:
+        run_id: The ID of the run.
+        session: The database session.
+
+    Returns:
+        The run, with the number of items per state.
+
+    Raises:
+        fastapi.HTTPException: 404 if the run does not exist.
+    """
+    run = session.get(models.IngestionRun, run_id)
+    if run is None:
         raise fastapi.HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="System prompts not loaded.",
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ingestion run not found.",
         )
+    counts = session.execute(
+        sqlalchemy.select(models.IngestionItem.state, sqlalchemy.func.count())
+        .where(models.IngestionItem.run_id == run_id)
+        .group_by(models.IngestionItem.state),
+    )
+    return schemas.IngestionRun(
+        id=run.id,
+        status=run.status,
+        items=dict(counts.tuples().all()),
+    )
 
-    localized_prompts = prompts.system[language]
-    age_prompts = {
-        name: prompt.replace("{{AGE}}", str(age))
-        for name, prompt in localized_prompts.items()
-    }
 
-    gpt_calls = {
-        name: gpt.run(user_prompt=word, system_prompt=age_prompts[name])
-        for name in _TextTasks._fields
-    }
+def reset_ingestion_attempts(run_id: int, session: orm.Session) -> None:
+    """Gives the unfinished items of an ingestion run a new set of attempts.
 
-    results = {key: await response for key, response in gpt_calls.items()}
-    return _TextTasks(**results)
+    Args:
+        run_id: The ID of the run.
+        session: The database session.
+    """
+    get_ingestion_run(run_id, session)
+    session.execute(
+        sqlalchemy.update(models.IngestionItem)
+        .where(
+            models.IngestionItem.run_id == run_id,
+            models.IngestionItem.state != "committed",
+        )
+        .values(attempts=0),
+    )
+    session.execute(
+        sqlalchemy.update(models.IngestionRun)
+        .where(models.IngestionRun.id == run_id)
+        .values(status="running"),
+    )
+    session.commit()
 
 
-async def _get_listening_task(word: str) -> bytes:
-    """Fetches audio for a given word from OpenAI.
+async def resume_ingestion_run(
+    run_id: int,
+    session: orm.Session,
+    s3_client: s3.S3,
+) -> schemas.IngestionRun:
+    """Resumes the unfinished items of an ingestion run.
 
     Args:
-        word: The word to fetch audio for.
+        run_id: The ID of the run.
+        session: The database session.
+        s3_client: The S3 client to use.
 
     Returns:
-        The audio bytes and the S3 key.
+        The run, with the number of items per state.
     """
-    tts = openai_api.TextToSpeech(api_key=OPENAI_API_KEY.get_secret_value())
-    return await tts.run(word, voice=OPENAI_VOICE.value)
+    get_ingestion_run(run_id, session)
+    await run_ingestion(run_id, session, s3_client)
+    return get_ingestion_run(run_id, session)
 
 
-class _Prompts(pydantic.BaseModel):
-    """A class containing OpenAI Prompts."""
+async def run_ingestion(
+    run_id: int,
+    session: orm.Session,
+    s3_client: s3.S3,
+) -> models.IngestionRun:
+    """Processes the unfinished items of an ingestion run.
 
-    model_config = pydantic.ConfigDict(extra="forbid", frozen=True)
+    Every step of an item is committed as a checkpoint: its text tasks once
+    generated, its S3 key once the audio is uploaded, and its state together
+    with the word once the word is inserted. A crash between the upload and
+    the final commit is safe, as the S3 key is deterministic and words are
+    inserted with ON CONFLICT DO NOTHING.
 
-    system: dict[str, dict[str, str]] | None
-    user: dict[str, dict[str, str]] | None
+    Args:
+        run_id: The ID of the run.
+        session: The database session.
+        s3_client: The S3 client to use.
 
-    @classmethod
-    def load(cls, prompt_path: pathlib.Path = PROMPT_FILE) -> "_Prompts":
-        """Loads prompts from a YAML file.
+    The items are claimed like a worker would, so that workers skip them
+    while this process handles them. Items that fail are attempted once; the
+    run is marked as failed if any item is left unfinished.
 
-        Args:
-            prompt_path: The path to the YAML file.
+    Returns:
+        The run, with its status updated.
+    """
+    logger.debug("Running ingestion run %s.", run_id)
+    await process_items(session, s3_client, _get_worker_id(), run_id=run_id)
+    run = session.get_one(models.IngestionRun, run_id)
+    logger.debug("Ingestion run %s %s.", run_id, run.status)
+    return run
 
-        Returns:
-            The prompts.
-        """
-        with prompt_path.open("r", encoding="utf-8") as prompt_file:
-            prompts = yaml.safe_load(prompt_file)
 
-        return cls(**prompts)
+def get_new_words(
+    word_requests: abc.Iterable[schemas.WordRequest],
+    session: orm.Session,
+) -> tuple[list[WordKey], list[WordKey]]:
+    """Finds the words that are not in the database yet.
 
+    The requests are consumed in batches, each looked up as it is read, so that
+    only the keys of the words are held in memory rather than all requests.
 
-def _read_words(language: Literal["en-US", "nl-NL", "fr-FR"]) -> list[str]:
-    """Reads the words from the dictionary file."""
-    dictionary_file = (
-        pathlib.Path(__file__).parent.parent.parent
-        / "data"
-        / f"default_words_{language}.txt"
+    Args:
+        word_requests: The words to add.
+        session: The database session.
+
+    Returns:
+        The word, language and age of all requested words without duplicates,
+        and of the words among them that do not exist yet.
+    """
+    keys: dict[WordKey, None] = {}
+    missing: list[WordKey] = []
+    requested = (
+        (request.word, request.language, request.age) for request in word_requests
+    )
+    for batch in _batched(requested, INGEST_BATCH_SIZE):
+        new_keys = [key for key in dict.fromkeys(batch) if key not in keys]
+        keys.update(dict.fromkeys(new_keys))
+        existing = _get_word_ids(session, new_keys)
+        missing.extend(key for key in new_keys if key not in existing)
+    return list(keys), missing
+
+
+def enqueue_words(
+    word_requests: abc.Iterable[schemas.WordRequest],
+    session: orm.Session,
+) -> schemas.IngestionRun:
+    """Creates an ingestion run for the new words, to be processed by workers.
+
+    Args:
+        word_requests: The words to add.
+        session: The database session.
+
+    Returns:
+        The run, with the number of items per state.
+    """
+    logger.debug("Enqueueing words.")
+    _, new_keys = get_new_words(word_requests, session)
+    run = create_ingestion_run(session, new_keys)
+    _update_run_status(session, run.id, INGEST_MAX_ATTEMPTS)
+    return get_ingestion_run(run.id, session)
+
+
+async def run_worker(
+    *,
+    batch_size: int,
+    poll_interval: float,
+    once: bool = False,
+) -> int:
+    """Processes ingestion items from the work queue until stopped.
+
+    Any number of workers, in any number of processes or containers, can run
+    against the same database; each claims a batch of items at a time.
+
+    Args:
+        batch_size: The maximum number of items to claim at a time.
+        poll_interval: The time in seconds to wait when the queue is empty.
+        once: Whether to stop once the queue is empty.
+
+    Returns:
+        The number of items processed.
+    """
+    worker_id = _get_worker_id()
+    logger.info("Starting ingestion worker %s.", worker_id)
+    s3_client = s3.S3()
+    processed = 0
+    while True:
+        with sql.session_scope() as session:
+            claimed = await process_items(
+                session,
+                s3_client,
+                worker_id,
+                limit=batch_size,
+                max_attempts=INGEST_MAX_ATTEMPTS,
+            )
+        processed += claimed
+        if claimed:
+            logger.info("Worker %s processed %s items.", worker_id, processed)
+            continue
+        if once:
+            return processed
+        await asyncio.sleep(poll_interval)
+
+
+async def process_items(  # noqa: PLR0913
+    session: orm.Session,
+    s3_client: s3.S3,
+    worker_id: str,
+    *,
+    run_id: int | None = None,
+    limit: int | None = None,
+    max_attempts: int | None = None,
+    concurrency: int | None = None,
+) -> int:
+    """Claims ingestion items and brings them to the committed state.
+
+    Every step of an item is committed as a checkpoint, see `run_ingestion`.
+    Claims are released afterwards, so failed items can be retried.
+
+    Args:
+        session: The database session.
+        s3_client: The S3 client to use.
+        worker_id: The ID of the claiming worker.
+        run_id: Only claim items of this run, if given.
+        limit: The maximum number of items to claim.
+        max_attempts: Skip items that failed this many times, if given.
+        concurrency: The number of items to generate at a time, defaults to
+            `INGEST_CONCURRENCY`.
+
+    Returns:
+        The number of items claimed.
+    """
+    checkpoints = claim_items(
+        session,
+        worker_id,
+        run_id=run_id,
+        limit=limit,
+        max_attempts=max_attempts,
+    )
+    if not checkpoints:
+        if run_id is not None:
+            _update_run_status(session, run_id, max_attempts)
+        return 0
+
+    semaphore = asyncio.Semaphore(concurrency or INGEST_CONCURRENCY)
+
+    async def advance(checkpoint: _Checkpoint) -> None:
+        async with semaphore:
+            await _advance_item(checkpoint, session, s3_client)
+
+    await asyncio.gather(
+        *(
+            advance(checkpoint)
+            for checkpoint in checkpoints
+            if checkpoint.state != "uploaded"
+        ),
+    )
+    item_ids = [checkpoint.id for checkpoint in checkpoints]
+    _commit_uploaded_items(session, s3_client, item_ids)
+    _release_items(session, item_ids, worker_id)
+    for affected_run_id in {checkpoint.run_id for checkpoint in checkpoints}:
+        _update_run_status(session, affected_run_id, max_attempts)
+    return len(checkpoints)
+
+
+def claim_items(
+    session: orm.Session,
+    worker_id: str,
+    *,
+    run_id: int | None = None,
+    limit: int | None = None,
+    max_attempts: int | None = None,
+) -> list["_Checkpoint"]:
+    """Claims unfinished ingestion items that no other worker holds.
+
+    On PostgreSQL, the candidate rows are selected with `FOR UPDATE SKIP
+    LOCKED`, so concurrent workers claim disjoint items without waiting on
+    each other. SQLite has no row locks; there, the claim relies on the
+    single UPDATE statement holding the database's write lock.
+
+    Args:
+        session: The database session.
+        worker_id: The ID of the claiming worker.
+        run_id: Only claim items of this run, if given.
+        limit: The maximum number of items to claim.
+        max_attempts: Skip items that failed this many times, if given.
+
+    Returns:
+        Snapshots of the claimed items.
+    """
+    item = models.IngestionItem
+    now = datetime.datetime.now(datetime.UTC)
+    candidates = (
+        sqlalchemy.select(item.id)
+        .where(
+            item.state != "committed",
+            sqlalchemy.or_(item.claimed_until.is_(None), item.claimed_until < now),
+        )
+        .order_by(item.id)
+        .limit(limit)
     )
+    if run_id is not None:
+        candidates = candidates.where(item.run_id == run_id)
+    if max_attempts is not None:
+        candidates = candidates.where(item.attempts < max_attempts)
+    if session.get_bind().dialect.name == "postgresql":
+        candidates = candidates.with_for_update(skip_locked=True)
+
+    claimed = session.execute(
+        sqlalchemy.update(item)
+        .where(item.id.in_(candidates))
+        .values(
+            claimed_by=worker_id,
+            claimed_until=now + datetime.timedelta(seconds=INGEST_CLAIM_SECONDS),
+        )
+        .returning(item),
+    ).scalars()
+    # Snapshot the items, as the checkpoints commit and thereby expire them.
+    checkpoints = [_Checkpoint.from_item(claimed_item) for claimed_item in claimed]
+    session.commit()
+    return checkpoints
+
+
+async def read_word_requests(
+    request: fastapi.Request,
+) -> abc.Iterator[schemas.WordRequest]:
+    """Reads the words to add from a JSON list or an uploaded file.
+
+    A JSON body is read and validated as a whole. An uploaded file is spooled
+    to disk by the form parser and parsed lazily, line by line, as the returned
+    iterator is consumed; large imports should therefore be uploaded as files.
+
+    Args:
+        request: The request, with either a JSON list of words or a multipart
+            form with a `file` and optional default `language` and `age`.
+
+    Returns:
+        The words to add.
+
+    Raises:
+        fastapi.HTTPException: 400 if the form has no file, 422 if the words
+            are invalid.
+    """
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith("multipart/form-data"):
+        try:
+            return iter(_WORD_REQUESTS_ADAPTER.validate_json(await request.body()))
+        except pydantic.ValidationError as exc_info:
+            raise fastapi.HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=exc_info.errors(include_url=False),
+            ) from exc_info
+
+    form = await request.form()
+    upload = form.get("file")
+    if upload is None or isinstance(upload, str):
+        raise fastapi.HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The form must contain a file.",
+        )
+    fields = {key: form[key] for key in ("language", "age") if form.get(key)}
+    try:
+        defaults = schemas.WordRequest.model_validate({"word": "default", **fields})
+    except pydantic.ValidationError as exc_info:
+        raise fastapi.HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=exc_info.errors(include_url=False),
+        ) from exc_info
+    return parse_word_file(upload.file, defaults.language, defaults.age)
+
+
+def parse_word_file(
+    file: IO[bytes],
+    language: schemas.Language = "en-US",
+    age: int = 12,
+) -> abc.Generator[schemas.WordRequest, None, None]:
+    """Parses a CSV or text file of words line by line.
+
+    Each line holds a word, optionally followed by its language and age,
+    separated by commas. Lines that omit them use the defaults. An optional
+    header line starting with "word" is skipped, as are empty lines. A file
+    with one word per line, such as the preset word files, is also valid.
+
+    Args:
+        file: The file, opened in binary mode.
+        language: The default language of the words.
+        age: The default age of the target audience.
+
+    Yields:
+        The words to add.
+
+    Raises:
+        fastapi.HTTPException: 422 if a line is invalid.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        for line_number, row in enumerate(csv.reader(text), start=1):
+            cells = [cell.strip() for cell in row]
+            if not any(cells) or (line_number == 1 and cells[0].lower() == "word"):
+                continue
+            optional = dict(zip(("language", "age"), cells[1:3], strict=False))
+            fields = {"word": cells[0], "language": language, "age": age}
+            fields.update({name: value for name, value in optional.items() if value})
+            try:
+                yield schemas.WordRequest.model_validate(fields)
+            except pydantic.ValidationError as exc_info:
+                msg = f"Invalid word on line {line_number}: {exc_info.errors()}"
+                raise fastapi.HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=msg,
+                ) from exc_info
+    finally:
+        text.detach()
+
+
+class _TextTasks(NamedTuple):
+    """Named tuple for the text tasks."""
+
+    word_description: str
+    word_synonyms: str
+    word_antonyms: str
+    word_jeopardy: str
+
+
+def _parse_text_tasks(results: abc.Mapping[str, str]) -> dict[str, Any]:
+    """Converts the results of text tasks to the values of their columns.
+
+    Synonyms and antonyms are split into lists here, once, so that reading a
+    word needs no string processing.
+
+    Args:
+        results: The result of each text task that was run.
+
+    Returns:
+        The value of each task's column.
+    """
+    values: dict[str, Any] = {}
+    for task, result in results.items():
+        column = TEXT_TASK_COLUMNS[task]
+        values[column] = (
+            models.split_terms(result) if column in TERM_COLUMNS else result
+        )
+    return values
+
+
+class _GeneratedWord(NamedTuple):
+    """A word with its generated tasks, whose audio has been uploaded to S3."""
+
+    word: str
+    language: str
+    age: int
+    texts: dict[str, Any]
+    s3_key: str
+    task_versions: "TaskVersions"
+    item_id: int | None = None
+
+    def to_row(self, s3_id: int) -> dict[str, Any]:
+        """Returns the values of the word's row.
+
+        Args:
+            s3_id: The ID of the word's S3 file.
+        """
+        from linguaweb_api.core import vectors
+
+        row = {
+            "word": self.word,
+            **self.texts,
+            "vector": vectors.encode(self.word, self.texts["synonyms"]),
+            "language": self.language,
+            "age": self.age,
+            "s3_id": s3_id,
+            "task_versions": self.task_versions,
+        }
+        row.update(readability.measure(row, self.language))
+        return row
+
 
-    with dictionary_file.open() as file:
+async def _generate_word(
+    word: str,
+    s3_client: s3.S3,
+    language: Literal["en-US", "nl-NL", "fr-FR"],
+    age: int,
+) -> _GeneratedWord:
+    """Generates the tasks of a word and uploads its audio to S3.
+
+    Args:
+        word: The word.
+        s3_client: The S3 client to use.
+        language: The language of the word.
+        age: The age of the target audience.
+
+    Returns:
+        The generated word.
+    """
+    task_versions = get_task_versions(language, age)
+    text_tasks, listening_bytes = await asyncio.gather(
+        _get_text_tasks(word, language, age),
+        _get_listening_task(word),
+    )
+    s3_key = _get_s3_key(word, language)
+    logger.debug("Uploading audio of %s.", word)
+    s3_client.create(key=s3_key, data=listening_bytes)
+    texts = _parse_text_tasks(text_tasks._asdict())
+    return _GeneratedWord(word, language, age, texts, s3_key, task_versions)
+
+
+class _Checkpoint(NamedTuple):
+    """A snapshot of an ingestion item."""
+
+    id: int
+    run_id: int
+    word: str
+    language: Literal["en-US", "nl-NL", "fr-FR"]
+    age: int
+    state: str
+    texts: dict[str, Any] | None
+
+    @classmethod
+    def from_item(cls, item: models.IngestionItem) -> "_Checkpoint":
+        """Creates a snapshot of an ingestion item.
+
+        Args:
+            item: The ingestion item.
+
+        Returns:
+            The snapshot.
+        """
+        texts = None if item.state == "pending" else _stored_texts(item)
+        return cls(
+            item.id,
+            item.run_id,
+            item.word,
+            item.language,  # type: ignore[arg-type]
+            item.age,
+            item.state,
+            texts,
+        )
+
+
+def _stored_texts(item: models.IngestionItem) -> dict[str, Any]:
+    """Returns the results of the text tasks stored on an ingestion item.
+
+    Args:
+        item: The ingestion item.
+
+    Returns:
+        The value of each text task's column.
+    """
+    return {
+        "description": item.description or "",
+        "synonyms": item.synonyms or [],
+        "antonyms": item.antonyms or [],
+        "jeopardy": item.jeopardy or "",
+    }
+
+
+async def _advance_item(
+    checkpoint: _Checkpoint,
+    session: orm.Session,
+    s3_client: s3.S3,
+) -> None:
+    """Generates and uploads an ingestion item, checkpointing each step.
+
+    Failures are recorded on the item rather than raised, so that one word
+    does not stop the run.
+
+    Args:
+        checkpoint: The snapshot of the item.
+        session: The database session.
+        s3_client: The S3 client to use.
+    """
+    word, language, age = checkpoint.word, checkpoint.language, checkpoint.age
+    try:
+        if checkpoint.texts is None:
+            task_versions = get_task_versions(language, age)
+            listening_task = asyncio.create_task(_get_listening_task(word))
+            try:
+                text_tasks = await _get_text_tasks(word, language, age)
+            except BaseException:
+                listening_task.cancel()
+                raise
+            _update_item(
+                session,
+                checkpoint.id,
+                state="generated",
+                task_versions=task_versions,
+                **_parse_text_tasks(text_tasks._asdict()),
+            )
+            listening_bytes = await listening_task
+        else:
+            listening_bytes = await _get_listening_task(word)
+
+        s3_key = _get_s3_key(word, language)
+        s3_client.create(key=s3_key, data=listening_bytes)
+        _update_item(session, checkpoint.id, state="uploaded", s3_key=s3_key)
+    except Exception as exc_info:  # noqa: BLE001
+        logger.warning("Failed to ingest %s: %s", word, exc_info)
+        _update_item(
+            session,
+            checkpoint.id,
+            attempts=models.IngestionItem.attempts + 1,
+            error=str(exc_info)[:1024],
+        )
+
+
+def _update_item(
+    session: orm.Session,
+    item_id: int,
+    **values: Any,  # noqa: ANN401
+) -> None:
+    """Updates and commits an ingestion item.
+
+    Args:
+        session: The database session.
+        item_id: The ID of the item.
+        values: The new values of the item's columns.
+    """
+    session.execute(
+        sqlalchemy.update(models.IngestionItem)
+        .where(models.IngestionItem.id == item_id)
+        .values(**values),
+    )
+    session.commit()
+
+
+def _commit_uploaded_items(
+    session: orm.Session,
+    s3_client: s3.S3,
+    item_ids: abc.Sequence[int],
+) -> None:
+    """Inserts the words of uploaded items and marks the items as committed.
+
+    The words and the states of a batch of items are committed in the same
+    transaction, after which the renditions of their replaced audio are
+    deleted.
+
+    Args:
+        session: The database session.
+        s3_client: The S3 client to use.
+        item_ids: The IDs of the items, of which the uploaded ones are
+            committed.
+    """
+    items = [
+        item
+        for batch in _batched(item_ids, INGEST_BATCH_SIZE)
+        for item in session.execute(
+            sqlalchemy.select(models.IngestionItem).where(
+                models.IngestionItem.id.in_(batch),
+                models.IngestionItem.state == "uploaded",
+            ),
+        ).scalars()
+    ]
+    generated = [
+        _GeneratedWord(
+            word=item.word,
+            language=item.language,
+            age=item.age,
+            texts=_stored_texts(item),
+            s3_key=item.s3_key or "",
+            task_versions=item.task_versions or {},
+            item_id=item.id,
+        )
+        for item in items
+    ]
+    for batch in _batched(generated, INGEST_BATCH_SIZE):
+        _insert_words(session, batch)
+        stale_renditions = _delete_renditions(
+            session,
+            [word.s3_key for word in batch],
+        )
+        session.execute(
+            sqlalchemy.update(models.IngestionItem)
+            .where(models.IngestionItem.id.in_([word.item_id for word in batch]))
+            .values(state="committed", error=None),
+        )
+        session.commit()
+        s3_client.delete(stale_renditions)
+
+
+def _release_items(
+    session: orm.Session,
+    item_ids: abc.Sequence[int],
+    worker_id: str,
+) -> None:
+    """Releases the claims of a worker on ingestion items.
+
+    Args:
+        session: The database session.
+        item_ids: The IDs of the items.
+        worker_id: The ID of the worker holding the claims.
+    """
+    for batch in _batched(item_ids, INGEST_BATCH_SIZE):
+        session.execute(
+            sqlalchemy.update(models.IngestionItem)
+            .where(
+                models.IngestionItem.id.in_(batch),
+                models.IngestionItem.claimed_by == worker_id,
+            )
+            .values(claimed_by=None, claimed_until=None),
+        )
+    session.commit()
+
+
+def _update_run_status(
+    session: orm.Session,
+    run_id: int,
+    max_attempts: int | None,
+) -> None:
+    """Updates the status of an ingestion run from the states of its items.
+
+    A run is completed once all items are committed, and failed once no
+    unfinished item can be retried.
+
+    Args:
+        session: The database session.
+        run_id: The ID of the run.
+        max_attempts: The number of attempts after which an item is no longer
+            retried. If None, unfinished items are not retried.
+    """
+    item = models.IngestionItem
+    unfinished = sqlalchemy.select(sqlalchemy.func.count()).where(
+        item.run_id == run_id,
+        item.state != "committed",
+    )
+    status = "completed"
+    if session.execute(unfinished).scalar_one():
+        status = "failed"
+        if max_attempts is not None:
+            retryable = unfinished.where(item.attempts < max_attempts)
+            if session.execute(retryable).scalar_one():
+                status = "running"
+    session.execute(
+        sqlalchemy.update(models.IngestionRun)
+        .where(models.IngestionRun.id == run_id)
+        .values(status=status),
+    )
+    session.commit()
+
+
+def _get_worker_id() -> str:
+    """Returns an ID that identifies this process as a worker."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _get_word_ids(
+    session: orm.Session,
+    keys: abc.Sequence[WordKey],
+) -> dict[WordKey, int]:
+    """Looks up the IDs of words in batches.
+
+    Args:
+        session: The database session.
+        keys: The word, language and age of the words.
+
+    Returns:
+        The IDs of the words that exist, by key.
+    """
+    columns = (models.Word.word, models.Word.language, models.Word.age)
+    word_ids = {}
+    for batch in _batched(keys, INGEST_BATCH_SIZE):
+        rows = session.execute(
+            sqlalchemy.select(*columns, models.Word.id).where(
+                sqlalchemy.tuple_(*columns).in_(batch),
+            ),
+        )
+        word_ids.update(
+            {(word, language, age): id_ for word, language, age, id_ in rows},
+        )
+    return word_ids
+
+
+def _insert_words(
+    session: orm.Session,
+    generated: abc.Sequence[_GeneratedWord],
+) -> None:
+    """Inserts words and their S3 files with multi-row inserts.
+
+    Rows that already exist are skipped. The inserted words are stamped with
+    a new version of the word bank. Does not commit.
+
+    Args:
+        session: The database session.
+        generated: The generated words.
+    """
+    version = _bump_version(session)
+    for batch in _batched(generated, INGEST_BATCH_SIZE):
+        s3_keys = list(dict.fromkeys(word.s3_key for word in batch))
+        session.execute(
+            sql.insert_ignore(session, models.S3File, ["s3_key"]).values(
+                [{"s3_key": s3_key} for s3_key in s3_keys],
+            ),
+        )
+        s3_ids = dict(
+            session.execute(
+                sqlalchemy.select(models.S3File.s3_key, models.S3File.id).where(
+                    models.S3File.s3_key.in_(s3_keys),
+                ),
+            )
+            .tuples()
+            .all(),
+        )
+        session.execute(
+            sql.insert_ignore(session, models.Word, WORD_KEY_COLUMNS).values(
+                [
+                    {**word.to_row(s3_ids[word.s3_key]), "version": version}
+                    for word in batch
+                ],
+            ),
+        )
+
+
+def _bump_version(session: orm.Session) -> int:
+    """Increments the version of the word bank. Does not commit.
+
+    The increment locks the row of the word bank until the transaction ends,
+    so that concurrent writes commit in the order of their versions and
+    clients syncing by version cannot miss a write.
+
+    Args:
+        session: The database session.
+
+    Returns:
+        The new version, with which the written words are stamped.
+    """
+    bank = models.WordBank
+    increment = (
+        sqlalchemy.update(bank).values(version=bank.version + 1).returning(bank.version)
+    )
+    version = session.execute(increment).scalar()
+    if version is None:
+        # A new database has no row yet.
+        session.execute(
+            sql.insert_ignore(session, bank, ["id"]).values(id=1, version=0),
+        )
+        version = session.execute(increment).scalar_one()
+    return version
+
+
+def _delete_renditions(
+    session: orm.Session,
+    s3_keys: abc.Collection[str],
+) -> list[str]:
+    """Deletes the records of the renditions of audio files. Does not commit.
+
+    Called when audio files are written, as their renditions were transcoded
+    from the previous audio. The next request for a rendition transcodes the
+    new audio. The objects of the renditions are stored under the content
+    hash of their source, so they can be deleted after committing without
+    touching renditions of the new audio.
+
+    Args:
+        session: The database session.
+        s3_keys: The keys of the written audio files.
+
+    Returns:
+        The keys of the objects of the deleted renditions.
+    """
+    sources = sqlalchemy.select(models.S3File.id).where(
+        models.S3File.s3_key.in_(s3_keys),
+    )
+    return list(
+        session.execute(
+            sqlalchemy.delete(models.S3File)
+            .where(models.S3File.source_id.in_(sources))
+            .returning(models.S3File.s3_key),
+        ).scalars(),
+    )
+
+
+def _batched(
+    items: abc.Iterable[ItemType],
+    size: int,
+) -> abc.Generator[list[ItemType], None, None]:
+    """Splits items into batches, consuming them one batch at a time.
+
+    Args:
+        items: The items to split.
+        size: The maximum size of a batch.
+
+    Yields:
+        Consecutive lists of at most `size` items.
+    """
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+async def regenerate_words(
+    session: orm.Session,
+    s3_client: s3.S3,
+    *,
+    dry_run: bool = False,
+    concurrency: int = INGEST_CONCURRENCY,
+) -> schemas.Regeneration:
+    """Regenerates the tasks of words that were generated with other prompts.
+
+    A task is outdated if its model or prompt hash differs from the current
+    configuration, or if it was never recorded. Only the outdated tasks of a
+    word are rerun.
+
+    Args:
+        session: The database session.
+        s3_client: The S3 client to use.
+        dry_run: Whether to only count the outdated words and tasks.
+        concurrency: The maximum number of words to regenerate at a time.
+
+    Returns:
+        The number of outdated words, the number of outdated words per task
+        and the number of words that failed to regenerate.
+    """
+    logger.debug("Finding outdated words.")
+    current_versions: dict[tuple[str, int], TaskVersions] = {}
+    outdated: list[_OutdatedWord] = []
+    rows = session.execute(
+        sqlalchemy.select(
+            models.Word.id,
+            models.Word.word,
+            models.Word.language,
+            models.Word.age,
+            models.Word.task_versions,
+        ).execution_options(yield_per=INGEST_BATCH_SIZE),
+    )
+    for word_id, word, language, age, task_versions in rows:
+        if (language, age) not in current_versions:
+            current_versions[language, age] = get_task_versions(language, age)
+        versions = current_versions[language, age]
+        tasks = [
+            task
+            for task, version in versions.items()
+            if (task_versions or {}).get(task) != version
+        ]
+        if tasks:
+            outdated.append(_OutdatedWord(word_id, word, language, age, tasks))
+
+    task_counts = {
+        task: count
+        for task in [*_TextTasks._fields, LISTENING_TASK]
+        if (count := sum(task in word.tasks for word in outdated))
+    }
+    if dry_run:
+        return schemas.Regeneration(words=len(outdated), tasks=task_counts, failed=0)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def regenerate(word: _OutdatedWord) -> bool:
+        async with semaphore:
+            return await _regenerate_word(
+                word,
+                current_versions[word.language, word.age],
+                session,
+                s3_client,
+            )
+
+    succeeded = await asyncio.gather(*(regenerate(word) for word in outdated))
+    return schemas.Regeneration(
+        words=len(outdated),
+        tasks=task_counts,
+        failed=succeeded.count(False),
+    )
+
+
+class _OutdatedWord(NamedTuple):
+    """A word with the tasks that were generated with other prompts."""
+
+    id: int
+    word: str
+    language: str
+    age: int
+    tasks: list[str]
+
+
+async def _regenerate_word(
+    word: _OutdatedWord,
+    current_versions: TaskVersions,
+    session: orm.Session,
+    s3_client: s3.S3,
+) -> bool:
+    """Reruns the outdated tasks of a word and commits the results.
+
+    Failures are logged rather than raised, so that one word does not stop the
+    regeneration.
+
+    Args:
+        word: The outdated word.
+        current_versions: The current versions of the word's tasks.
+        session: The database session.
+        s3_client: The S3 client to use.
+
+    Returns:
+        Whether the word was regenerated.
+    """
+    text_tasks = [task for task in word.tasks if task in TEXT_TASK_COLUMNS]
+    stale_renditions: list[str] = []
+    try:
+        listening_task = None
+        if LISTENING_TASK in word.tasks:
+            listening_task = asyncio.create_task(_get_listening_task(word.word))
+        try:
+            results = await _run_text_tasks(
+                word.word,
+                word.language,
+                word.age,
+                text_tasks,
+            )
+        except BaseException:
+            if listening_task is not None:
+                listening_task.cancel()
+            raise
+        values = _parse_text_tasks(results)
+        if "synonyms" in values:
+            from linguaweb_api.core import vectors
+
+            values["vector"] = vectors.encode(word.word, values["synonyms"])
+        values.update(readability.measure(values, word.language))
+        if listening_task is not None:
+            s3_key = _get_s3_key(word.word, word.language)
+            s3_client.create(key=s3_key, data=await listening_task)
+            session.execute(
+                sql.insert_ignore(session, models.S3File, ["s3_key"]).values(
+                    s3_key=s3_key,
+                ),
+            )
+            values["s3_id"] = session.execute(
+                sqlalchemy.select(models.S3File.id).where(
+                    models.S3File.s3_key == s3_key,
+                ),
+            ).scalar_one()
+            stale_renditions = _delete_renditions(session, [s3_key])
+    except Exception as exc_info:  # noqa: BLE001
+        logger.warning("Failed to regenerate %s: %s", word.word, exc_info)
+        session.rollback()
+        return False
+
+    stored_versions = session.execute(
+        sqlalchemy.select(models.Word.task_versions).where(
+            models.Word.id == word.id,
+        ),
+    ).scalar_one()
+    values["task_versions"] = {
+        **(stored_versions or {}),
+        **{task: current_versions[task] for task in word.tasks},
+    }
+    values["version"] = _bump_version(session)
+    session.execute(
+        sqlalchemy.update(models.Word)
+        .where(models.Word.id == word.id)
+        .values(**values),
+    )
+    session.commit()
+    s3_client.delete(stale_renditions)
+    return True
+
+
+def export_words(
+    export_format: Literal["ndjson", "csv"],
+) -> abc.Generator[str, None, None]:
+    """Streams all words as NDJSON or CSV.
+
+    The words are read through a server-side cursor in batches of
+    `EXPORT_BATCH_SIZE`, and each batch is yielded as one chunk, so that the
+    memory use does not grow with the number of words. The generator opens
+    its own session, as it outlives the request handler.
+
+    Args:
+        export_format: "ndjson" for one JSON object per line, or "csv" for a
+            header and one row per word, with lists and mappings as JSON.
+
+    Yields:
+        Chunks of the export.
+    """
+    logger.debug("Exporting words.")
+    names = [column.key for column in EXPORT_COLUMNS]
+    if export_format == "csv":
+        yield _to_csv([names])
+
+    with sql.session_scope() as session:
+        rows = session.execute(
+            sqlalchemy.select(*EXPORT_COLUMNS)
+            .join(models.S3File)
+            .order_by(models.Word.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE),
+        )
+        for batch in rows.partitions():
+            if export_format == "csv":
+                yield _to_csv(
+                    [[_to_csv_value(value) for value in row] for row in batch],
+                )
+            else:
+                yield "".join(
+                    json.dumps(
+                        dict(zip(names, row, strict=True)),
+                        default=datetime.datetime.isoformat,
+                    )
+                    + "\n"
+                    for row in batch
+                )
+
+
+def _to_csv(rows: abc.Iterable[abc.Sequence[Any]]) -> str:
+    """Formats rows as CSV.
+
+    Args:
+        rows: The rows.
+
+    Returns:
+        The CSV lines of the rows.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def _to_csv_value(value: object) -> object:
+    """Converts a column value to a CSV field.
+
+    Args:
+        value: The value of the column.
+
+    Returns:
+        Lists and mappings as JSON, timestamps in ISO 8601 format and other
+        values unchanged.
+    """
+    if isinstance(value, list | dict):
+        return json.dumps(value)
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def create_bundle(language: str, age: int, session: orm.Session) -> models.Bundle:
+    """Registers a build of the offline bundle of a language and age.
+
+    Args:
+        language: The language of the words.
+        age: The age of the target audience.
+        session: The database session.
+
+    Returns:
+        The bundle, with its status set to "pending".
+    """
+    logger.debug("Creating bundle.")
+    session.execute(
+        sql.insert_ignore(session, models.Bundle, ["language", "age"]).values(
+            language=language,
+            age=age,
+        ),
+    )
+    bundle = session.execute(
+        sqlalchemy.select(models.Bundle).filter_by(language=language, age=age),
+    ).scalar_one()
+    bundle.status = "pending"
+    bundle.error = None
+    session.commit()
+    return bundle
+
+
+def get_bundle(bundle_id: int, session: orm.Session) -> models.Bundle:
+    """Returns an offline bundle.
+
+    Args:
+        bundle_id: The ID of the bundle.
+        session: The database session.
+
+    Returns:
+        The bundle.
+
+    Raises:
+        fastapi.HTTPException: 404 if the bundle does not exist.
+    """
+    bundle = session.get(models.Bundle, bundle_id)
+    if bundle is None:
+        raise fastapi.HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bundle not found.",
+        )
+    return bundle
+
+
+async def build_bundle(bundle_id: int, s3_client: s3.S3) -> None:
+    """Builds the archive of an offline bundle and stores it in S3.
+
+    The archive holds a `manifest.json` with the words and an `audio/` entry
+    per word. It is written as a stream, one audio clip at a time, and stored
+    under its SHA-256 hash.
+
+    Args:
+        bundle_id: The ID of the bundle.
+        s3_client: The S3 client to use.
+    """
+    logger.debug("Building bundle %s.", bundle_id)
+    with sql.session_scope() as session:
+        bundle = session.get_one(models.Bundle, bundle_id)
+        try:
+            words = session.execute(
+                sqlalchemy.select(
+                    *(getattr(models.Word, field) for field in BUNDLE_MANIFEST_FIELDS),
+                    models.S3File.s3_key,
+                )
+                .join(models.S3File)
+                .where(
+                    models.Word.language == bundle.language,
+                    models.Word.age == bundle.age,
+                )
+                .order_by(models.Word.id),
+            ).all()
+            manifest_words = []
+            audio = []
+            for *fields, s3_key in words:
+                entry = dict(zip(BUNDLE_MANIFEST_FIELDS, fields, strict=True))
+                entry["audio"] = f"audio/{entry['id']}.mp3"
+                manifest_words.append(entry)
+                audio.append((entry["audio"], s3_key))
+            manifest = {
+                "language": bundle.language,
+                "age": bundle.age,
+                "words": manifest_words,
+            }
+            s3_key, content_hash, size = await asyncio.to_thread(
+                _store_bundle,
+                f"bundles/{bundle.language}/{bundle.age}",
+                manifest,
+                audio,
+                s3_client,
+            )
+            bundle.s3_key = s3_key
+            bundle.content_hash = content_hash
+            bundle.size = size
+            bundle.word_count = len(words)
+            bundle.status = "completed"
+        except Exception as exception_info:
+            logger.exception("Building bundle %s failed.", bundle_id)
+            session.rollback()
+            bundle.status = "failed"
+            bundle.error = str(exception_info)[:1024]
+        finally:
+            session.commit()
+    logger.debug("Finished bundle %s.", bundle_id)
+
+
+def _store_bundle(
+    prefix: str,
+    manifest: dict[str, Any],
+    audio: abc.Sequence[tuple[str, str]],
+    s3_client: s3.S3,
+) -> tuple[str, str, int]:
+    """Writes the archive of a bundle and uploads it to S3.
+
+    The archive is hashed while it is written, and spooled to disk once it
+    outgrows `BUNDLE_SPOOL_SIZE`.
+
+    Args:
+        prefix: The prefix of the S3 key of the archive.
+        manifest: The manifest of the bundle.
+        audio: The name in the archive and the S3 key of each audio clip.
+        s3_client: The S3 client to use.
+
+    Returns:
+        The S3 key, the SHA-256 hash and the size of the archive.
+    """
+    stream = archive.ZipStream()
+    with tempfile.SpooledTemporaryFile(max_size=BUNDLE_SPOOL_SIZE) as file:
+        file.write(
+            stream.add(
+                "manifest.json",
+                json.dumps(manifest, ensure_ascii=False).encode("utf-8"),
+                zipfile.ZIP_DEFLATED,
+            ),
+        )
+        for name, s3_key in audio:
+            file.write(stream.add(name, s3_client.read(s3_key)))
+        file.write(stream.finish())
+        content_hash = stream.hash.hexdigest()
+        s3_key = f"{prefix}/{content_hash}.zip"
+        file.seek(0)
+        s3_client.upload(s3_key, file)
+    return s3_key, content_hash, stream.size
+
+
+async def migrate() -> int:
+    """Applies pending migrations of the database schema.
+
+    Returns:
+        The version of the schema after migrating.
+    """
+    engine = sql.Database().engine
+    return await asyncio.to_thread(migrations.migrate, engine)
+
+
+async def _get_text_tasks(
+    word: str,
+    language: Literal["en-US", "nl-NL", "fr-FR"],
+    age: int,
+) -> _TextTasks:
+    """Runs GPT to get text tasks.
+
+    Args:
+        word: The word to get text tasks for.
+        language: The language to use.
+        age: The age of the target audience.
+
+    Returns:
+        The text tasks.
+    """
+    results = await _run_text_tasks(word, language, age, _TextTasks._fields)
+    return _TextTasks(**results)
+
+
+async def _run_text_tasks(
+    word: str,
+    language: str,
+    age: int,
+    tasks: abc.Iterable[str],
+) -> dict[str, str]:
+    """Runs GPT for a subset of the text tasks.
+
+    Args:
+        word: The word to get text tasks for.
+        language: The language to use.
+        age: The age of the target audience.
+        tasks: The names of the text tasks to run.
+
+    Returns:
+        The result of each task.
+    """
+    from cloai import openai_api
+
+    logger.debug("Running GPT.")
+    gpt = openai_api.ChatCompletion(api_key=OPENAI_API_KEY.get_secret_value())
+    age_prompts = _render_prompts(language, age)
+
+    gpt_calls = {
+        name: gpt.run(
+            user_prompt=word,
+            system_prompt=age_prompts[name],
+            model=OPENAI_GPT_MODEL.value,  # type: ignore[arg-type]
+        )
+        for name in tasks
+    }
+
+    with timing.span("llm", "chat"):
+        return {key: await response for key, response in gpt_calls.items()}
+
+
+def get_task_versions(language: str, age: int) -> TaskVersions:
+    """Returns the model and prompt hash that each task is generated with.
+
+    Args:
+        language: The language of the words.
+        age: The age of the target audience.
+
+    Returns:
+        Per task, the model and a hash of the rendered prompt. The listening
+        task's prompt is its voice.
+    """
+    versions = {
+        name: {"model": OPENAI_GPT_MODEL.value, "prompt_hash": _hash_prompt(prompt)}
+        for name, prompt in _render_prompts(language, age).items()
+        if name in _TextTasks._fields
+    }
+    versions[LISTENING_TASK] = {
+        "model": OPENAI_TTS_MODEL.value,
+        "prompt_hash": _hash_prompt(OPENAI_VOICE.value),
+    }
+    return versions
+
+
+def _render_prompts(language: str, age: int) -> dict[str, str]:
+    """Renders the system prompts of the text tasks.
+
+    Args:
+        language: The language of the prompts.
+        age: The age of the target audience.
+
+    Returns:
+        The system prompt of each text task.
+    """
+    prompts = _Prompts.load()
+    if prompts.system is None:
+        raise fastapi.HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="System prompts not loaded.",
+        )
+
+    localized_prompts = prompts.system[language]
+    return {
+        name: prompt.replace("{{AGE}}", str(age))
+        for name, prompt in localized_prompts.items()
+    }
+
+
+def _hash_prompt(prompt: str) -> str:
+    """Returns a short hash of a prompt."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+def _get_s3_key(word: str, language: str) -> str:
+    """Returns the S3 key of the audio of a word."""
+    return f"{word}_{OPENAI_VOICE.value}_{language}.mp3"
+
+
+async def _get_listening_task(word: str) -> bytes:
+    """Fetches audio for a given word from OpenAI.
+
+    Args:
+        word: The word to fetch audio for.
+
+    Returns:
+        The audio bytes and the S3 key.
+    """
+    from cloai import openai_api
+
+    tts = openai_api.TextToSpeech(api_key=OPENAI_API_KEY.get_secret_value())
+    with timing.span("llm", "tts"):
+        return await tts.run(
+            word,
+            model=OPENAI_TTS_MODEL.value,
+            voice=OPENAI_VOICE.value,
+        )
+
+
+class _Prompts(pydantic.BaseModel):
+    """A class containing OpenAI Prompts."""
+
+    model_config = pydantic.ConfigDict(extra="forbid", frozen=True)
+
+    system: dict[str, dict[str, str]] | None
+    user: dict[str, dict[str, str]] | None
+
+    @classmethod
+    def load(cls, prompt_path: pathlib.Path = PROMPT_FILE) -> "_Prompts":
+        """Loads prompts from a YAML file.
+
+        Args:
+            prompt_path: The path to the YAML file.
+
+        Returns:
+            The prompts.
+        """
+        import yaml
+
+        with prompt_path.open("r", encoding="utf-8") as prompt_file:
+            prompts = yaml.safe_load(prompt_file)
+
+        return cls(**prompts)
+
+
+def get_preset_word_file(language: Literal["en-US", "nl-NL", "fr-FR"]) -> pathlib.Path:
+    """Returns the path of the file with the preset words of a language."""
+    return (
+        pathlib.Path(__file__).parent.parent.parent
+        / "data"
+        / f"default_words_{language}.txt"
+    )
+
+
+def _read_words(language: Literal["en-US", "nl-NL", "fr-FR"]) -> list[str]:
+    """Reads the words from the dictionary file."""
+    with get_preset_word_file(language).open() as file:
         return file.read().splitlines()
@@ -1,6 +1,10 @@
 """Schemas for the admin API."""
+from typing import Literal
+
 import pydantic
 
+Language = Literal["en-US", "nl-NL", "fr-FR"]
+
 
 class Word(pydantic.BaseModel):
     """Word data, with the word itself."""
@@ -14,3 +18,63 @@ class Word(pydantic.BaseModel):
     antonyms: list[str]
     jeopardy: str
     language: str
+
+
+class WordRequest(pydantic.BaseModel):
+    """A word to add, with the language and age of its tasks."""
+
+    word: str = pydantic.Field(..., min_length=1, max_length=64)
+    language: Language = "en-US"
+    age: int = 12
+
+
+class IngestionRun(pydantic.BaseModel):
+    """The status of an ingestion run."""
+
+    id: int
+    status: str
+    items: dict[str, int] = pydantic.Field(
+        ...,
+        description="The number of items per state.",
+    )
+
+
+class Regeneration(pydantic.BaseModel):
+    """The outdated words found by a regeneration."""
+
+    words: int = pydantic.Field(..., description="The number of outdated words.")
+    tasks: dict[str, int] = pydantic.Field(
+        ...,
+        description="The number of outdated words per task.",
+    )
+    failed: int = pydantic.Field(
+        ...,
+        description="The number of words that failed to regenerate.",
+    )
+
+
+class Bundle(pydantic.BaseModel):
+    """The state of the offline bundle of a language and age."""
+
+    model_config = pydantic.ConfigDict(from_attributes=True)
+
+    id: int
+    language: str
+    age: int
+    status: str
+    content_hash: str | None = pydantic.Field(
+        ...,
+        description="The SHA-256 hash of the latest archive, used as its ETag.",
+    )
+    size: int | None = pydantic.Field(
+        ...,
+        description="The size of the latest archive in bytes.",
+    )
+    word_count: int | None
+    error: str | None
+
+
+class SchemaVersion(pydantic.BaseModel):
+    """The version of the database schema."""
+
+    version: int
@@ -1,8 +1,9 @@
 """Admin views."""
 import logging
+from typing import Literal
 
 import fastapi
-from fastapi import status
+from fastapi import responses, status
 from sqlalchemy import orm
 
 from linguaweb_api.core import config, models, security
@@ -14,6 +15,35 @@ LOGGER_NAME = settings.LOGGER_NAME
 
 logger = logging.getLogger(LOGGER_NAME)
 
+# Endpoints that add words accept a JSON list or a file, so their request body
+# is documented by hand.
+WORDS_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {
+                    "type": "array",
+                    "items": schemas.WordRequest.model_json_schema(),
+                },
+            },
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                        "language": {"type": "string"},
+                        "age": {"type": "integer"},
+                    },
+                },
+            },
+        },
+    },
+}
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
 router = fastapi.APIRouter(
     prefix="/admin",
     tags=["admin"],
@@ -52,6 +82,33 @@ async def add_word(
     return word_model
 
 
+@router.delete(
+    "/words/{word_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Deletes a word from the database.",
+    description="""Deletes a word. The deletion is recorded, so that clients
+    syncing the word bank remove the word as well.""",
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Word not found.",
+        },
+    },
+)
+async def delete_word(
+    word_id: int = fastapi.Path(..., title="The ID of the word to delete."),
+    session: orm.Session = fastapi.Depends(sql.get_session),
+) -> None:
+    """Deletes a word from the database.
+
+    Args:
+        word_id: The ID of the word.
+        session: The database session.
+    """
+    logger.debug("Deleting word.")
+    controller.delete_word(word_id, session)
+    logger.debug("Deleted word.")
+
+
 @router.post(
     "/add_preset_words",
     response_model=list[schemas.Word],
@@ -85,3 +142,281 @@ async def add_preset_words(
     word_models = await controller.add_preset_words(session, s3_client, max_words)
     logger.debug("Added preset words.")
     return word_models
+
+
+@router.post(
+    "/add_words",
+    response_model=list[schemas.Word],
+    status_code=status.HTTP_201_CREATED,
+    summary="Adds many words to the database.",
+    description="""Adds a JSON list of words, or the words in an uploaded CSV or
+    text file, to the database. Each line of a file holds a word, optionally
+    followed by its language and age; the `language` and `age` form fields set
+    the defaults. Words that already exist are returned as is.""",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "The form does not contain a file.",
+        },
+    },
+    openapi_extra=WORDS_REQUEST_BODY,
+)
+async def add_words(
+    request: fastapi.Request,
+    session: orm.Session = fastapi.Depends(sql.get_session),
+    s3_client: s3.S3 = fastapi.Depends(s3.S3),
+) -> list[models.Word]:
+    """Adds many words to the database.
+
+    Args:
+        request: The request containing the words.
+        session: The database session.
+        s3_client: The S3 client to use.
+    """
+    logger.debug("Adding words.")
+    word_requests = await controller.read_word_requests(request)
+    word_models = await controller.add_words(word_requests, session, s3_client)
+    logger.debug("Added words.")
+    return word_models
+
+
+@router.post(
+    "/migrate",
+    response_model=schemas.SchemaVersion,
+    status_code=status.HTTP_200_OK,
+    summary="Migrates the database schema.",
+    description="""Applies all pending migrations of the database schema. Should be
+    run after deploying a release that changes the schema.""",
+)
+async def migrate() -> schemas.SchemaVersion:
+    """Migrates the database schema."""
+    logger.debug("Migrating database schema.")
+    version = await controller.migrate()
+    logger.debug("Migrated database schema.")
+    return schemas.SchemaVersion(version=version)
+
+
+@router.post(
+    "/ingestion_runs",
+    response_model=schemas.IngestionRun,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Queues words for the ingestion workers.",
+    description="""Creates an ingestion run for the words that do not exist yet,
+    without processing it. Accepts the same input as `/add_words`. The run is
+    processed by workers started with `python -m linguaweb_api worker`.""",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "The form does not contain a file.",
+        },
+    },
+    openapi_extra=WORDS_REQUEST_BODY,
+)
+async def create_ingestion_run(
+    request: fastapi.Request,
+    session: orm.Session = fastapi.Depends(sql.get_session),
+) -> schemas.IngestionRun:
+    """Queues words for the ingestion workers.
+
+    Args:
+        request: The request containing the words.
+        session: The database session.
+    """
+    logger.debug("Creating ingestion run.")
+    word_requests = await controller.read_word_requests(request)
+    run = controller.enqueue_words(word_requests, session)
+    logger.debug("Created ingestion run.")
+    return run
+
+
+@router.get(
+    "/ingestion_runs/{run_id}",
+    response_model=schemas.IngestionRun,
+    status_code=status.HTTP_200_OK,
+    summary="Returns the status of an ingestion run.",
+    description="Returns the status of an ingestion run and its items per state.",
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Ingestion run not found.",
+        },
+    },
+)
+async def get_ingestion_run(
+    run_id: int = fastapi.Path(..., title="The ID of the ingestion run."),
+    session: orm.Session = fastapi.Depends(sql.get_session),
+) -> schemas.IngestionRun:
+    """Returns the status of an ingestion run.
+
+    Args:
+        run_id: The ID of the ingestion run.
+        session: The database session.
+    """
+    logger.debug("Getting ingestion run.")
+    run = controller.get_ingestion_run(run_id, session)
+    logger.debug("Got ingestion run.")
+    return run
+
+
+@router.post(
+    "/ingestion_runs/{run_id}/resume",
+    response_model=schemas.IngestionRun,
+    status_code=status.HTTP_200_OK,
+    summary="Resumes an ingestion run.",
+    description="""Retries the items of an ingestion run that have not been
+    committed, continuing from their last checkpoint.""",
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Ingestion run not found.",
+        },
+    },
+)
+async def resume_ingestion_run(
+    run_id: int = fastapi.Path(..., title="The ID of the ingestion run."),
+    session: orm.Session = fastapi.Depends(sql.get_session),
+    s3_client: s3.S3 = fastapi.Depends(s3.S3),
+) -> schemas.IngestionRun:
+    """Resumes an ingestion run.
+
+    Args:
+        run_id: The ID of the ingestion run.
+        session: The database session.
+        s3_client: The S3 client to use.
+    """
+    logger.debug("Resuming ingestion run.")
+    run = await controller.resume_ingestion_run(run_id, session, s3_client)
+    logger.debug("Resumed ingestion run.")
+    return run
+
+
+@router.get(
+    "/export",
+    response_class=responses.StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Exports all words.",
+    description="""Streams all words as NDJSON, one JSON object per line, or as
+    CSV. The words are read in batches, so the export starts immediately and
+    its memory use does not depend on the number of words.""",
+    responses={
+        status.HTTP_200_OK: {
+            "content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()},
+        },
+    },
+)
+async def export_words(
+    export_format: Literal["ndjson", "csv"] = fastapi.Query(
+        "ndjson",
+        alias="format",
+        title="The format of the export.",
+        description="The format of the export, NDJSON or CSV.",
+    ),
+) -> responses.StreamingResponse:
+    """Exports all words.
+
+    Args:
+        export_format: The format of the export.
+    """
+    logger.debug("Exporting words.")
+    return responses.StreamingResponse(
+        controller.export_words(export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="words.{export_format}"',
+        },
+    )
+
+
+@router.post(
+    "/bundles",
+    response_model=schemas.Bundle,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Builds the offline bundle of a language and age.",
+    description="""Packages all words of a language and age, with their audio,
+    into a single archive in the background. Returns immediately with the
+    bundle; poll `/admin/bundles/{bundle_id}` for its status. Devices download
+    the archive from `/words/bundles/{language}/{age}`.""",
+)
+async def create_bundle(
+    background_tasks: fastapi.BackgroundTasks,
+    language: schemas.Language = fastapi.Form(
+        ...,
+        title="The language of the words.",
+    ),
+    age: int = fastapi.Form(..., title="The age of the target audience."),
+    session: orm.Session = fastapi.Depends(sql.get_session),
+    s3_client: s3.S3 = fastapi.Depends(s3.S3),
+) -> schemas.Bundle:
+    """Builds the offline bundle of a language and age.
+
+    Args:
+        background_tasks: The background tasks of the request.
+        language: The language of the words.
+        age: The age of the target audience.
+        session: The database session.
+        s3_client: The S3 client to use.
+    """
+    logger.debug("Creating bundle.")
+    bundle = controller.create_bundle(language, age, session)
+    background_tasks.add_task(controller.build_bundle, bundle.id, s3_client)
+    logger.debug("Created bundle.")
+    return schemas.Bundle.model_validate(bundle)
+
+
+@router.get(
+    "/bundles/{bundle_id}",
+    response_model=schemas.Bundle,
+    status_code=status.HTTP_200_OK,
+    summary="Returns the status of an offline bundle.",
+    description="Returns the status and the latest archive of an offline bundle.",
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Bundle not found.",
+        },
+    },
+)
+async def get_bundle(
+    bundle_id: int = fastapi.Path(..., title="The ID of the bundle."),
+    session: orm.Session = fastapi.Depends(sql.get_session),
+) -> schemas.Bundle:
+    """Returns the status of an offline bundle.
+
+    Args:
+        bundle_id: The ID of the bundle.
+        session: The database session.
+    """
+    logger.debug("Getting bundle.")
+    bundle = controller.get_bundle(bundle_id, session)
+    logger.debug("Got bundle.")
+    return schemas.Bundle.model_validate(bundle)
+
+
+@router.post(
+    "/regenerate",
+    response_model=schemas.Regeneration,
+    status_code=status.HTTP_200_OK,
+    summary="Regenerates words generated with outdated prompts.",
+    description="""Reruns the tasks of words whose model or prompt differs from the
+    current configuration. Only the outdated tasks of a word are rerun. With
+    `dry_run`, only counts the outdated words and tasks.""",
+)
+async def regenerate_words(
+    session: orm.Session = fastapi.Depends(sql.get_session),
+    s3_client: s3.S3 = fastapi.Depends(s3.S3),
+    dry_run: bool = fastapi.Form(  # noqa: FBT001
+        False,  # noqa: FBT003
+        title="Whether to only count the outdated words.",
+        description="Whether to only count the outdated words and tasks.",
+    ),
+) -> schemas.Regeneration:
+    """Regenerates words generated with outdated prompts.
+
+    Args:
+        session: The database session.
+        s3_client: The S3 client to use.
+        dry_run: Whether to only count the outdated words and tasks.
+    """
+    logger.debug("Regenerating outdated words.")
+    regeneration = await controller.regenerate_words(
+        session,
+        s3_client,
+        dry_run=dry_run,
+    )
+    logger.debug("Regenerated outdated words.")
+    return regeneration
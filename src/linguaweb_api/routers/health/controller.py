@@ -1,6 +1,8 @@
-"""Controller to assess the health of the services."""
+"""Controller to assess the health of the services.
+
+`requests` is imported by the connectivity check, the only code that uses it.
+"""
 import fastapi
-import requests
 from fastapi import status
 
 
@@ -10,6 +12,8 @@ def get_api_health() -> None:
 
 def get_internet_connectivity() -> None:
     """Checks the internet connectivity of the API."""
+    import requests
+
     response = requests.get("https://www.google.com", timeout=5)
     if response.status_code != status.HTTP_200_OK:
         raise fastapi.HTTPException(
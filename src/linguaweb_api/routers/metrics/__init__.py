@@ -0,0 +1 @@
+"""Router for the metrics endpoint."""
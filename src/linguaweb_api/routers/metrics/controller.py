@@ -0,0 +1,7 @@
+"""Controller for the metrics of the API."""
+from linguaweb_api.core import metrics
+
+
+def get_metrics() -> str:
+    """Returns all metrics of the API in the Prometheus text format."""
+    return metrics.render()
@@ -0,0 +1,36 @@
+"""View definitions for the metrics router."""
+import logging
+
+import fastapi
+from fastapi import responses
+
+from linguaweb_api.core import config
+from linguaweb_api.routers.metrics import controller
+
+settings = config.get_settings()
+LOGGER_NAME = settings.LOGGER_NAME
+
+logger = logging.getLogger(LOGGER_NAME)
+
+router = fastapi.APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get(
+    "",
+    response_class=responses.PlainTextResponse,
+    status_code=fastapi.status.HTTP_200_OK,
+    summary="Returns the metrics of the API.",
+    description=(
+        "Returns request counts and latency histograms per route and status, "
+        "latency histograms per dependency (SQL, S3, OpenAI, ffmpeg), and gauges "
+        "for database pool checkouts and in-flight dependency calls, in the "
+        "Prometheus text format."
+    ),
+)
+async def get_metrics() -> responses.PlainTextResponse:
+    """Returns the metrics of the API."""
+    logger.debug("Getting metrics.")
+    return responses.PlainTextResponse(
+        controller.get_metrics(),
+        media_type="text/plain; version=0.0.4",
+    )
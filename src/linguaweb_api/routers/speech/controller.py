@@ -1,43 +1,570 @@
-"""Speech router controller."""
+"""Speech router controller.
+
+ffmpeg and the OpenAI client are imported by the functions that use them, as
+importing them at startup would slow down every cold start, including those
+of requests that never touch audio.
+"""
+import asyncio
+import hashlib
 import logging
 import pathlib
+import re
+import shutil
 import tempfile
+from collections import abc
+from typing import NamedTuple, NoReturn, TypeVar, cast
 
 import fastapi
-import ffmpeg
-from cloai import openai_api
+import sqlalchemy
 from fastapi import status
+from sqlalchemy import exc, orm
 
-from linguaweb_api.core import config
+from linguaweb_api.core import cache, config, models, timing
+from linguaweb_api.microservices import sql
+from linguaweb_api.routers.speech import schemas
+from linguaweb_api.routers.words import controller as words_controller
 
 settings = config.get_settings()
 OPENAI_API_KEY = settings.OPENAI_API_KEY
+OPENAI_STT_MODEL = settings.OPENAI_STT_MODEL
+TRANSCRIPTION_CACHE_SIZE = settings.TRANSCRIPTION_CACHE_SIZE
+TRANSCRIPTION_CACHE_PERSIST = settings.TRANSCRIPTION_CACHE_PERSIST
+TRANSCRIPTION_JOB_MAX_SIZE = settings.TRANSCRIPTION_JOB_MAX_SIZE
+TRANSCRIPTION_CHUNK_SECONDS = settings.TRANSCRIPTION_CHUNK_SECONDS
+TRANSCRIPTION_CONCURRENCY = settings.TRANSCRIPTION_CONCURRENCY
 LOGGER_NAME = settings.LOGGER_NAME
 
 logger = logging.getLogger(LOGGER_NAME)
 
 TARGET_FILE_FORMAT = ".mp3"
+MAX_FILE_SIZE = 1024 * 1024
+END_OF_UTTERANCE = "end"
+
+ResultType = TypeVar("ResultType")
+
+
+class _TranscriptionKey(NamedTuple):
+    """Cache key of a transcription."""
+
+    audio_hash: str
+    language: str
+    model: str
+
 
+_transcription_cache: cache.LRUCache[_TranscriptionKey, str] = cache.LRUCache(
+    TRANSCRIPTION_CACHE_SIZE,
+)
+_transcription_flights = cache.SingleFlight[_TranscriptionKey, str]()
 
-async def transcribe(audio: fastapi.UploadFile, language: str = "en") -> str:
+
+async def transcribe(
+    audio: fastapi.UploadFile,
+    language: str = "en",
+    session: orm.Session | None = None,
+) -> str:
     """Transcribes audio using OpenAI's Whisper.
 
+    Transcriptions are cached on the hash of the converted audio, the language
+    and the model. Concurrent requests for identical audio share a single call
+    to Whisper.
+
     Args:
         audio: The audio file.
         language: The language of the audio.
+        session: The database session. If provided and persistence is enabled,
+            transcriptions are also cached in the database.
 
     Returns:
         str: The transcription of the audio as a string. The string is
             stripped of newlines and converted to lowercase.
     """
     logger.debug("Transcribing audio.")
-    await _check_file_size(audio, max_size=1024 * 1024)
+    await _check_file_size(audio, max_size=MAX_FILE_SIZE)
 
     with tempfile.TemporaryDirectory() as temp_dir:
         target_path = pathlib.Path(temp_dir) / f"audio{TARGET_FILE_FORMAT}"
         _convert_audio(audio, temp_dir, target_path)
-        client = openai_api.SpeechToText(api_key=OPENAI_API_KEY.get_secret_value())
-        return await client.run(target_path, language=language)
+        return await _transcribe_file(target_path, language, session)
+
+
+async def transcribe_stream(
+    websocket: fastapi.WebSocket,
+    language: str,
+    session: orm.Session,
+) -> str:
+    """Transcribes audio that is streamed over a WebSocket.
+
+    Binary messages are piped into a running ffmpeg process as they arrive, so
+    that conversion overlaps with recording. A text message containing
+    `END_OF_UTTERANCE` finishes the stream and starts the transcription.
+
+    Args:
+        websocket: The accepted WebSocket connection.
+        language: The language of the audio.
+        session: The database session.
+
+    Returns:
+        The transcription of the audio.
+
+    Raises:
+        fastapi.WebSocketException: 1009 If the streamed audio exceeds the maximum
+            allowed size, 1003 if an unsupported message is received, or 1007 if
+            ffmpeg cannot convert the audio.
+        fastapi.WebSocketDisconnect: If the client disconnects before the end of
+            the utterance.
+    """
+    logger.debug("Streaming audio.")
+    transcoder = await _StreamingTranscoder.start()
+    try:
+        received_bytes = 0
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise fastapi.WebSocketDisconnect(code=message.get("code", 1000))
+            if message.get("text") == END_OF_UTTERANCE:
+                break
+            if message.get("bytes") is None:
+                raise fastapi.WebSocketException(
+                    code=status.WS_1003_UNSUPPORTED_DATA,
+                    reason=f"Expected audio bytes or '{END_OF_UTTERANCE}'.",
+                )
+
+            received_bytes += len(message["bytes"])
+            if received_bytes > MAX_FILE_SIZE:
+                msg = (
+                    f"Audio stream exceeds maximum allowed size of {MAX_FILE_SIZE} "
+                    "bytes."
+                )
+                logger.error(msg)
+                raise fastapi.WebSocketException(
+                    code=status.WS_1009_MESSAGE_TOO_BIG,
+                    reason=msg,
+                )
+            await transcoder.write(message["bytes"])
+
+        logger.debug("End of utterance received.")
+        with timing.span("transcode", "stream"):
+            audio_bytes = await transcoder.finish()
+    finally:
+        await transcoder.kill()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        target_path = pathlib.Path(temp_dir) / f"audio{TARGET_FILE_FORMAT}"
+        target_path.write_bytes(audio_bytes)
+        return await _transcribe_file(target_path, language, session)
+
+
+async def transcribe_and_check(
+    audio: fastapi.UploadFile,
+    word_id: int,
+    language: str,
+    session: orm.Session,
+    lookup_session: orm.Session,
+) -> schemas.TranscriptionCheck:
+    """Transcribes audio and checks it against a stored word.
+
+    The word lookup runs in a worker thread concurrently with the
+    transcription, so its latency is hidden behind the speech-to-text call. If
+    the word does not exist, the transcription is cancelled.
+
+    Args:
+        audio: The audio file.
+        word_id: The ID of the word to check against.
+        language: The language of the audio.
+        session: The database session used by the transcription cache.
+        lookup_session: A separate database session for the word lookup.
+
+    Returns:
+        The transcription and whether it matches the word.
+    """
+    logger.debug("Transcribing and checking audio.")
+    word_task = asyncio.create_task(
+        asyncio.to_thread(_get_word, word_id, lookup_session),
+    )
+    transcription_task = asyncio.create_task(
+        transcribe(audio, language=language, session=session),
+    )
+    try:
+        word = await word_task
+    except fastapi.HTTPException:
+        transcription_task.cancel()
+        raise
+
+    transcription = await transcription_task
+    return schemas.TranscriptionCheck(
+        transcription=transcription,
+        is_correct=words_controller.is_match(transcription, word),
+    )
+
+
+def _get_word(word_id: int, session: orm.Session) -> str:
+    """Fetches the text of a word.
+
+    Args:
+        word_id: The ID of the word.
+        session: The database session.
+
+    Returns:
+        The word.
+
+    Raises:
+        fastapi.HTTPException: 404 If the word was not found in the database.
+    """
+    query = sqlalchemy.select(models.Word.word).where(models.Word.id == word_id)
+    word = session.execute(query).scalar()
+    if word is None:
+        logger.warning("Word ID not found in database.")
+        raise fastapi.HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Word ID not found.",
+        )
+    return word
+
+
+async def create_transcription_job(
+    audio: fastapi.UploadFile,
+    language: str,
+    session: orm.Session,
+) -> tuple[models.TranscriptionJob, pathlib.Path]:
+    """Registers a chunked transcription job for a long recording.
+
+    The audio is stored in a temporary directory so that it outlives the
+    request; `run_transcription_job` removes it when the job is done.
+
+    Args:
+        audio: The audio file.
+        language: The language of the audio.
+        session: The database session.
+
+    Returns:
+        The job model and the path to the stored audio.
+
+    Raises:
+        fastapi.HTTPException: 400 If the audio file does not have a filename.
+    """
+    logger.debug("Creating transcription job.")
+    await _check_file_size(audio, max_size=TRANSCRIPTION_JOB_MAX_SIZE)
+    if audio.filename is None:
+        raise fastapi.HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The audio file must have a filename.",
+        )
+
+    directory = pathlib.Path(tempfile.mkdtemp())
+    audio_path = directory / f"audio{pathlib.Path(audio.filename).suffix}"
+    with audio_path.open("wb") as audio_file:
+        shutil.copyfileobj(audio.file, audio_file)
+
+    job = models.TranscriptionJob(language=language, status="pending")
+    session.add(job)
+    session.commit()
+    return job, audio_path
+
+
+async def run_transcription_job(job_id: int, audio_path: pathlib.Path) -> None:
+    """Splits audio on silences and transcribes the chunks in parallel.
+
+    Progress is written to the job as chunks complete. The chunks are stitched
+    together in their original order. If a chunk fails, the other chunks are
+    cancelled and awaited before the job is marked as failed and its audio is
+    removed.
+
+    Args:
+        job_id: The ID of the transcription job.
+        audio_path: The path to the stored audio. Its directory is removed
+            when the job finishes.
+    """
+    logger.debug("Running transcription job %s.", job_id)
+    with sql.session_scope() as session:
+        job = session.get_one(models.TranscriptionJob, job_id)
+        try:
+            job.status = "running"
+            session.commit()
+            duration, silences = await asyncio.to_thread(
+                _detect_silences,
+                audio_path,
+            )
+            chunks = _plan_chunks(duration, silences, TRANSCRIPTION_CHUNK_SECONDS)
+            job.chunks_total = len(chunks)
+            session.commit()
+
+            language = job.language
+            semaphore = asyncio.Semaphore(TRANSCRIPTION_CONCURRENCY)
+
+            async def transcribe_chunk(index: int, start: float, end: float) -> str:
+                chunk_path = audio_path.parent / f"chunk_{index}{TARGET_FILE_FORMAT}"
+                async with semaphore:
+                    await _run_in_thread(
+                        _extract_chunk,
+                        audio_path,
+                        chunk_path,
+                        start,
+                        end,
+                    )
+                    # The job's session is owned by the job, so chunks cache
+                    # their transcriptions through sessions of their own.
+                    with sql.session_scope() as chunk_session:
+                        return await _transcribe_file(
+                            chunk_path,
+                            language,
+                            chunk_session,
+                        )
+
+            async with asyncio.TaskGroup() as group:
+                tasks = [
+                    group.create_task(transcribe_chunk(index, start, end))
+                    for index, (start, end) in enumerate(chunks)
+                ]
+                for completed in asyncio.as_completed(tasks):
+                    await completed
+                    job.chunks_completed += 1
+                    session.commit()
+            transcriptions = [task.result() for task in tasks]
+            job.transcription = " ".join(
+                text.strip() for text in transcriptions if text.strip()
+            )
+            job.status = "completed"
+        except Exception as exception_info:
+            logger.exception("Transcription job %s failed.", job_id)
+            error = exception_info
+            if isinstance(error, ExceptionGroup):
+                error = error.exceptions[0]
+            session.rollback()
+            job.status = "failed"
+            job.error = str(error)[:1024]
+        finally:
+            session.commit()
+            shutil.rmtree(audio_path.parent, ignore_errors=True)
+    logger.debug("Finished transcription job %s.", job_id)
+
+
+async def _run_in_thread(
+    function: abc.Callable[..., ResultType],
+    *args: object,
+) -> ResultType:
+    """Runs a function in a thread and waits for it, even when cancelled.
+
+    A thread cannot be interrupted, so returning early would let the function
+    run on while the caller cleans up after it.
+
+    Args:
+        function: The function to run.
+        args: The arguments of the function.
+
+    Returns:
+        The result of the function.
+    """
+    future = asyncio.ensure_future(asyncio.to_thread(function, *args))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        await asyncio.wait([future])
+        raise
+
+
+async def get_transcription_job(
+    job_id: int,
+    session: orm.Session,
+) -> models.TranscriptionJob:
+    """Returns a transcription job.
+
+    Args:
+        job_id: The ID of the job.
+        session: The database session.
+
+    Returns:
+        The job model.
+
+    Raises:
+        fastapi.HTTPException: 404 If the job was not found in the database.
+    """
+    logger.debug("Getting transcription job.")
+    job = session.get(models.TranscriptionJob, job_id)
+    if not job:
+        logger.warning("Transcription job not found in database.")
+        raise fastapi.HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Transcription job not found.",
+        )
+    return job
+
+
+async def _transcribe_file(
+    audio_path: pathlib.Path,
+    language: str,
+    session: orm.Session | None,
+) -> str:
+    """Transcribes an audio file in the target format, using the cache.
+
+    Args:
+        audio_path: The path to the audio.
+        language: The language of the audio.
+        session: The database session, if persistence should be used.
+
+    Returns:
+        The transcription of the audio.
+    """
+    key = _TranscriptionKey(
+        audio_hash=hashlib.sha256(audio_path.read_bytes()).hexdigest(),
+        language=language,
+        model=OPENAI_STT_MODEL.value,
+    )
+
+    if (transcription := _transcription_cache.get(key)) is not None:
+        logger.debug("Transcription found in memory cache.")
+        return transcription
+
+    return await _transcription_flights.run(
+        key,
+        lambda: _transcribe_uncached(key, audio_path, session),
+    )
+
+
+async def _transcribe_uncached(
+    key: _TranscriptionKey,
+    audio_path: pathlib.Path,
+    session: orm.Session | None,
+) -> str:
+    """Transcribes audio that is not in the memory cache.
+
+    Args:
+        key: The cache key of the transcription.
+        audio_path: The path to the converted audio.
+        session: The database session, if persistence should be used.
+
+    Returns:
+        The transcription of the audio.
+    """
+    if not TRANSCRIPTION_CACHE_PERSIST:
+        session = None
+
+    if session is not None:
+        query = sqlalchemy.select(models.Transcription.transcription).filter_by(
+            **key._asdict(),
+        )
+        transcription = session.execute(query).scalar()
+        if transcription is not None:
+            logger.debug("Transcription found in database cache.")
+            _transcription_cache.set(key, transcription)
+            return transcription
+
+    from cloai import openai_api
+
+    client = openai_api.SpeechToText(api_key=OPENAI_API_KEY.get_secret_value())
+    with timing.span("stt", "transcribe"):
+        transcription = await client.run(
+            audio_path,
+            model=key.model,
+            language=key.language,
+        )
+    _transcription_cache.set(key, transcription)
+
+    if session is not None:
+        session.add(
+            models.Transcription(**key._asdict(), transcription=transcription),
+        )
+        try:
+            session.commit()
+        except exc.IntegrityError:
+            logger.debug("Transcription was already persisted.")
+            session.rollback()
+    return transcription
+
+
+class _StreamingTranscoder:
+    """Converts a stream of audio chunks to the target format with ffmpeg."""
+
+    def __init__(self, process: asyncio.subprocess.Process) -> None:
+        """Initializes a new instance of the _StreamingTranscoder class.
+
+        Args:
+            process: An ffmpeg process with piped stdin, stdout and stderr.
+        """
+        self._process = process
+        self._stdin = cast(asyncio.StreamWriter, process.stdin)
+        # Drain the output pipes concurrently to prevent ffmpeg from blocking.
+        self._output = asyncio.create_task(
+            cast(asyncio.StreamReader, process.stdout).read(),
+        )
+        self._errors = asyncio.create_task(
+            cast(asyncio.StreamReader, process.stderr).read(),
+        )
+
+    @classmethod
+    async def start(cls) -> "_StreamingTranscoder":
+        """Starts an ffmpeg process reading from stdin and writing to stdout.
+
+        Returns:
+            The transcoder.
+        """
+        import ffmpeg
+
+        arguments = (
+            ffmpeg.input("pipe:")
+            .output("pipe:", format=TARGET_FILE_FORMAT.lstrip("."))
+            .compile()
+        )
+        process = await asyncio.create_subprocess_exec(
+            *arguments,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        return cls(process)
+
+    async def write(self, chunk: bytes) -> None:
+        """Pipes a chunk of audio into ffmpeg.
+
+        Args:
+            chunk: The audio bytes.
+
+        Raises:
+            fastapi.WebSocketException: 1007 If ffmpeg exited, e.g. because it
+                could not read the audio.
+        """
+        try:
+            self._stdin.write(chunk)
+            await self._stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            await self._process.wait()
+            self._raise_conversion_error(await self._errors)
+
+    async def finish(self) -> bytes:
+        """Closes the input stream and waits for the converted audio.
+
+        Returns:
+            The audio in the target format.
+
+        Raises:
+            fastapi.WebSocketException: 1007 If ffmpeg failed to convert the audio.
+        """
+        self._stdin.close()
+        output, errors = await asyncio.gather(self._output, self._errors)
+        if await self._process.wait() != 0:
+            self._raise_conversion_error(errors)
+        return output
+
+    async def kill(self) -> None:
+        """Kills the ffmpeg process if it is still running and reaps it."""
+        if self._process.returncode is None:
+            self._process.kill()
+        await self._process.wait()
+
+    @staticmethod
+    def _raise_conversion_error(errors: bytes) -> NoReturn:
+        """Logs the output of a failed ffmpeg process and rejects the audio.
+
+        Args:
+            errors: The standard error of ffmpeg.
+
+        Raises:
+            fastapi.WebSocketException: 1007 Always.
+        """
+        logger.error("ffmpeg failed: %s", errors.decode(errors="replace"))
+        raise fastapi.WebSocketException(
+            code=status.WS_1007_INVALID_FRAME_PAYLOAD_DATA,
+            reason="The audio could not be converted.",
+        )
 
 
 async def _check_file_size(audio: fastapi.UploadFile, max_size: int) -> None:
@@ -93,4 +620,101 @@ def _convert_audio(
         audio_path = pathlib.Path(directory) / f"audio{extension}"
         with audio_path.open("wb") as audio_file:
             audio_file.write(audio.file.read())
-        ffmpeg.input(str(audio_path)).output(str(target_path)).run()
+        import ffmpeg
+
+        with timing.span("transcode", "convert"):
+            ffmpeg.input(str(audio_path)).output(str(target_path)).run()
+
+
+def _detect_silences(
+    audio_path: pathlib.Path,
+) -> tuple[float, list[tuple[float, float]]]:
+    """Detects silent intervals in an audio file with ffmpeg.
+
+    Args:
+        audio_path: The path to the audio.
+
+    Returns:
+        The duration of the audio in seconds and the (start, end) times of all
+        silent intervals.
+    """
+    import ffmpeg
+
+    with timing.span("transcode", "silencedetect"):
+        _, stderr = (
+            ffmpeg.input(str(audio_path))
+            .filter("silencedetect", noise="-30dB", d=0.3)
+            .output("-", format="null")
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+    log = stderr.decode("utf-8", errors="replace")
+
+    # The final progress line holds the decoded duration, which is also
+    # available for containers without a duration header.
+    timestamps = re.findall(r"time=(\d+):(\d+):([\d.]+)", log)
+    hours, minutes, seconds = timestamps[-1] if timestamps else ("0", "0", "0")
+    duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    starts = [float(value) for value in re.findall(r"silence_start: ([\d.]+)", log)]
+    ends = [float(value) for value in re.findall(r"silence_end: ([\d.]+)", log)]
+    ends += [duration] * (len(starts) - len(ends))
+    return duration, list(zip(starts, ends, strict=True))
+
+
+def _plan_chunks(
+    duration: float,
+    silences: list[tuple[float, float]],
+    max_chunk_seconds: float,
+) -> list[tuple[float, float]]:
+    """Plans chunk boundaries at silences, bounded by a maximum chunk length.
+
+    Each chunk ends at the midpoint of the last silence that fits within the
+    maximum length. If no silence fits, the chunk is cut at the maximum length.
+    Silences in the first quarter of a chunk are ignored to avoid tiny chunks.
+
+    Args:
+        duration: The duration of the audio in seconds.
+        silences: The (start, end) times of silent intervals.
+        max_chunk_seconds: The maximum length of a chunk in seconds.
+
+    Returns:
+        The (start, end) times of the chunks, in order.
+    """
+    cut_points = sorted((start + end) / 2 for start, end in silences)
+    min_chunk_seconds = max_chunk_seconds / 4
+    chunks = []
+    start = 0.0
+    while duration - start > max_chunk_seconds:
+        window_end = start + max_chunk_seconds
+        candidates = [
+            point
+            for point in cut_points
+            if start + min_chunk_seconds < point <= window_end
+        ]
+        end = candidates[-1] if candidates else window_end
+        chunks.append((start, end))
+        start = end
+    chunks.append((start, duration))
+    return chunks
+
+
+def _extract_chunk(
+    audio_path: pathlib.Path,
+    chunk_path: pathlib.Path,
+    start: float,
+    end: float,
+) -> None:
+    """Extracts a chunk of audio and converts it to the target format.
+
+    Args:
+        audio_path: The path to the source audio.
+        chunk_path: The path to write the chunk to.
+        start: The start time of the chunk in seconds.
+        end: The end time of the chunk in seconds.
+    """
+    import ffmpeg
+
+    with timing.span("transcode", "extract"):
+        ffmpeg.input(str(audio_path), ss=start, t=end - start).output(
+            str(chunk_path),
+        ).run(quiet=True)
@@ -0,0 +1,23 @@
+"""Schemas for the speech router."""
+import pydantic
+
+
+class TranscriptionCheck(pydantic.BaseModel):
+    """The transcription of an audio file and whether it matches a word."""
+
+    transcription: str
+    is_correct: bool
+
+
+class TranscriptionJob(pydantic.BaseModel):
+    """The state of a chunked transcription job."""
+
+    model_config = pydantic.ConfigDict(from_attributes=True)
+
+    id: int
+    status: str
+    language: str
+    chunks_total: int | None
+    chunks_completed: int
+    transcription: str | None
+    error: str | None
@@ -3,9 +3,11 @@ import logging
 
 import fastapi
 from fastapi import status
+from sqlalchemy import orm
 
 from linguaweb_api.core import config
-from linguaweb_api.routers.speech import controller
+from linguaweb_api.microservices import sql
+from linguaweb_api.routers.speech import controller, schemas
 
 settings = config.get_settings()
 LOGGER_NAME = settings.LOGGER_NAME
@@ -22,7 +24,7 @@ router = fastapi.APIRouter(prefix="/speech", tags=["speech"])
     summary="Transcribes an audio file and returns the transcription.",
     description="""Uses OpenAI's Whisper API to transcribe the provided audio. Maximum
         allowed file size is 1 MB, and the audio file must be in a format that ffmpeg
-        can convert to mp3.""",
+        can convert to mp3. Transcriptions of identical audio are cached.""",
     responses={
         status.HTTP_400_BAD_REQUEST: {
             "description": "The audio file must have a filename.",
@@ -35,17 +37,185 @@ router = fastapi.APIRouter(prefix="/speech", tags=["speech"])
 async def transcribe(
     audio: fastapi.UploadFile = fastapi.File(...),
     language: str = fastapi.Form(...),
+    session: orm.Session = fastapi.Depends(sql.get_session),
 ) -> str:
     """Transcribes audio using OpenAI's Whisper API.
 
     Args:
         audio: The audio file.
         language: The language of the audio.
+        session: The database session.
 
     Returns:
         The transcription of the audio as a string.
     """
     logger.debug("Transcribing audio.")
-    transcription = controller.transcribe(audio, language=language)
+    transcription = controller.transcribe(
+        audio,
+        language=language,
+        session=session,
+    )
     logger.debug("Transcribed audio.")
     return await transcription
+
+
+@router.websocket("/stream")
+async def transcribe_stream(
+    websocket: fastapi.WebSocket,
+    language: str = fastapi.Query(..., title="The language of the audio."),
+    session: orm.Session = fastapi.Depends(sql.get_session),
+) -> None:
+    """Transcribes audio streamed over a WebSocket.
+
+    The client sends the audio as binary messages while recording, in any format
+    that ffmpeg can read from a stream, and sends the text message "end" when the
+    utterance is complete. The server replies with a JSON message containing the
+    transcription and closes the connection.
+
+    Args:
+        websocket: The WebSocket connection.
+        language: The language of the audio.
+        session: The database session.
+    """
+    logger.debug("Accepting audio stream.")
+    await websocket.accept()
+    try:
+        transcription = await controller.transcribe_stream(
+            websocket,
+            language=language,
+            session=session,
+        )
+    except fastapi.WebSocketDisconnect:
+        logger.debug("Client disconnected during audio stream.")
+        return
+    await websocket.send_json({"transcription": transcription})
+    await websocket.close()
+    logger.debug("Transcribed audio stream.")
+
+
+@router.post(
+    "/check/{word_id}",
+    response_model=schemas.TranscriptionCheck,
+    status_code=status.HTTP_200_OK,
+    summary="Transcribes an audio file and checks it against a word.",
+    description="""Transcribes the provided audio as in `/speech/transcribe` and
+        checks whether the transcription matches the word with the given ID. The word
+        lookup runs concurrently with the transcription.""",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "The audio file must have a filename.",
+        },
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Word ID not found.",
+        },
+        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE: {
+            "description": "The audio file size exceeds the maximum allowed size.",
+        },
+    },
+)
+async def transcribe_and_check(
+    word_id: int = fastapi.Path(..., title="The ID of the word to check."),
+    audio: fastapi.UploadFile = fastapi.File(...),
+    language: str = fastapi.Form(...),
+    session: orm.Session = fastapi.Depends(sql.get_session),
+    lookup_session: orm.Session = fastapi.Depends(sql.get_session, use_cache=False),
+) -> schemas.TranscriptionCheck:
+    """Transcribes audio and checks it against a word.
+
+    Args:
+        word_id: The ID of the word to check.
+        audio: The audio file.
+        language: The language of the audio.
+        session: The database session.
+        lookup_session: A separate database session for the word lookup.
+
+    Returns:
+        The transcription and whether it matches the word.
+    """
+    logger.debug("Transcribing and checking audio.")
+    result = await controller.transcribe_and_check(
+        audio,
+        word_id,
+        language=language,
+        session=session,
+        lookup_session=lookup_session,
+    )
+    logger.debug("Transcribed and checked audio.")
+    return result
+
+
+@router.post(
+    "/transcribe/jobs",
+    response_model=schemas.TranscriptionJob,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Starts a chunked transcription job for a long recording.",
+    description="""Splits the provided audio on silences, transcribes the chunks in
+        parallel and stitches the results in order. Returns immediately with the job;
+        poll `/speech/transcribe/jobs/{job_id}` for progress and the transcription.""",
+    responses={
+        status.HTTP_400_BAD_REQUEST: {
+            "description": "The audio file must have a filename.",
+        },
+        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE: {
+            "description": "The audio file size exceeds the maximum allowed size.",
+        },
+    },
+)
+async def create_transcription_job(
+    background_tasks: fastapi.BackgroundTasks,
+    audio: fastapi.UploadFile = fastapi.File(...),
+    language: str = fastapi.Form(...),
+    session: orm.Session = fastapi.Depends(sql.get_session),
+) -> schemas.TranscriptionJob:
+    """Starts a chunked transcription job.
+
+    Args:
+        background_tasks: The background tasks of the request.
+        audio: The audio file.
+        language: The language of the audio.
+        session: The database session.
+
+    Returns:
+        The newly created job.
+    """
+    logger.debug("Creating transcription job.")
+    job, audio_path = await controller.create_transcription_job(
+        audio,
+        language=language,
+        session=session,
+    )
+    background_tasks.add_task(controller.run_transcription_job, job.id, audio_path)
+    logger.debug("Created transcription job.")
+    return schemas.TranscriptionJob.model_validate(job)
+
+
+@router.get(
+    "/transcribe/jobs/{job_id}",
+    response_model=schemas.TranscriptionJob,
+    status_code=status.HTTP_200_OK,
+    summary="Returns the progress of a transcription job.",
+    description="""Returns the status, the number of transcribed chunks and, once
+        completed, the transcription of a job.""",
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Transcription job not found.",
+        },
+    },
+)
+async def get_transcription_job(
+    job_id: int = fastapi.Path(..., title="The ID of the transcription job."),
+    session: orm.Session = fastapi.Depends(sql.get_session),
+) -> schemas.TranscriptionJob:
+    """Returns a transcription job.
+
+    Args:
+        job_id: The ID of the transcription job.
+        session: The database session.
+
+    Returns:
+        The job.
+    """
+    logger.debug("Getting transcription job.")
+    job = await controller.get_transcription_job(job_id, session)
+    logger.debug("Got transcription job.")
+    return job
@@ -1,25 +1,83 @@
-"""Business logic for the text router."""
+"""Business logic for the text router.
+
+NumPy (through `core.vectors`), botocore and ffmpeg are imported where they
+are used. Only a few endpoints need them, and the others should not pay for
+importing them on a cold start.
+"""
+import asyncio
+import hashlib
 import logging
+import pathlib
+from collections import abc
+from concurrent import futures
+from typing import TYPE_CHECKING, NamedTuple
 
 import fastapi
 import sqlalchemy
-from botocore import errorfactory
 from fastapi import status
 from sqlalchemy import orm
 
-from linguaweb_api.core import config, models
-from linguaweb_api.microservices import s3
+from linguaweb_api.core import archive, cache, config, models, search, timing
+from linguaweb_api.microservices import s3, sql
+from linguaweb_api.routers.words import schemas
+
+if TYPE_CHECKING:
+    from linguaweb_api.core import vectors
 
 settings = config.get_settings()
 LOGGER_NAME = settings.LOGGER_NAME
+CHECK_MAX_EDIT_DISTANCE = settings.CHECK_MAX_EDIT_DISTANCE
+DOWNLOAD_CONCURRENCY = settings.DOWNLOAD_CONCURRENCY
+TRANSCODE_WORKERS = settings.TRANSCODE_WORKERS
 
 logger = logging.getLogger(LOGGER_NAME)
 
+# Words that list the query as a synonym rank below close spelling matches.
+SYNONYM_SCORE = 0.5
+LIKE_ESCAPE = "/"
+
+
+class Rendition(NamedTuple):
+    """An encoding of the audio of words.
+
+    Attributes:
+        codec: The ffmpeg audio encoder.
+        bitrate: The target bitrate.
+        container: The ffmpeg output format.
+        extension: The file extension of the encoded audio.
+        media_type: The media type of the encoded audio.
+    """
+
+    codec: str
+    bitrate: str
+    container: str
+    extension: str
+    media_type: str
+
+
+RENDITIONS: dict[schemas.AudioFormat, Rendition] = {
+    "opus-24k": Rendition("libopus", "24k", "ogg", "ogg", "audio/ogg"),
+    "opus-48k": Rendition("libopus", "48k", "ogg", "ogg", "audio/ogg"),
+    "mp3-64k": Rendition("libmp3lame", "64k", "mp3", "mp3", "audio/mpeg"),
+}
 
-async def get_all_word_ids(
+# ffmpeg runs in its own process; the pool bounds the number of concurrent
+# transcodes and keeps waiting on them off the event loop.
+_transcode_pool = futures.ThreadPoolExecutor(
+    max_workers=TRANSCODE_WORKERS,
+    thread_name_prefix="transcode",
+)
+# Concurrent first requests for the same rendition share one transcode.
+_rendition_flights = cache.SingleFlight[tuple[int, str], bytes]()
+
+
+async def get_all_word_ids(  # noqa: PLR0913
     language: str | None,
     age: int | None,
     session: orm.Session,
+    synonym: str | None = None,
+    antonym: str | None = None,
+    readability: schemas.ReadabilityFilter | None = None,
 ) -> list[int]:
     """Returns all word IDs.
 
@@ -27,6 +85,9 @@ async def get_all_word_ids(
         language: The language of the words.
         age: The age of the target audience.
         session: The database session.
+        synonym: A term that must be among the synonyms of the words.
+        antonym: A term that must be among the antonyms of the words.
+        readability: The ranges of the readability metrics of the words.
 
     Returns:
         The IDs of all words.
@@ -38,11 +99,482 @@ async def get_all_word_ids(
         query = query.where(models.Word.language == language)
     if age:
         query = query.where(models.Word.age == age)
+    if synonym:
+        query = query.where(
+            sql.json_array_contains(session, models.Word.synonyms, synonym),
+        )
+    if antonym:
+        query = query.where(
+            sql.json_array_contains(session, models.Word.antonyms, antonym),
+        )
+    if readability:
+        query = query.where(*_readability_conditions(readability))
     words = session.execute(query)
 
     return [word.id for word in words]
 
 
+def _readability_conditions(
+    readability: schemas.ReadabilityFilter,
+) -> list[sqlalchemy.ColumnElement[bool]]:
+    """Converts readability ranges to conditions on the indexed columns.
+
+    Args:
+        readability: The ranges of the readability metrics.
+
+    Returns:
+        The conditions of the ranges that are set.
+    """
+    grade = getattr(models.Word, f"{readability.text}_grade")
+    reading_ease = getattr(models.Word, f"{readability.text}_reading_ease")
+    bounds = [
+        (grade, readability.min_grade, readability.max_grade),
+        (reading_ease, readability.min_reading_ease, readability.max_reading_ease),
+        (models.Word.syllables, readability.min_syllables, readability.max_syllables),
+    ]
+    conditions = []
+    for column, minimum, maximum in bounds:
+        if minimum is not None:
+            conditions.append(column >= minimum)
+        if maximum is not None:
+            conditions.append(column <= maximum)
+    return conditions
+
+
+async def search_words(  # noqa: PLR0913
+    query: str,
+    session: orm.Session,
+    *,
+    language: str | None = None,
+    age: int | None = None,
+    include_synonyms: bool = False,
+    limit: int = 20,
+) -> list[schemas.SearchResult]:
+    """Finds the words that start with or resemble a query.
+
+    On PostgreSQL, the search uses the pg_trgm index on the words. Otherwise,
+    it uses an in-memory trigram index that is rebuilt when the words change.
+
+    Args:
+        query: The search query.
+        session: The database session.
+        language: The language of the words.
+        age: The age of the target audience.
+        include_synonyms: Whether to also return words that list the query as
+            a synonym.
+        limit: The maximum number of results.
+
+    Returns:
+        The matching words, with words that start with the query first and
+        then by descending similarity.
+    """
+    logger.debug("Searching words.")
+    if session.get_bind().dialect.name == "postgresql":
+        return _search_words_postgres(
+            query,
+            session,
+            language=language,
+            age=age,
+            include_synonyms=include_synonyms,
+            limit=limit,
+        )
+
+    index = _get_search_index(session)
+
+    def keep(word_id: int) -> bool:
+        _, word_language, word_age = index.words[word_id]
+        return (language is None or word_language == language) and (
+            age is None or word_age == age
+        )
+
+    ranks = {
+        match.key: (match.prefix, match.score)
+        for match in index.trigrams.search(query, keep=keep)
+    }
+    if include_synonyms:
+        for word_id in filter(keep, index.synonyms.get(query, ())):
+            prefix, score = ranks.get(word_id, (False, 0.0))
+            ranks[word_id] = (prefix, max(score, SYNONYM_SCORE))
+
+    ranked = sorted(
+        ranks.items(),
+        key=lambda rank: (-rank[1][0], -rank[1][1], index.words[rank[0]][0]),
+    )
+    return [
+        schemas.SearchResult(
+            id=word_id,
+            word=index.words[word_id][0],
+            language=index.words[word_id][1],
+            age=index.words[word_id][2],
+            score=score,
+        )
+        for word_id, (_, score) in ranked[:limit]
+    ]
+
+
+def _search_words_postgres(  # noqa: PLR0913
+    query: str,
+    session: orm.Session,
+    *,
+    language: str | None,
+    age: int | None,
+    include_synonyms: bool,
+    limit: int,
+) -> list[schemas.SearchResult]:
+    """Finds the words that start with or resemble a query with pg_trgm.
+
+    Args:
+        query: The search query.
+        session: The database session.
+        language: The language of the words.
+        age: The age of the target audience.
+        include_synonyms: Whether to also return words that list the query as
+            a synonym.
+        limit: The maximum number of results.
+
+    Returns:
+        The matching words, ranked as by `search_words`.
+    """
+    word = models.Word.word
+    prefix = word.ilike(_escape_like(query) + "%", escape=LIKE_ESCAPE)
+    score: sqlalchemy.ColumnElement[float] = sqlalchemy.func.similarity(word, query)
+    conditions: list[sqlalchemy.ColumnElement[bool]] = [
+        prefix,
+        word.op("%", is_comparison=True)(query),
+    ]
+    if include_synonyms:
+        synonym = sql.json_array_contains(session, models.Word.synonyms, query)
+        conditions.append(synonym)
+        score = sqlalchemy.func.greatest(
+            score,
+            sqlalchemy.case((synonym, SYNONYM_SCORE), else_=0.0),
+        )
+
+    statement = (
+        sqlalchemy.select(
+            models.Word.id,
+            word,
+            models.Word.language,
+            models.Word.age,
+            score.label("score"),
+        )
+        .where(sqlalchemy.or_(*conditions))
+        .order_by(prefix.desc(), score.desc(), word)
+        .limit(limit)
+    )
+    if language:
+        statement = statement.where(models.Word.language == language)
+    if age:
+        statement = statement.where(models.Word.age == age)
+    return [
+        schemas.SearchResult.model_validate(row._asdict())
+        for row in session.execute(statement)
+    ]
+
+
+def _escape_like(text: str) -> str:
+    """Escapes the wildcards of a LIKE pattern.
+
+    Args:
+        text: The text to match literally.
+
+    Returns:
+        The text with wildcards escaped by `LIKE_ESCAPE`.
+    """
+    for character in (LIKE_ESCAPE, "%", "_"):
+        text = text.replace(character, LIKE_ESCAPE + character)
+    return text
+
+
+class _SearchIndex(NamedTuple):
+    """The in-memory search index of the words.
+
+    Attributes:
+        version: The version of the words the index was built from.
+        words: The word, language and age of each word, by ID.
+        trigrams: The trigram index of the words.
+        synonyms: The IDs of the words that list a synonym, by synonym.
+    """
+
+    version: tuple[object, ...]
+    words: dict[int, tuple[str, str, int]]
+    trigrams: search.TrigramIndex
+    synonyms: dict[str, list[int]]
+
+
+_search_index: _SearchIndex | None = None
+
+
+def _get_search_index(session: orm.Session) -> _SearchIndex:
+    """Returns the in-memory search index, rebuilding it if the words changed.
+
+    Args:
+        session: The database session.
+
+    Returns:
+        The search index.
+    """
+    global _search_index  # noqa: PLW0603
+
+    version = _get_words_version(session)
+    if _search_index is not None and _search_index.version == version:
+        return _search_index
+
+    logger.debug("Building search index.")
+    words: dict[int, tuple[str, str, int]] = {}
+    synonyms: dict[str, list[int]] = {}
+    rows = session.execute(
+        sqlalchemy.select(
+            models.Word.id,
+            models.Word.word,
+            models.Word.language,
+            models.Word.age,
+            models.Word.synonyms,
+        ),
+    )
+    for word_id, word, language, age, word_synonyms in rows:
+        words[word_id] = (word, language, age)
+        for synonym in word_synonyms or ():
+            synonyms.setdefault(synonym, []).append(word_id)
+    trigrams = search.TrigramIndex(
+        (word_id, word) for word_id, (word, _, _) in words.items()
+    )
+    _search_index = _SearchIndex(version, words, trigrams, synonyms)
+    return _search_index
+
+
+class _AnswerIndex(NamedTuple):
+    """The in-memory index of the accepted answers of a language.
+
+    Attributes:
+        version: The version of the words the index was built from.
+        words: The BK-tree of the sanitized words.
+        synonyms: The IDs of the words that list a sanitized synonym, by
+            synonym.
+    """
+
+    version: tuple[object, ...]
+    words: search.BKTree
+    synonyms: dict[str, set[int]]
+
+
+_answer_indexes: dict[str, _AnswerIndex] = {}
+
+
+def _get_answer_index(language: str, session: orm.Session) -> _AnswerIndex:
+    """Returns the answer index of a language, rebuilding it if the words changed.
+
+    Args:
+        language: The language of the words.
+        session: The database session.
+
+    Returns:
+        The answer index.
+    """
+    version = _get_words_version(session)
+    index = _answer_indexes.get(language)
+    if index is not None and index.version == version:
+        return index
+
+    logger.debug("Building answer index for %s.", language)
+    words = search.BKTree()
+    synonyms: dict[str, set[int]] = {}
+    rows = session.execute(
+        sqlalchemy.select(
+            models.Word.id,
+            models.Word.word,
+            models.Word.synonyms,
+        ).where(models.Word.language == language),
+    )
+    for word_id, word, word_synonyms in rows:
+        words.add(word_id, _sanitize_word(word))
+        for synonym in word_synonyms or ():
+            synonyms.setdefault(_sanitize_word(synonym), set()).add(word_id)
+    _answer_indexes[language] = _AnswerIndex(version, words, synonyms)
+    return _answer_indexes[language]
+
+
+async def get_related_words(
+    identifier: int,
+    session: orm.Session,
+    k: int = 3,
+) -> list[schemas.RelatedWord]:
+    """Returns the words most similar to a word, e.g. as distractors.
+
+    Only words of the same language and age are considered.
+
+    Args:
+        identifier: The ID of the word.
+        session: The database session.
+        k: The number of related words to return.
+
+    Returns:
+        The related words, most similar first.
+
+    Raises:
+        fastapi.HTTPException: 404 If the word was not found in the database.
+    """
+    from linguaweb_api.core import vectors
+
+    logger.debug("Getting related words.")
+    word = session.get(models.Word, identifier)
+    if not word:
+        logger.warning("Word not found in database.")
+        raise fastapi.HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Word not found.",
+        )
+    matrix = get_vector_matrices(session).get((word.language, word.age))
+    if matrix is None or word.vector is None:
+        return []
+
+    neighbours = matrix.nearest(vectors.decode(word.vector), k, exclude=word.id)
+    texts = dict(
+        session.execute(
+            sqlalchemy.select(models.Word.id, models.Word.word).where(
+                models.Word.id.in_([word_id for word_id, _ in neighbours]),
+            ),
+        )
+        .tuples()
+        .all(),
+    )
+    return [
+        schemas.RelatedWord(id=word_id, word=texts[word_id], score=score)
+        for word_id, score in neighbours
+        if word_id in texts
+    ]
+
+
+class _VectorMatrices(NamedTuple):
+    """The vector matrices of all words.
+
+    Attributes:
+        version: The version of the words the matrices were built from.
+        matrices: The matrix of the words of each language and age.
+    """
+
+    version: tuple[object, ...]
+    matrices: dict[tuple[str, int], "vectors.VectorMatrix"]
+
+
+_vector_matrices: _VectorMatrices | None = None
+
+
+def get_vector_matrices(
+    session: orm.Session,
+) -> dict[tuple[str, int], "vectors.VectorMatrix"]:
+    """Returns the vector matrices, reloading them if the words changed.
+
+    The matrices are loaded by the first request that needs them, so that
+    startup neither imports NumPy nor reads the vectors of all words.
+
+    Args:
+        session: The database session.
+
+    Returns:
+        The matrix of the words of each language and age.
+    """
+    from linguaweb_api.core import vectors
+
+    global _vector_matrices  # noqa: PLW0603
+
+    version = _get_words_version(session)
+    if _vector_matrices is not None and _vector_matrices.version == version:
+        return _vector_matrices.matrices
+
+    logger.debug("Loading word vectors.")
+    groups: dict[tuple[str, int], list[tuple[int, bytes]]] = {}
+    rows = session.execute(
+        sqlalchemy.select(
+            models.Word.language,
+            models.Word.age,
+            models.Word.id,
+            models.Word.vector,
+        ).where(models.Word.vector.is_not(None)),
+    )
+    for language, age, word_id, vector in rows:
+        groups.setdefault((language, age), []).append((word_id, vector))
+    matrices = {
+        group: vectors.VectorMatrix.from_rows(group_rows)
+        for group, group_rows in groups.items()
+    }
+    _vector_matrices = _VectorMatrices(version, matrices)
+    return matrices
+
+
+def _get_words_version(session: orm.Session) -> tuple[object, ...]:
+    """Returns a version of the words that changes whenever the words do.
+
+    Args:
+        session: The database session.
+
+    Returns:
+        The number of writes to the words by this process, and the number of
+        words, their highest ID and their latest update, which also reflect
+        writes by other processes.
+    """
+    return (
+        sql.get_table_writes(models.Word.__tablename__),
+        *session.execute(
+            sqlalchemy.select(
+                sqlalchemy.func.count(),
+                sqlalchemy.func.max(models.Word.id),
+                sqlalchemy.func.max(models.Word.time_updated),
+            ),
+        ).one(),
+    )
+
+
+async def get_word_changes(since: int, session: orm.Session) -> schemas.WordChanges:
+    """Returns the words added, changed or deleted since a version of the bank.
+
+    Only committed versions are returned: the version of the word bank is
+    incremented under a row lock in the transaction of each write, so all
+    writes up to the committed version are visible.
+
+    Args:
+        since: The version of the word bank the client is in sync with.
+        session: The database session.
+
+    Returns:
+        The current version, the words written after `since` and the IDs of
+        the words deleted after `since`.
+
+    Raises:
+        fastapi.HTTPException: 409 if `since` is ahead of the word bank, e.g.
+            because the database was reset.
+    """
+    logger.debug("Getting word changes.")
+    version = session.execute(sqlalchemy.select(models.WordBank.version)).scalar() or 0
+    if since > version:
+        raise fastapi.HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The version is ahead of the word bank; sync from version 0.",
+        )
+
+    words = session.execute(
+        sqlalchemy.select(models.Word)
+        .where(models.Word.version > since, models.Word.version <= version)
+        .order_by(models.Word.id),
+    ).scalars()
+    changed = [
+        schemas.ChangedWord.model_validate(word, from_attributes=True) for word in words
+    ]
+    changed_ids = {word.id for word in changed}
+    tombstones = session.execute(
+        sqlalchemy.select(models.WordTombstone.word_id)
+        .where(
+            models.WordTombstone.version > since,
+            models.WordTombstone.version <= version,
+        )
+        .distinct()
+        .order_by(models.WordTombstone.word_id),
+    ).scalars()
+    # SQLite may reuse the ID of a deleted word for a new one.
+    deleted = [word_id for word_id in tombstones if word_id not in changed_ids]
+    return schemas.WordChanges(version=version, changed=changed, deleted=deleted)
+
+
 async def get_word(identifier: int, session: orm.Session) -> models.Word:
     """Returns the description of a random word.
 
@@ -72,6 +604,9 @@ async def check_word(
     word_id: int,
     word: str,
     session: orm.Session,
+    *,
+    tolerant: bool = False,
+    max_distance: int = CHECK_MAX_EDIT_DISTANCE,
 ) -> bool:
     """Checks whether a word was guessed correctly.
 
@@ -79,6 +614,8 @@ async def check_word(
         word_id: The ID of the word to check.
         word: The word to check.
         session: The database session.
+        tolerant: Whether to also accept misspellings and synonyms of the word.
+        max_distance: The maximum edit distance of an accepted misspelling.
 
     Returns:
         bool: Whether the word was guessed correctly.
@@ -97,7 +634,17 @@ async def check_word(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Word ID not found.",
         )
-    return _sanitize_word(word) == _sanitize_word(word_model.word)
+    if is_match(word, word_model.word):
+        return True
+    if not tolerant:
+        return False
+
+    index = _get_answer_index(word_model.language, session)
+    guess = _sanitize_word(word)
+    return word_id in index.synonyms.get(guess, ()) or word_id in index.words.search(
+        guess,
+        max_distance,
+    )
 
 
 def download_audio(identifier: int, session: orm.Session, s3_client: s3.S3) -> bytes:
@@ -111,6 +658,8 @@ def download_audio(identifier: int, session: orm.Session, s3_client: s3.S3) -> b
     Returns:
         The audio bytes.
     """
+    from botocore import errorfactory
+
     logger.debug("Downloading audio.")
     word = session.query(models.Word).filter_by(id=identifier).first()
     if not word:
@@ -127,6 +676,278 @@ def download_audio(identifier: int, session: orm.Session, s3_client: s3.S3) -> b
         ) from exception_info
 
 
+def get_audio_keys(
+    identifiers: abc.Sequence[int],
+    session: orm.Session,
+) -> dict[int, str]:
+    """Resolves the S3 keys of the audio of words in one query.
+
+    Args:
+        identifiers: The ids of the words.
+        session: The database session.
+
+    Returns:
+        The S3 keys by word id, in the order of the ids, without duplicates.
+
+    Raises:
+        fastapi.HTTPException: 404 if any of the words does not exist.
+    """
+    logger.debug("Getting audio keys.")
+    rows = session.execute(
+        sqlalchemy.select(models.Word.id, models.S3File.s3_key)
+        .join(models.S3File)
+        .where(models.Word.id.in_(identifiers)),
+    )
+    s3_keys = dict(rows.tuples().all())
+    if missing := set(identifiers) - s3_keys.keys():
+        raise fastapi.HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Audio not found for words: {sorted(missing)}.",
+        )
+    return {identifier: s3_keys[identifier] for identifier in identifiers}
+
+
+async def stream_audio(
+    s3_keys: abc.Mapping[int, str],
+    s3_client: s3.S3,
+    concurrency: int = DOWNLOAD_CONCURRENCY,
+) -> abc.AsyncGenerator[bytes, None]:
+    """Streams the audio of words as a ZIP archive with an entry per word.
+
+    The clips are fetched from S3 concurrently, at most `concurrency` at a
+    time, and each is sent as soon as it and the clips before it have
+    arrived.
+
+    Args:
+        s3_keys: The S3 keys of the audio by word id.
+        s3_client: The S3 client to use.
+        concurrency: The maximum number of concurrent fetches.
+
+    Yields:
+        Chunks of the archive, in which the clip of a word is `{id}.mp3`.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(s3_key: str) -> bytes:
+        async with semaphore:
+            return await asyncio.to_thread(s3_client.read, s3_key)
+
+    fetches = [asyncio.create_task(fetch(s3_key)) for s3_key in s3_keys.values()]
+    try:
+        stream = archive.ZipStream()
+        for identifier, clip in zip(s3_keys, fetches, strict=True):
+            yield stream.add(f"{identifier}.mp3", await clip)
+        yield stream.finish()
+    finally:
+        # Stops the fetches if the client disconnects.
+        for clip in fetches:
+            clip.cancel()
+
+
+def get_bundle(language: str, age: int, session: orm.Session) -> models.Bundle:
+    """Returns the offline bundle of a language and age.
+
+    Args:
+        language: The language of the words.
+        age: The age of the target audience.
+        session: The database session.
+
+    Returns:
+        The bundle.
+
+    Raises:
+        fastapi.HTTPException: 404 if the bundle has not been built.
+    """
+    logger.debug("Getting bundle.")
+    bundle = session.execute(
+        sqlalchemy.select(models.Bundle).filter_by(language=language, age=age),
+    ).scalar()
+    if bundle is None or bundle.content_hash is None:
+        raise fastapi.HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bundle not found.",
+        )
+    return bundle
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Checks whether an If-None-Match header matches an ETag.
+
+    Args:
+        if_none_match: The value of the If-None-Match header.
+        etag: The quoted ETag of the resource.
+
+    Returns:
+        Whether the client's copy is current, comparing weakly as HTTP does
+        for If-None-Match.
+    """
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+async def download_rendition(
+    identifier: int,
+    audio_format: schemas.AudioFormat,
+    session: orm.Session,
+    s3_client: s3.S3,
+) -> bytes:
+    """Downloads the audio of a word in another encoding.
+
+    A rendition is transcoded from the original audio on its first request
+    and stored in S3, so that later requests read it directly. Replacing the
+    original audio deletes its renditions, see the admin controller.
+
+    Args:
+        identifier: The id of the word.
+        audio_format: The name of the rendition.
+        session: The database session.
+        s3_client: The S3 client to use.
+
+    Returns:
+        The encoded audio bytes.
+
+    Raises:
+        fastapi.HTTPException: 404 if the word or its audio does not exist.
+    """
+    logger.debug("Downloading audio rendition.")
+    word = session.get(models.Word, identifier)
+    if not word:
+        raise fastapi.HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Audio not found.",
+        )
+    source = word.s3_file
+    s3_key = session.execute(
+        sqlalchemy.select(models.S3File.s3_key).filter_by(
+            source_id=source.id,
+            rendition=audio_format,
+        ),
+    ).scalar()
+    if s3_key is not None:
+        return await asyncio.to_thread(s3_client.read, s3_key)
+
+    return await _rendition_flights.run(
+        (source.id, audio_format),
+        lambda: _create_rendition(source, audio_format, session, s3_client),
+    )
+
+
+async def _create_rendition(
+    source: models.S3File,
+    audio_format: schemas.AudioFormat,
+    session: orm.Session,
+    s3_client: s3.S3,
+) -> bytes:
+    """Transcodes an audio file, stores the result in S3 and records it.
+
+    Args:
+        source: The original audio file.
+        audio_format: The name of the rendition.
+        session: The database session.
+        s3_client: The S3 client to use.
+
+    Returns:
+        The encoded audio bytes.
+
+    Raises:
+        fastapi.HTTPException: 404 if the original audio does not exist, 502
+            if ffmpeg could not transcode it.
+    """
+    import ffmpeg
+    from botocore import errorfactory
+
+    rendition = RENDITIONS[audio_format]
+    try:
+        original = await asyncio.to_thread(s3_client.read, source.s3_key)
+    except errorfactory.ClientError as exception_info:
+        raise fastapi.HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Audio not found.",
+        ) from exception_info
+
+    loop = asyncio.get_running_loop()
+    try:
+        data = await loop.run_in_executor(
+            _transcode_pool,
+            _transcode,
+            original,
+            rendition,
+        )
+    except ffmpeg.Error as exception_info:
+        logger.exception(
+            "ffmpeg failed: %s",
+            (exception_info.stderr or b"").decode(errors="replace"),
+        )
+        raise fastapi.HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Could not transcode the audio.",
+        ) from exception_info
+
+    # Keyed by the content of the original, so that a rendition of replaced
+    # audio never overwrites the rendition of the new audio.
+    source_hash = hashlib.sha256(original).hexdigest()
+    s3_key = str(
+        pathlib.PurePosixPath(
+            "renditions",
+            audio_format,
+            source_hash,
+            source.s3_key,
+        ).with_suffix(f".{rendition.extension}"),
+    )
+    await asyncio.to_thread(s3_client.create, key=s3_key, data=data)
+    session.execute(
+        sql.insert_ignore(session, models.S3File, ["source_id", "rendition"]).values(
+            s3_key=s3_key,
+            source_id=source.id,
+            rendition=audio_format,
+        ),
+    )
+    session.commit()
+    return data
+
+
+def _transcode(data: bytes, rendition: Rendition) -> bytes:
+    """Encodes audio with ffmpeg.
+
+    Args:
+        data: The original audio.
+        rendition: The encoding.
+
+    Returns:
+        The encoded mono audio.
+    """
+    import ffmpeg
+
+    with timing.span("transcode", "rendition"):
+        output, _ = (
+            ffmpeg.input("pipe:")
+            .output(
+                "pipe:",
+                format=rendition.container,
+                acodec=rendition.codec,
+                audio_bitrate=rendition.bitrate,
+                ac=1,
+            )
+            .run(input=data, capture_stdout=True, capture_stderr=True)
+        )
+    return output
+
+
+def is_match(guess: str, word: str) -> bool:
+    """Checks whether a guess matches a word.
+
+    Args:
+        guess: The guessed word.
+        word: The correct word.
+
+    Returns:
+        Whether the sanitized guess equals the sanitized word.
+    """
+    return _sanitize_word(guess) == _sanitize_word(word)
+
+
 def _sanitize_word(word: str) -> str:
     """Sanitizes a word.
 
@@ -1,6 +1,13 @@
 """Schemas for the Words router."""
+import dataclasses
+from typing import Literal
+
+import fastapi
 import pydantic
 
+# Encodings of the audio of words besides the original MP3.
+AudioFormat = Literal["opus-24k", "opus-48k", "mp3-64k"]
+
 
 class WordData(pydantic.BaseModel):
     """Word data, without the word itself."""
@@ -11,3 +18,82 @@ class WordData(pydantic.BaseModel):
     synonyms: list[str]
     antonyms: list[str]
     jeopardy: str
+
+
+class ChangedWord(WordData):
+    """A word that was added or changed since a version of the word bank."""
+
+    language: str
+    age: int
+
+
+class WordChanges(pydantic.BaseModel):
+    """The changes to the word bank since a version."""
+
+    version: int = pydantic.Field(
+        ...,
+        description="The current version of the word bank, to sync from next.",
+    )
+    changed: list[ChangedWord]
+    deleted: list[int] = pydantic.Field(
+        ...,
+        description="The IDs of the words that were deleted.",
+    )
+
+
+@dataclasses.dataclass
+class ReadabilityFilter:
+    """Ranges of the readability metrics of words, passed as query parameters."""
+
+    text: Literal["description", "jeopardy"] = fastapi.Query(
+        "description",
+        description="The text whose grade and reading ease are filtered.",
+    )
+    min_grade: float | None = fastapi.Query(
+        None,
+        description="The minimum Flesch-Kincaid grade of the text.",
+    )
+    max_grade: float | None = fastapi.Query(
+        None,
+        description="The maximum Flesch-Kincaid grade of the text.",
+    )
+    min_reading_ease: float | None = fastapi.Query(
+        None,
+        description="The minimum Flesch reading ease of the text.",
+    )
+    max_reading_ease: float | None = fastapi.Query(
+        None,
+        description="The maximum Flesch reading ease of the text.",
+    )
+    min_syllables: int | None = fastapi.Query(
+        None,
+        description="The minimum number of syllables of the word.",
+    )
+    max_syllables: int | None = fastapi.Query(
+        None,
+        description="The maximum number of syllables of the word.",
+    )
+
+
+class RelatedWord(pydantic.BaseModel):
+    """A word that is similar to another word."""
+
+    id: int
+    word: str
+    score: float = pydantic.Field(
+        ...,
+        description="The cosine similarity between the vectors of the words.",
+    )
+
+
+class SearchResult(pydantic.BaseModel):
+    """A word that matches a search query."""
+
+    id: int
+    word: str
+    language: str
+    age: int
+    score: float = pydantic.Field(
+        ...,
+        description="The similarity between the query and the word, from 0 to 1.",
+    )
@@ -2,7 +2,7 @@
 import logging
 
 import fastapi
-from fastapi import status
+from fastapi import responses, status
 from sqlalchemy import orm
 
 from linguaweb_api.core import config
@@ -11,6 +11,7 @@ from linguaweb_api.routers.words import controller, schemas
 
 settings = config.get_settings()
 LOGGER_NAME = settings.LOGGER_NAME
+DOWNLOAD_MAX_WORDS = settings.DOWNLOAD_MAX_WORDS
 
 logger = logging.getLogger(LOGGER_NAME)
 
@@ -22,9 +23,11 @@ router = fastapi.APIRouter(prefix="/words", tags=["words"])
     response_model=list[int],
     status_code=status.HTTP_200_OK,
     summary="Returns all word IDs.",
-    description="""Returns the IDs of all words in the database.""",
+    description="""Returns the IDs of all words in the database, optionally
+    filtered by language, age, a synonym or antonym, and ranges of the
+    readability of their texts.""",
 )
-async def get_all_word_ids(
+async def get_all_word_ids(  # noqa: PLR0913
     language: str | None = fastapi.Query(
         None,
         title="The language of the words.",
@@ -35,6 +38,17 @@ async def get_all_word_ids(
         title="The age of the target audience.",
         description="The age of the target audience.",
     ),
+    synonym: str | None = fastapi.Query(
+        None,
+        title="A synonym of the words.",
+        description="Only returns words that list this term as a synonym.",
+    ),
+    antonym: str | None = fastapi.Query(
+        None,
+        title="An antonym of the words.",
+        description="Only returns words that list this term as an antonym.",
+    ),
+    readability: schemas.ReadabilityFilter = fastapi.Depends(),
     session: orm.Session = fastapi.Depends(sql.get_session),
 ) -> list[int]:
     """Returns all word IDs.
@@ -42,14 +56,165 @@ async def get_all_word_ids(
     Args:
         language: The language of the words.
         age: The age of the target audience.
+        synonym: A term that must be among the synonyms of the words.
+        antonym: A term that must be among the antonyms of the words.
+        readability: The ranges of the readability metrics of the words.
         session: The database session.
     """
     logger.debug("Getting all word IDs.")
-    word_ids = await controller.get_all_word_ids(language, age, session)
+    word_ids = await controller.get_all_word_ids(
+        language,
+        age,
+        session,
+        synonym=synonym,
+        antonym=antonym,
+        readability=readability,
+    )
     logger.debug("Got all word IDs.")
     return word_ids
 
 
+@router.get(
+    "/changes",
+    response_model=schemas.WordChanges,
+    status_code=status.HTTP_200_OK,
+    summary="Returns the changes to the word bank since a version.",
+    description="""Returns the words added, changed or deleted since a version
+    of the word bank, and the current version to pass as `since` in the next
+    sync. Sync from version 0 to receive all words.""",
+    responses={
+        status.HTTP_409_CONFLICT: {
+            "description": "The version is ahead of the word bank.",
+        },
+    },
+)
+async def get_word_changes(
+    since: int = fastapi.Query(
+        0,
+        ge=0,
+        title="The version to sync from.",
+        description="The version of the word bank the client is in sync with.",
+    ),
+    session: orm.Session = fastapi.Depends(sql.get_session),
+) -> schemas.WordChanges:
+    """Returns the changes to the word bank since a version.
+
+    Args:
+        since: The version of the word bank the client is in sync with.
+        session: The database session.
+    """
+    logger.debug("Getting word changes.")
+    changes = await controller.get_word_changes(since, session)
+    logger.debug("Got word changes.")
+    return changes
+
+
+@router.get(
+    "/search",
+    response_model=list[schemas.SearchResult],
+    status_code=status.HTTP_200_OK,
+    summary="Searches words.",
+    description="""Returns the words that start with the query or resemble it,
+    tolerating typos. Words that start with the query are returned first,
+    followed by the others by descending similarity.""",
+)
+async def search_words(  # noqa: PLR0913
+    query: str = fastapi.Query(
+        ...,
+        min_length=1,
+        max_length=64,
+        title="The search query.",
+        description="The search query.",
+    ),
+    language: str | None = fastapi.Query(
+        None,
+        title="The language of the words.",
+        description="The language of the words.",
+    ),
+    age: int | None = fastapi.Query(
+        None,
+        title="The age of the target audience.",
+        description="The age of the target audience.",
+    ),
+    synonyms: bool = fastapi.Query(  # noqa: FBT001
+        False,  # noqa: FBT003
+        title="Whether to search synonyms.",
+        description="Whether to also return words that list the query as a synonym.",
+    ),
+    limit: int = fastapi.Query(
+        20,
+        ge=1,
+        le=100,
+        title="The maximum number of results.",
+        description="The maximum number of results.",
+    ),
+    session: orm.Session = fastapi.Depends(sql.get_session),
+) -> list[schemas.SearchResult]:
+    """Searches words.
+
+    Args:
+        query: The search query.
+        language: The language of the words.
+        age: The age of the target audience.
+        synonyms: Whether to also return words that list the query as a synonym.
+        limit: The maximum number of results.
+        session: The database session.
+    """
+    logger.debug("Searching words.")
+    results = await controller.search_words(
+        query,
+        session,
+        language=language,
+        age=age,
+        include_synonyms=synonyms,
+        limit=limit,
+    )
+    logger.debug("Searched words.")
+    return results
+
+
+@router.get(
+    "/download",
+    response_class=responses.StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Returns the audio of several words.",
+    description="""Downloads the audio of several words as a single ZIP archive,
+    with the clip of each word as `{id}.mp3`. The clips are fetched in
+    parallel and streamed as they arrive.""",
+    responses={
+        status.HTTP_200_OK: {"content": {"application/zip": {}}},
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Some of the words were not found.",
+        },
+    },
+)
+async def get_audio_batch(
+    ids: list[int] = fastapi.Query(
+        ...,
+        min_length=1,
+        max_length=DOWNLOAD_MAX_WORDS,
+        title="The ids of the words.",
+        description="The ids of the words, e.g. `?ids=1&ids=2`.",
+    ),
+    session: orm.Session = fastapi.Depends(sql.get_session),
+    s3_client: s3.S3 = fastapi.Depends(s3.S3),
+) -> responses.StreamingResponse:
+    """Returns the audio of several words.
+
+    Args:
+        ids: The ids of the words.
+        session: The database session.
+        s3_client: The S3 client to use.
+    """
+    logger.debug("Downloading audio of words.")
+    s3_keys = controller.get_audio_keys(list(dict.fromkeys(ids)), session)
+    return responses.StreamingResponse(
+        controller.stream_audio(s3_keys, s3_client),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="audio.zip"'},
+    )
+
+
 @router.get(
     "/{identifier}",
     response_model=schemas.WordData,
@@ -78,15 +243,67 @@ async def get_word(
     return text_task
 
 
+@router.get(
+    "/{identifier}/related",
+    response_model=list[schemas.RelatedWord],
+    status_code=status.HTTP_200_OK,
+    summary="Returns words related to a word.",
+    description="""Returns the words of the same language and age that are most
+    similar in spelling and meaning, e.g. as distractors in multiple-choice
+    games.""",
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Word not found.",
+        },
+    },
+)
+async def get_related_words(
+    identifier: int = fastapi.Path(..., title="The id of the word."),
+    k: int = fastapi.Query(
+        3,
+        ge=1,
+        le=50,
+        title="The number of related words.",
+        description="The number of related words to return.",
+    ),
+    session: orm.Session = fastapi.Depends(sql.get_session),
+) -> list[schemas.RelatedWord]:
+    """Returns words related to a word.
+
+    Args:
+        identifier: The id of the word.
+        k: The number of related words to return.
+        session: The database session.
+    """
+    logger.debug("Getting related words.")
+    related = await controller.get_related_words(identifier, session, k)
+    logger.debug("Got related words.")
+    return related
+
+
 @router.post(
     "/check/{word_id}",
     status_code=status.HTTP_200_OK,
     summary="Checks whether a guessed word is correct.",
-    description="Given an ID and a guessed word, checks if the guess is correct.",
+    description="""Given an ID and a guessed word, checks if the guess is correct.
+    In tolerant mode, guesses within a small edit distance of the word and
+    synonyms of the word are accepted as well.""",
 )
 async def check_word(
     word_id: int = fastapi.Path(..., title="The ID of the word to check."),
     word: str = fastapi.Form(..., title="The information to check."),
+    tolerant: bool = fastapi.Form(  # noqa: FBT001
+        False,  # noqa: FBT003
+        title="Whether to accept misspellings and synonyms.",
+        description="Whether to also accept misspellings and synonyms of the word.",
+    ),
+    max_distance: int = fastapi.Form(
+        controller.CHECK_MAX_EDIT_DISTANCE,
+        ge=0,
+        le=3,
+        title="The maximum edit distance of a misspelling.",
+        description="The maximum edit distance of an accepted misspelling.",
+    ),
     session: orm.Session = fastapi.Depends(sql.get_session),
 ) -> bool:
     """Checks attributes of a word.
@@ -94,22 +311,102 @@ async def check_word(
     Args:
         word_id: The ID of the word to check.
         word: The information to check.
+        tolerant: Whether to also accept misspellings and synonyms of the word.
+        max_distance: The maximum edit distance of an accepted misspelling.
         session: The database session.
     """
     logger.debug("Checking word.")
-    is_correct = await controller.check_word(word_id, word, session)
+    is_correct = await controller.check_word(
+        word_id,
+        word,
+        session,
+        tolerant=tolerant,
+        max_distance=max_distance,
+    )
     logger.debug("Checked word.")
     return is_correct
 
 
+@router.get(
+    "/bundles/{language}/{age}",
+    response_class=responses.StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Downloads the offline bundle of a language and age.",
+    description="""Downloads a ZIP archive with a `manifest.json` of all words of
+    a language and age and an `audio/` clip per word. The response has an ETag;
+    send it as `If-None-Match` to receive a 304 while the bundle is unchanged.""",
+    responses={
+        status.HTTP_200_OK: {"content": {"application/zip": {}}},
+        status.HTTP_304_NOT_MODIFIED: {
+            "description": "The bundle has not changed.",
+        },
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Bundle not found.",
+        },
+    },
+)
+async def download_bundle(
+    language: str = fastapi.Path(..., title="The language of the words."),
+    age: int = fastapi.Path(..., title="The age of the target audience."),
+    if_none_match: str | None = fastapi.Header(None),
+    session: orm.Session = fastapi.Depends(sql.get_session),
+    s3_client: s3.S3 = fastapi.Depends(s3.S3),
+) -> fastapi.Response:
+    """Downloads the offline bundle of a language and age.
+
+    Args:
+        language: The language of the words.
+        age: The age of the target audience.
+        if_none_match: The ETags of the copies held by the client.
+        session: The database session.
+        s3_client: The S3 client to use.
+    """
+    logger.debug("Downloading bundle.")
+    bundle = controller.get_bundle(language, age, session)
+    headers = {"ETag": f'"{bundle.content_hash}"', "Cache-Control": "no-cache"}
+    if controller.etag_matches(if_none_match, headers["ETag"]):
+        return fastapi.Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=headers,
+        )
+    return responses.StreamingResponse(
+        s3_client.stream(bundle.s3_key or ""),
+        media_type="application/zip",
+        headers={
+            **headers,
+            "Content-Length": str(bundle.size),
+            "Content-Disposition": (
+                f'attachment; filename="words_{language}_{age}.zip"'
+            ),
+        },
+    )
+
+
 @router.get(
     "/download/{identifier}",
     status_code=status.HTTP_200_OK,
     summary="Returns the audio of a word.",
-    description="Downloads the audio file for a specific word by its ID.",
+    description="""Downloads the audio file for a specific word by its ID. With
+    `format`, returns a smaller encoding of the audio, which is transcoded on
+    its first request and stored for later ones.""",
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            "description": "Audio not found.",
+        },
+        status.HTTP_502_BAD_GATEWAY: {
+            "description": "Could not transcode the audio.",
+        },
+    },
 )
 async def get_audio(
     identifier: int = fastapi.Path(..., title="The id of the word."),
+    audio_format: schemas.AudioFormat | None = fastapi.Query(
+        None,
+        alias="format",
+        title="The encoding of the audio.",
+        description="""The encoding and bitrate of the audio, e.g. `opus-24k` for
+        mobile clients. Defaults to the original MP3.""",
+    ),
     session: orm.Session = fastapi.Depends(sql.get_session),
     s3_client: s3.S3 = fastapi.Depends(s3.S3),
 ) -> fastapi.Response:
@@ -117,11 +414,22 @@ async def get_audio(
 
     Args:
         identifier: The id of the word.
+        audio_format: The encoding of the audio, or None for the original.
         session: The database session.
         s3_client: The S3 client to use.
     """
     logger.debug("Downloading audio.")
-    audio_bytes = controller.download_audio(identifier, session, s3_client)
+    if audio_format is None:
+        audio_bytes = controller.download_audio(identifier, session, s3_client)
+        media_type = "audio/mp3"
+    else:
+        audio_bytes = await controller.download_rendition(
+            identifier,
+            audio_format,
+            session,
+            s3_client,
+        )
+        media_type = controller.RENDITIONS[audio_format].media_type
     logger.debug("Downloaded audio.")
 
-    return fastapi.Response(audio_bytes, media_type="audio/mp3")
+    return fastapi.Response(audio_bytes, media_type=media_type)
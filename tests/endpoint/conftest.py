@@ -7,6 +7,7 @@ from fastapi import testclient
 from sqlalchemy import orm
 
 from linguaweb_api import main
+from linguaweb_api.core import migrations
 from linguaweb_api.microservices import sql
 
 API_ROOT = "/api/v1"
@@ -17,17 +18,38 @@ class Endpoints(str, enum.Enum):
 
     POST_ADD_WORD = f"{API_ROOT}/admin/add_word"
     POST_ADD_PRESET_WORDS = f"{API_ROOT}/admin/add_preset_words"
+    POST_ADD_WORDS = f"{API_ROOT}/admin/add_words"
+    POST_INGESTION_RUN = f"{API_ROOT}/admin/ingestion_runs"
+    GET_INGESTION_RUN = f"{API_ROOT}/admin/ingestion_runs/{{run_id}}"
+    POST_RESUME_INGESTION_RUN = f"{API_ROOT}/admin/ingestion_runs/{{run_id}}/resume"
+    POST_MIGRATE = f"{API_ROOT}/admin/migrate"
+    POST_REGENERATE = f"{API_ROOT}/admin/regenerate"
+    DELETE_WORD = f"{API_ROOT}/admin/words/{{word_id}}"
+    GET_EXPORT = f"{API_ROOT}/admin/export"
+    POST_BUNDLE = f"{API_ROOT}/admin/bundles"
+    GET_BUNDLE = f"{API_ROOT}/admin/bundles/{{bundle_id}}"
 
     GET_WORD = f"{API_ROOT}/words/{{word_id}}"
+    GET_RELATED_WORDS = f"{API_ROOT}/words/{{word_id}}/related"
     GET_ALL_WORD_IDS = f"{API_ROOT}/words"
+    GET_SEARCH_WORDS = f"{API_ROOT}/words/search"
+    GET_WORD_CHANGES = f"{API_ROOT}/words/changes"
+    GET_BUNDLE_DOWNLOAD = f"{API_ROOT}/words/bundles/{{language}}/{{age}}"
     GET_AUDIO = f"{API_ROOT}/words/download/{{audio_id}}"
+    GET_AUDIO_BATCH = f"{API_ROOT}/words/download"
     POST_CHECK_WORD = f"{API_ROOT}/words/check/{{word_id}}"
 
     POST_SPEECH_TRANSCRIBE = f"{API_ROOT}/speech/transcribe"
+    WEBSOCKET_SPEECH_STREAM = f"{API_ROOT}/speech/stream?language={{language}}"
+    POST_SPEECH_CHECK = f"{API_ROOT}/speech/check/{{word_id}}"
+    POST_TRANSCRIPTION_JOB = f"{API_ROOT}/speech/transcribe/jobs"
+    GET_TRANSCRIPTION_JOB = f"{API_ROOT}/speech/transcribe/jobs/{{job_id}}"
 
     GET_HEALTH = f"{API_ROOT}/health"
     GET_CONNECTIVITY = f"{API_ROOT}/health/connectivity"
 
+    GET_METRICS = "/metrics"
+
 
 @pytest.fixture()
 def endpoints() -> type[Endpoints]:
@@ -44,7 +66,7 @@ def client() -> testclient.TestClient:
 @pytest.fixture(autouse=True, scope="session")
 def _start_database() -> None:
     """Starts the database."""
-    main.database.create_database()
+    migrations.migrate(sql.Database().engine)
 
 
 @pytest.fixture()
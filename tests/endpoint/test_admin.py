@@ -1,25 +1,31 @@
 """Tests for the admin endpoints."""
+import asyncio
+import csv
+import io
+import json
 import pathlib
+import zipfile
 from collections.abc import Generator
 
 import moto
 import pytest
 import pytest_mock
+from botocore import errorfactory
 from fastapi import status, testclient
+from sqlalchemy import orm
 
 import linguaweb_api
+from linguaweb_api.core import migrations, models
+from linguaweb_api.microservices import s3
+from linguaweb_api.routers.admin import controller
 from tests.endpoint import conftest
 
-
-class TextTask:
-    """Mocked TextTask class."""
-
-    def __init__(self) -> None:
-        """Initializes a new instance of the TextTask class."""
-        self.word_description = "test_description"
-        self.word_synonyms = "test_synonym"
-        self.word_antonyms = "test_antonym"
-        self.word_jeopardy = "test_jeopardy"
+TEXT_TASKS = controller._TextTasks(
+    word_description="test_description",
+    word_synonyms="test_synonym",
+    word_antonyms="test_antonym",
+    word_jeopardy="test_jeopardy",
+)
 
 
 @pytest.fixture(autouse=True)
@@ -28,7 +34,7 @@ def _mock_services(mocker: pytest_mock.MockerFixture) -> Generator[None, None, N
     with moto.mock_s3():
         mocker.patch(
             "linguaweb_api.routers.admin.controller._get_text_tasks",
-            return_value=TextTask(),
+            return_value=TEXT_TASKS,
         )
         mocker.patch(
             "linguaweb_api.routers.admin.controller._get_listening_task",
@@ -101,6 +107,28 @@ def test_add_word_already_exists(
     assert set(response.json().keys()) == expected_keys
 
 
+@pytest.mark.asyncio()
+async def test_add_word_concurrent(
+    mocker: pytest_mock.MockerFixture,
+    session: orm.Session,
+) -> None:
+    """Tests that concurrent adds of a word share one generation run."""
+    get_text_tasks = mocker.patch(
+        "linguaweb_api.routers.admin.controller._get_text_tasks",
+        return_value=TEXT_TASKS,
+    )
+    s3_client = s3.S3()
+
+    first, second = await asyncio.gather(
+        controller.add_word("test_word", session, s3_client),
+        controller.add_word("test_word", session, s3_client),
+    )
+
+    assert first.id == second.id
+    assert get_text_tasks.call_count == 1
+    assert session.query(models.Word).count() == 1
+
+
 def test_add_preset_words_no_auth(
     client: testclient.TestClient,
     endpoints: conftest.Endpoints,
@@ -136,3 +164,436 @@ def test_add_preset_words(
 
     assert response.status_code == status.HTTP_201_CREATED
     assert {word["word"] for word in response.json()} == words
+
+
+def test_add_words_json(
+    mocker: pytest_mock.MockerFixture,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests adding a JSON list of words, skipping duplicates."""
+    get_text_tasks = mocker.patch(
+        "linguaweb_api.routers.admin.controller._get_text_tasks",
+        return_value=TEXT_TASKS,
+    )
+    client.post(
+        endpoints.POST_ADD_WORD,
+        data={"word": "existing"},
+        headers={"x-api-key": "test"},
+    )
+    words = [
+        {"word": "existing"},
+        {"word": "new", "language": "nl-NL", "age": 6},
+        {"word": "new", "language": "nl-NL", "age": 6},
+    ]
+
+    response = client.post(
+        endpoints.POST_ADD_WORDS,
+        json=words,
+        headers={"x-api-key": "test"},
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert [word["word"] for word in response.json()] == ["existing", "new"]
+    assert response.json()[1]["language"] == "nl-NL"
+    expected_generations = 2
+    assert get_text_tasks.call_count == expected_generations
+
+
+def test_add_words_file(
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests adding the words of a CSV file with per-line languages and ages."""
+    content = b"word,language,age\nfirst\nsecond,fr-FR\nthird,,9\n\n"
+
+    response = client.post(
+        endpoints.POST_ADD_WORDS,
+        files={"file": ("words.csv", content)},
+        data={"language": "nl-NL"},
+        headers={"x-api-key": "test"},
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert [(word["word"], word["language"]) for word in response.json()] == [
+        ("first", "nl-NL"),
+        ("second", "fr-FR"),
+        ("third", "nl-NL"),
+    ]
+
+
+def test_add_words_file_batches(
+    mocker: pytest_mock.MockerFixture,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests that a file is looked up in batches, skipping duplicates across them."""
+    mocker.patch.object(controller, "INGEST_BATCH_SIZE", new=1)
+    get_text_tasks = mocker.patch(
+        "linguaweb_api.routers.admin.controller._get_text_tasks",
+        return_value=TEXT_TASKS,
+    )
+    client.post(
+        endpoints.POST_ADD_WORD,
+        data={"word": "existing"},
+        headers={"x-api-key": "test"},
+    )
+
+    response = client.post(
+        endpoints.POST_ADD_WORDS,
+        files={"file": ("words.csv", b"existing\nnew\nexisting\nnew\n")},
+        headers={"x-api-key": "test"},
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert [word["word"] for word in response.json()] == ["existing", "new"]
+    expected_generations = 2
+    assert get_text_tasks.call_count == expected_generations
+
+
+def test_add_words_invalid_line(
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests that an invalid line in a file is rejected."""
+    response = client.post(
+        endpoints.POST_ADD_WORDS,
+        files={"file": ("words.csv", b"first\nsecond,xx-XX\n")},
+        headers={"x-api-key": "test"},
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert "line 2" in response.json()["detail"]
+
+
+def test_add_words_resume(
+    mocker: pytest_mock.MockerFixture,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests that a failed ingestion resumes from the last checkpoint."""
+    get_text_tasks = mocker.patch(
+        "linguaweb_api.routers.admin.controller._get_text_tasks",
+        return_value=TEXT_TASKS,
+    )
+    mocker.patch(
+        "linguaweb_api.routers.admin.controller._get_listening_task",
+        side_effect=[b"audio", RuntimeError("Provider outage."), b"audio"],
+    )
+    words = [{"word": "first"}, {"word": "second"}]
+
+    failed = client.post(
+        endpoints.POST_ADD_WORDS,
+        json=words,
+        headers={"x-api-key": "test"},
+    )
+    run_id = failed.json()["detail"].split("ingestion run ")[1].split(" ")[0]
+    run = client.get(
+        endpoints.GET_INGESTION_RUN.format(run_id=run_id),
+        headers={"x-api-key": "test"},
+    )
+    resumed = client.post(
+        endpoints.POST_RESUME_INGESTION_RUN.format(run_id=run_id),
+        headers={"x-api-key": "test"},
+    )
+
+    assert failed.status_code == status.HTTP_502_BAD_GATEWAY
+    assert run.json()["items"] == {"committed": 1, "generated": 1}
+    assert resumed.status_code == status.HTTP_200_OK
+    assert resumed.json()["status"] == "completed"
+    assert resumed.json()["items"] == {"committed": len(words)}
+    assert get_text_tasks.call_count == len(words)
+
+
+@pytest.mark.asyncio()
+async def test_ingestion_worker(
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+    session: orm.Session,
+) -> None:
+    """Tests that queued words are added by a worker."""
+    words = [{"word": "first"}, {"word": "second"}, {"word": "third"}]
+    queued = client.post(
+        endpoints.POST_INGESTION_RUN,
+        json=words,
+        headers={"x-api-key": "test"},
+    )
+
+    processed = await controller.run_worker(batch_size=2, poll_interval=0, once=True)
+
+    run = client.get(
+        endpoints.GET_INGESTION_RUN.format(run_id=queued.json()["id"]),
+        headers={"x-api-key": "test"},
+    )
+    assert queued.status_code == status.HTTP_202_ACCEPTED
+    assert queued.json()["items"] == {"pending": len(words)}
+    assert processed == len(words)
+    assert run.json() == {
+        "id": queued.json()["id"],
+        "status": "completed",
+        "items": {"committed": len(words)},
+    }
+    assert session.query(models.Word).count() == len(words)
+
+
+def test_claim_items_disjoint(
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+    session: orm.Session,
+) -> None:
+    """Tests that workers claim disjoint items."""
+    words = [{"word": "first"}, {"word": "second"}, {"word": "third"}]
+    client.post(
+        endpoints.POST_INGESTION_RUN,
+        json=words,
+        headers={"x-api-key": "test"},
+    )
+
+    first = controller.claim_items(session, "first", limit=2)
+    second = controller.claim_items(session, "second", limit=2)
+    third = controller.claim_items(session, "third", limit=2)
+
+    first_ids = {item.id for item in first}
+    second_ids = {item.id for item in second}
+    assert len(first_ids) == 2  # noqa: PLR2004
+    assert len(second_ids) == 1
+    assert not first_ids & second_ids
+    assert not third
+
+
+def test_get_ingestion_run_not_found(
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests that an unknown ingestion run returns a 404."""
+    response = client.get(
+        endpoints.GET_INGESTION_RUN.format(run_id=0),
+        headers={"x-api-key": "test"},
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_regenerate_outdated_tasks(
+    mocker: pytest_mock.MockerFixture,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+    session: orm.Session,
+) -> None:
+    """Tests that only the tasks with a changed prompt are regenerated."""
+    client.post(
+        endpoints.POST_ADD_WORD,
+        data={"word": "test_word"},
+        headers={"x-api-key": "test"},
+    )
+    task_versions = controller.get_task_versions("en-US", 12)
+    task_versions["word_description"] = {"model": "gpt-4", "prompt_hash": "changed"}
+    mocker.patch(
+        "linguaweb_api.routers.admin.controller.get_task_versions",
+        return_value=task_versions,
+    )
+    run_text_tasks = mocker.patch(
+        "linguaweb_api.routers.admin.controller._run_text_tasks",
+        return_value={"word_description": "new_description"},
+    )
+
+    dry_run = client.post(
+        endpoints.POST_REGENERATE,
+        data={"dry_run": "true"},
+        headers={"x-api-key": "test"},
+    )
+    regenerated = client.post(endpoints.POST_REGENERATE, headers={"x-api-key": "test"})
+    repeated = client.post(endpoints.POST_REGENERATE, headers={"x-api-key": "test"})
+
+    word = session.query(models.Word).one()
+    assert dry_run.json() == {
+        "words": 1,
+        "tasks": {"word_description": 1},
+        "failed": 0,
+    }
+    assert regenerated.json() == dry_run.json()
+    assert repeated.json() == {"words": 0, "tasks": {}, "failed": 0}
+    run_text_tasks.assert_called_once_with(
+        "test_word",
+        "en-US",
+        12,
+        ["word_description"],
+    )
+    assert word.description == "new_description"
+    assert word.synonyms == ["test_synonym"]
+    assert word.task_versions == task_versions
+
+
+def test_regenerate_audio_deletes_renditions(
+    mocker: pytest_mock.MockerFixture,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+    session: orm.Session,
+) -> None:
+    """Tests that replacing the audio of a word deletes its renditions."""
+    client.post(
+        endpoints.POST_ADD_WORD,
+        data={"word": "test_word"},
+        headers={"x-api-key": "test"},
+    )
+    word = session.query(models.Word).one()
+    rendition_key = "renditions/opus-24k/hash/test_word.ogg"
+    s3.S3().create(key=rendition_key, data=b"rendition")
+    session.add(
+        models.S3File(
+            s3_key=rendition_key,
+            source_id=word.s3_id,
+            rendition="opus-24k",
+        ),
+    )
+    session.commit()
+    task_versions = controller.get_task_versions("en-US", 12)
+    task_versions[controller.LISTENING_TASK] = {"model": "tts", "prompt_hash": "new"}
+    mocker.patch(
+        "linguaweb_api.routers.admin.controller.get_task_versions",
+        return_value=task_versions,
+    )
+
+    response = client.post(endpoints.POST_REGENERATE, headers={"x-api-key": "test"})
+
+    assert response.json()["tasks"] == {controller.LISTENING_TASK: 1}
+    assert session.query(models.S3File).filter_by(source_id=word.s3_id).count() == 0
+    with pytest.raises(errorfactory.ClientError):
+        s3.S3().read(rendition_key)
+
+
+def test_sync_word_changes(
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests that clients receive only the words written since their version."""
+    headers = {"x-api-key": "test"}
+    first = client.post(
+        endpoints.POST_ADD_WORD,
+        data={"word": "first"},
+        headers=headers,
+    )
+    initial = client.get(endpoints.GET_WORD_CHANGES)
+    second = client.post(
+        endpoints.POST_ADD_WORD,
+        data={"word": "second"},
+        headers=headers,
+    )
+    added = client.get(endpoints.GET_WORD_CHANGES, params={"since": 1})
+    deletion = client.delete(
+        endpoints.DELETE_WORD.format(word_id=first.json()["id"]),
+        headers=headers,
+    )
+    deleted = client.get(endpoints.GET_WORD_CHANGES, params={"since": 2})
+    unchanged = client.get(endpoints.GET_WORD_CHANGES, params={"since": 3})
+    ahead = client.get(endpoints.GET_WORD_CHANGES, params={"since": 4})
+
+    assert initial.json()["version"] == 1
+    assert [word["word"] for word in initial.json()["changed"]] == ["first"]
+    assert added.json()["version"] == 2  # noqa: PLR2004
+    assert [word["id"] for word in added.json()["changed"]] == [second.json()["id"]]
+    assert deletion.status_code == status.HTTP_204_NO_CONTENT
+    assert deleted.json() == {
+        "version": 3,
+        "changed": [],
+        "deleted": [first.json()["id"]],
+    }
+    assert unchanged.json() == {"version": 3, "changed": [], "deleted": []}
+    assert ahead.status_code == status.HTTP_409_CONFLICT
+
+
+def test_delete_word_not_found(
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests deleting a word that does not exist."""
+    response = client.delete(
+        endpoints.DELETE_WORD.format(word_id=1),
+        headers={"x-api-key": "test"},
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_export_words(
+    mocker: pytest_mock.MockerFixture,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests streaming all words as NDJSON and CSV in batches."""
+    mocker.patch.object(controller, "EXPORT_BATCH_SIZE", 1)
+    for word in ("first", "second"):
+        client.post(
+            endpoints.POST_ADD_WORD,
+            data={"word": word},
+            headers={"x-api-key": "test"},
+        )
+
+    ndjson = client.get(endpoints.GET_EXPORT, headers={"x-api-key": "test"})
+    csv_export = client.get(
+        endpoints.GET_EXPORT,
+        params={"format": "csv"},
+        headers={"x-api-key": "test"},
+    )
+
+    lines = [json.loads(line) for line in ndjson.text.splitlines()]
+    rows = list(csv.DictReader(io.StringIO(csv_export.text)))
+    assert ndjson.headers["content-type"] == "application/x-ndjson"
+    assert [line["word"] for line in lines] == ["first", "second"]
+    assert lines[0]["synonyms"] == ["test_synonym"]
+    assert lines[0]["s3_key"] == controller._get_s3_key("first", "en-US")
+    assert csv_export.headers["content-type"].startswith("text/csv")
+    assert [row["word"] for row in rows] == ["first", "second"]
+    assert json.loads(rows[0]["synonyms"]) == ["test_synonym"]
+
+
+def test_build_and_download_bundle(
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests building an offline bundle and downloading it with its ETag."""
+    headers = {"x-api-key": "test"}
+    download = endpoints.GET_BUNDLE_DOWNLOAD.format(language="en-US", age=12)
+    missing = client.get(download)
+    for word in ("first", "second"):
+        client.post(endpoints.POST_ADD_WORD, data={"word": word}, headers=headers)
+
+    created = client.post(
+        endpoints.POST_BUNDLE,
+        data={"language": "en-US", "age": 12},
+        headers=headers,
+    )
+    bundle = client.get(
+        endpoints.GET_BUNDLE.format(bundle_id=created.json()["id"]),
+        headers=headers,
+    )
+    downloaded = client.get(download)
+    rebuilt = client.post(
+        endpoints.POST_BUNDLE,
+        data={"language": "en-US", "age": 12},
+        headers=headers,
+    )
+    cached = client.get(download, headers={"If-None-Match": downloaded.headers["etag"]})
+
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
+    assert created.status_code == status.HTTP_202_ACCEPTED
+    assert bundle.json()["status"] == "completed"
+    assert bundle.json()["word_count"] == 2  # noqa: PLR2004
+    assert downloaded.headers["etag"] == f'"{bundle.json()["content_hash"]}"'
+    with zipfile.ZipFile(io.BytesIO(downloaded.content)) as archive:
+        manifest = json.loads(archive.read("manifest.json"))
+        assert [word["word"] for word in manifest["words"]] == ["first", "second"]
+        assert archive.read(manifest["words"][0]["audio"]) == b"test_bytes"
+    assert rebuilt.json()["id"] == created.json()["id"]
+    assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+def test_migrate(
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests that the migrate endpoint reports the latest schema version."""
+    response = client.post(endpoints.POST_MIGRATE, headers={"x-api-key": "test"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"version": migrations.LATEST_VERSION}
@@ -0,0 +1,65 @@
+"""Tests for the command line interface."""
+import pathlib
+from collections.abc import Generator
+
+import moto
+import pytest
+import pytest_mock
+from sqlalchemy import orm
+
+from linguaweb_api import __main__ as cli
+from linguaweb_api.core import models
+from tests.endpoint import test_admin
+
+
+@pytest.fixture(autouse=True)
+def _mock_services(mocker: pytest_mock.MockerFixture) -> Generator[None, None, None]:
+    """Mocks the calls to the microservices."""
+    with moto.mock_s3():
+        mocker.patch(
+            "linguaweb_api.routers.admin.controller._get_text_tasks",
+            return_value=test_admin.TEXT_TASKS,
+        )
+        mocker.patch(
+            "linguaweb_api.routers.admin.controller._get_listening_task",
+            return_value=b"test_bytes",
+        )
+        yield
+
+
+@pytest.fixture()
+def word_file(tmp_path: pathlib.Path) -> pathlib.Path:
+    """Returns a file with a word for every language and one for French only."""
+    path = tmp_path / "words.csv"
+    path.write_text("everywhere\nfrench,fr-FR,6\n")
+    return path
+
+
+def test_ingest_dry_run(
+    capsys: pytest.CaptureFixture[str],
+    session: orm.Session,
+    word_file: pathlib.Path,
+) -> None:
+    """Tests that a dry run reports the new words without adding them."""
+    cli.main(["ingest", str(word_file), "--ages", "6", "--dry-run"])
+
+    assert "4 words, of which 4 are new." in capsys.readouterr().out
+    assert session.query(models.Word).count() == 0
+
+
+def test_ingest(
+    capsys: pytest.CaptureFixture[str],
+    session: orm.Session,
+    word_file: pathlib.Path,
+) -> None:
+    """Tests that the words of a file are added for the given languages."""
+    cli.main(["ingest", str(word_file), "--languages", "nl-NL", "--batch-size", "1"])
+
+    words = session.query(models.Word.word, models.Word.language, models.Word.age)
+    assert set(words) == {
+        ("everywhere", "nl-NL", 6),
+        ("everywhere", "nl-NL", 9),
+        ("everywhere", "nl-NL", 12),
+        ("french", "fr-FR", 6),
+    }
+    assert "completed" in capsys.readouterr().out
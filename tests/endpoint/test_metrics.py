@@ -0,0 +1,24 @@
+"""Tests for the metrics endpoint."""
+from fastapi import status, testclient
+
+from tests.endpoint import conftest
+
+
+def test_get_metrics(
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests that request and dependency metrics are exposed."""
+    client.get(endpoints.GET_ALL_WORD_IDS)
+
+    response = client.get(endpoints.GET_METRICS)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    assert (
+        'linguaweb_http_requests_total{method="GET",route="/api/v1/words",status="200"}'
+        in response.text
+    )
+    assert 'linguaweb_dependency_duration_seconds_count{dependency="db"' in (
+        response.text
+    )
@@ -1,19 +1,33 @@
 """Tests for the speech endpoints."""
 import array
+import asyncio
+import pathlib
+import shutil
+import sys
 import tempfile
 import wave
 from collections.abc import Generator
 from typing import Any
 
+import fastapi
 import ffmpeg
 import pytest
 import pytest_mock
 from cloai import openai_api
 from fastapi import status, testclient
+from sqlalchemy import orm
 
+from linguaweb_api.core import models
+from linguaweb_api.routers.speech import controller
 from tests.endpoint import conftest
 
 
+@pytest.fixture(autouse=True)
+def _clear_transcription_cache() -> None:
+    """Clears the in-memory transcription cache."""
+    controller._transcription_cache.clear()
+
+
 @pytest.fixture()
 def wav_file() -> Generator[str, Any, None]:
     """Returns a path to a temporary wav file."""
@@ -66,3 +80,291 @@ def test_transcribe(
     assert response.status_code == status.HTTP_200_OK
     mock_stt_run.assert_called_once()
     assert response.json() == expected_transcription
+
+
+def test_transcribe_cached(
+    mocker: pytest_mock.MockerFixture,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+    wav_file: str,
+) -> None:
+    """Tests that identical audio is only transcribed once."""
+    mock_stt_run = mocker.patch.object(
+        openai_api.SpeechToText,
+        "run",
+        return_value="Expected transcription",
+    )
+
+    responses = [
+        client.post(
+            endpoints.POST_SPEECH_TRANSCRIBE,
+            files={"audio": open(wav_file, "rb")},  # noqa: SIM115, PTH123
+            data={"language": "en"},
+        )
+        for _ in range(2)
+    ]
+
+    assert all(response.status_code == status.HTTP_200_OK for response in responses)
+    assert all(response.json() == "Expected transcription" for response in responses)
+    mock_stt_run.assert_called_once()
+
+
+def test_transcribe_cache_persisted(
+    mocker: pytest_mock.MockerFixture,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+    session: orm.Session,
+    wav_file: str,
+) -> None:
+    """Tests that transcriptions are read from the database cache."""
+    mocker.patch.object(controller, "TRANSCRIPTION_CACHE_PERSIST", new=True)
+    mock_stt_run = mocker.patch.object(
+        openai_api.SpeechToText,
+        "run",
+        return_value="Expected transcription",
+    )
+    client.post(
+        endpoints.POST_SPEECH_TRANSCRIBE,
+        files={"audio": open(wav_file, "rb")},  # noqa: SIM115, PTH123
+        data={"language": "en"},
+    )
+    controller._transcription_cache.clear()
+
+    response = client.post(
+        endpoints.POST_SPEECH_TRANSCRIBE,
+        files={"audio": open(wav_file, "rb")},  # noqa: SIM115, PTH123
+        data={"language": "en"},
+    )
+
+    assert response.json() == "Expected transcription"
+    assert session.query(models.Transcription).count() == 1
+    mock_stt_run.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    ("transcription", "expected"),
+    [("The bird.", True), ("The cat.", False)],
+)
+def test_transcribe_and_check(  # noqa: PLR0913
+    mocker: pytest_mock.MockerFixture,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+    session: orm.Session,
+    wav_file: str,
+    transcription: str,
+    expected: bool,
+) -> None:
+    """Tests the combined transcribe and check endpoint."""
+    mocker.patch.object(openai_api.SpeechToText, "run", return_value=transcription)
+    word = models.Word(
+        word="The bird",
+        description="description",
+        synonyms=[],
+        antonyms=[],
+        jeopardy="jeopardy",
+        language="en",
+        age=6,
+        s3_file=models.S3File(s3_key="test_key"),
+    )
+    session.add(word)
+    session.commit()
+
+    response = client.post(
+        endpoints.POST_SPEECH_CHECK.format(word_id=word.id),
+        files={"audio": open(wav_file, "rb")},  # noqa: SIM115, PTH123
+        data={"language": "en"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"transcription": transcription, "is_correct": expected}
+
+
+def test_transcribe_and_check_word_not_found(
+    mocker: pytest_mock.MockerFixture,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+    wav_file: str,
+) -> None:
+    """Tests the combined endpoint when the word does not exist."""
+    mocker.patch.object(openai_api.SpeechToText, "run", return_value="")
+
+    response = client.post(
+        endpoints.POST_SPEECH_CHECK.format(word_id=-1),
+        files={"audio": open(wav_file, "rb")},  # noqa: SIM115, PTH123
+        data={"language": "en"},
+    )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_transcription_job(
+    mocker: pytest_mock.MockerFixture,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+    wav_file: str,
+) -> None:
+    """Tests that a transcription job transcribes and stitches all chunks."""
+    mocker.patch.object(controller, "TRANSCRIPTION_CHUNK_SECONDS", new=0.4)
+    mock_stt_run = mocker.patch.object(
+        openai_api.SpeechToText,
+        "run",
+        return_value="word",
+    )
+
+    response = client.post(
+        endpoints.POST_TRANSCRIPTION_JOB,
+        files={"audio": open(wav_file, "rb")},  # noqa: SIM115, PTH123
+        data={"language": "en"},
+    )
+    job = client.get(
+        endpoints.GET_TRANSCRIPTION_JOB.format(job_id=response.json()["id"]),
+    ).json()
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    assert job["status"] == "completed"
+    assert job["chunks_total"] == job["chunks_completed"] == 3  # noqa: PLR2004
+    assert job["transcription"] == "word word word"
+    # The first two chunks are identical silence and share one transcription.
+    assert mock_stt_run.call_count == 2  # noqa: PLR2004
+
+
+def test_transcription_job_failed(
+    mocker: pytest_mock.MockerFixture,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+    wav_file: str,
+) -> None:
+    """Tests that a failing chunk cancels the others before cleaning up.
+
+    The language differs from the other tests, so that no chunk is cached.
+    """
+    events = []
+    remove_tree = shutil.rmtree
+    slow_chunk_started = asyncio.Event()
+
+    async def run(audio_path: pathlib.Path, **_kwargs: str) -> str:
+        if audio_path.name.startswith(("chunk_0", "chunk_1")):
+            await slow_chunk_started.wait()
+            msg = "Transcription failed."
+            raise RuntimeError(msg)
+        slow_chunk_started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            events.append("cancelled")
+            raise
+        return "word"
+
+    def rmtree(path: pathlib.Path, **kwargs: bool) -> None:
+        events.append("removed")
+        remove_tree(path, **kwargs)
+
+    mocker.patch.object(controller, "TRANSCRIPTION_CHUNK_SECONDS", new=0.4)
+    mocker.patch.object(openai_api.SpeechToText, "run", side_effect=run)
+    mocker.patch.object(controller.shutil, "rmtree", side_effect=rmtree)
+
+    response = client.post(
+        endpoints.POST_TRANSCRIPTION_JOB,
+        files={"audio": open(wav_file, "rb")},  # noqa: SIM115, PTH123
+        data={"language": "nl"},
+    )
+    job = client.get(
+        endpoints.GET_TRANSCRIPTION_JOB.format(job_id=response.json()["id"]),
+    ).json()
+
+    assert job["status"] == "failed"
+    assert job["error"] == "Transcription failed."
+    assert job["chunks_completed"] == 0
+    assert events == ["cancelled", "removed"]
+
+
+def test_transcription_job_not_found(
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests the transcription job endpoint when the job does not exist."""
+    response = client.get(endpoints.GET_TRANSCRIPTION_JOB.format(job_id=-1))
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.parametrize(
+    ("silences", "expected"),
+    [
+        ([], [(0.0, 30.0), (30.0, 60.0), (60.0, 70.0)]),
+        ([(20.0, 22.0), (50.0, 51.0)], [(0.0, 21.0), (21.0, 50.5), (50.5, 70.0)]),
+    ],
+)
+def test_plan_chunks(
+    silences: list[tuple[float, float]],
+    expected: list[tuple[float, float]],
+) -> None:
+    """Tests that chunks are cut at silences within the maximum length."""
+    assert controller._plan_chunks(70.0, silences, 30.0) == expected
+
+
+def test_transcribe_stream(
+    mocker: pytest_mock.MockerFixture,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+    wav_file: str,
+) -> None:
+    """Tests that audio streamed in chunks over a WebSocket is transcribed."""
+    mock_stt_run = mocker.patch.object(
+        openai_api.SpeechToText,
+        "run",
+        return_value="Expected transcription",
+    )
+    with open(wav_file, "rb") as file:  # noqa: PTH123
+        audio = file.read()
+    chunk_size = 8192
+
+    with client.websocket_connect(
+        endpoints.WEBSOCKET_SPEECH_STREAM.format(language="en"),
+    ) as websocket:
+        for start in range(0, len(audio), chunk_size):
+            websocket.send_bytes(audio[start : start + chunk_size])
+        websocket.send_text(controller.END_OF_UTTERANCE)
+        response = websocket.receive_json()
+
+    assert response == {"transcription": "Expected transcription"}
+    mock_stt_run.assert_called_once()
+
+
+def test_transcribe_stream_too_large(
+    mocker: pytest_mock.MockerFixture,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests that streams exceeding the maximum size are rejected."""
+    mocker.patch.object(controller, "MAX_FILE_SIZE", new=10)
+
+    with client.websocket_connect(
+        endpoints.WEBSOCKET_SPEECH_STREAM.format(language="en"),
+    ) as websocket:
+        websocket.send_bytes(b"0" * 11)
+        message = websocket.receive()
+
+    assert message["code"] == status.WS_1009_MESSAGE_TOO_BIG
+
+
+@pytest.mark.asyncio()
+async def test_streaming_transcoder_exited() -> None:
+    """Tests that writing to an exited ffmpeg rejects the audio and reaps it."""
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-c",
+        "import sys; sys.stderr.write('Invalid data'); sys.exit(1)",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    transcoder = controller._StreamingTranscoder(process)
+    await process.wait()
+
+    with pytest.raises(fastapi.WebSocketException) as exc_info:
+        await transcoder.write(b"0" * 65536)
+    await transcoder.kill()
+
+    assert exc_info.value.code == status.WS_1007_INVALID_FRAME_PAYLOAD_DATA
+    assert process.returncode == 1
@@ -1,11 +1,19 @@
 """Tests for the words endpoints."""
+import hashlib
+import io
+import zipfile
+
+import ffmpeg
 import moto
 import pytest
 import pytest_mock
+import sqlalchemy
 from fastapi import status, testclient
 from sqlalchemy import orm
 
-from linguaweb_api.core import models
+from linguaweb_api.core import models, readability, vectors
+from linguaweb_api.microservices import s3
+from linguaweb_api.routers.words import controller
 from tests.endpoint import conftest
 
 WORD = "The bird"
@@ -57,6 +65,105 @@ def test_get_all_word_ids_empty(
     assert response.json() == []
 
 
+def test_get_all_word_ids_by_term(
+    word: models.Word,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests filtering the word IDs by a synonym or antonym."""
+    synonym = client.get(endpoints.GET_ALL_WORD_IDS, params={"synonym": "synonym"})
+    antonym = client.get(endpoints.GET_ALL_WORD_IDS, params={"antonym": "synonym"})
+
+    assert synonym.json() == [word.id]
+    assert antonym.json() == []
+
+
+def test_get_all_word_ids_by_readability(
+    session: orm.Session,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests filtering the word IDs by ranges of readability metrics."""
+    s3 = models.S3File(s3_key="test_key")
+    texts = {
+        "cat": "A small pet that purrs.",
+        "photosynthesis": (
+            "The biochemical process whereby chlorophyll-containing organisms "
+            "synthesize carbohydrates utilizing electromagnetic radiation."
+        ),
+    }
+    words = {
+        word: models.Word(
+            word=word,
+            description=description,
+            synonyms=[],
+            antonyms=[],
+            jeopardy="",
+            language="en-US",
+            age=6,
+            s3_file=s3,
+            **readability.measure({"word": word, "description": description}, "en"),
+        )
+        for word, description in texts.items()
+    }
+    session.add_all(words.values())
+    session.commit()
+
+    easy = client.get(endpoints.GET_ALL_WORD_IDS, params={"max_grade": 6})
+    hard = client.get(endpoints.GET_ALL_WORD_IDS, params={"min_syllables": 2})
+    jeopardy = client.get(
+        endpoints.GET_ALL_WORD_IDS,
+        params={"text": "jeopardy", "max_grade": 6},
+    )
+
+    assert easy.json() == [words["cat"].id]
+    assert hard.json() == [words["photosynthesis"].id]
+    assert jeopardy.json() == []
+
+
+def test_search_words(
+    word: models.Word,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests searching words by prefix and with a typo."""
+    prefix = client.get(endpoints.GET_SEARCH_WORDS, params={"query": "the b"})
+    typo = client.get(endpoints.GET_SEARCH_WORDS, params={"query": "the brid"})
+    other_language = client.get(
+        endpoints.GET_SEARCH_WORDS,
+        params={"query": "the b", "language": "fr-FR"},
+    )
+
+    assert prefix.status_code == status.HTTP_200_OK
+    assert prefix.json() == [
+        {
+            "id": word.id,
+            "word": WORD,
+            "language": "en",
+            "age": 6,
+            "score": prefix.json()[0]["score"],
+        },
+    ]
+    assert [result["id"] for result in typo.json()] == [word.id]
+    assert other_language.json() == []
+
+
+def test_search_words_synonyms(
+    word: models.Word,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests that synonyms are only searched when requested."""
+    without = client.get(endpoints.GET_SEARCH_WORDS, params={"query": "synonym"})
+    with_synonyms = client.get(
+        endpoints.GET_SEARCH_WORDS,
+        params={"query": "synonym", "synonyms": "true"},
+    )
+
+    assert without.json() == []
+    assert [result["id"] for result in with_synonyms.json()] == [word.id]
+
+
 def test_get_word(
     word: models.Word,
     client: testclient.TestClient,
@@ -71,6 +178,44 @@ def test_get_word(
     assert all(item in word.__dict__.items() for item in response.json().items())
 
 
+def test_get_related_words(
+    session: orm.Session,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests that related words of the same language and age are returned."""
+    s3 = models.S3File(s3_key="test_key")
+    words = [
+        models.Word(
+            word=text,
+            description="",
+            synonyms=synonyms,
+            antonyms=[],
+            jeopardy="",
+            language=language,
+            age=6,
+            s3_file=s3,
+            vector=vectors.encode(text, synonyms),
+        )
+        for text, synonyms, language in [
+            ("happy", ["glad"], "en-US"),
+            ("glad", ["happy"], "en-US"),
+            ("volcano", ["mountain"], "en-US"),
+            ("happy", ["glad"], "nl-NL"),
+        ]
+    ]
+    session.add_all(words)
+    session.commit()
+
+    response = client.get(
+        endpoints.GET_RELATED_WORDS.format(word_id=words[0].id),
+        params={"k": 5},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [word["id"] for word in response.json()] == [words[1].id, words[2].id]
+
+
 def test_get_word_does_not_exist(
     client: testclient.TestClient,
     endpoints: conftest.Endpoints,
@@ -109,6 +254,35 @@ def test_post_check_word(
     assert response.json() is True
 
 
+@pytest.mark.parametrize(
+    ("tested_word", "tolerant", "expected"),
+    [
+        ("The birt", False, False),
+        ("The birt", True, True),
+        ("The bridge", True, False),
+        ("Synonym", True, True),
+    ],
+)
+def test_post_check_word_tolerant(  # noqa: PLR0913
+    tested_word: str,
+    tolerant: bool,
+    expected: bool,
+    word: models.Word,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests that tolerant checks accept misspellings and synonyms."""
+    endpoint = endpoints.POST_CHECK_WORD.format(word_id=word.id)
+
+    response = client.post(
+        endpoint,
+        data={"word": tested_word, "tolerant": str(tolerant).lower()},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() is expected
+
+
 @moto.mock_s3
 def test_get_audio(
     mocker: pytest_mock.MockFixture,
@@ -127,3 +301,78 @@ def test_get_audio(
 
     assert response.status_code == status.HTTP_200_OK
     assert response.content == b"mock_audio_bytes"
+
+
+@moto.mock_s3
+def test_get_audio_rendition(
+    mocker: pytest_mock.MockFixture,
+    session: orm.Session,
+    word: models.Word,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests that a rendition is transcoded once and then read from S3."""
+    mp3, _ = (
+        ffmpeg.input("anullsrc=r=44100:cl=mono", f="lavfi", t=1)
+        .output("pipe:", format="mp3")
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+    s3.S3().create(key="test_key", data=mp3)
+    transcode = mocker.spy(controller, "_transcode")
+    endpoint = endpoints.GET_AUDIO.format(audio_id=word.id)
+
+    first = client.get(endpoint, params={"format": "opus-24k"})
+    second = client.get(endpoint, params={"format": "opus-24k"})
+    original = client.get(endpoint)
+
+    rendition = session.execute(
+        sqlalchemy.select(models.S3File).filter_by(source_id=word.s3_id),
+    ).scalar_one()
+    assert first.headers["content-type"] == "audio/ogg"
+    assert first.content.startswith(b"OggS")
+    assert second.content == first.content
+    assert original.content == mp3
+    assert transcode.call_count == 1
+    assert rendition.rendition == "opus-24k"
+    assert rendition.s3_key == (
+        f"renditions/opus-24k/{hashlib.sha256(mp3).hexdigest()}/test_key.ogg"
+    )
+
+
+@moto.mock_s3
+def test_get_audio_batch(
+    mocker: pytest_mock.MockFixture,
+    session: orm.Session,
+    word: models.Word,
+    client: testclient.TestClient,
+    endpoints: conftest.Endpoints,
+) -> None:
+    """Tests downloading the audio of several words as one archive."""
+    other = models.Word(
+        word="other",
+        description="",
+        synonyms=[],
+        antonyms=[],
+        jeopardy="",
+        language="en",
+        age=6,
+        s3_file=models.S3File(s3_key="other_key"),
+    )
+    session.add(other)
+    session.commit()
+    mocker.patch(
+        "linguaweb_api.microservices.s3.S3.read",
+        side_effect=lambda key: key.encode(),
+    )
+
+    response = client.get(
+        endpoints.GET_AUDIO_BATCH,
+        params={"ids": [other.id, word.id, other.id]},
+    )
+    missing = client.get(endpoints.GET_AUDIO_BATCH, params={"ids": [word.id, 999]})
+
+    assert response.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.namelist() == [f"{other.id}.mp3", f"{word.id}.mp3"]
+        assert archive.read(f"{word.id}.mp3") == b"test_key"
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,26 @@
+-- The SQLite schema of the baseline release, before the schema was versioned.
+
+CREATE TABLE s3_files (
+	s3_key VARCHAR(1024) NOT NULL, 
+	id INTEGER NOT NULL, 
+	time_created DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	time_updated DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	PRIMARY KEY (id), 
+	UNIQUE (s3_key)
+);
+
+CREATE TABLE words (
+	word VARCHAR(64) NOT NULL, 
+	description VARCHAR(1024) NOT NULL, 
+	synonyms VARCHAR(1024) NOT NULL, 
+	antonyms VARCHAR(1024) NOT NULL, 
+	jeopardy VARCHAR(1024) NOT NULL, 
+	language VARCHAR(16) NOT NULL, 
+	age INTEGER NOT NULL, 
+	s3_id INTEGER NOT NULL, 
+	id INTEGER NOT NULL, 
+	time_created DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	time_updated DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(s3_id) REFERENCES s3_files (id)
+);
@@ -0,0 +1,135 @@
+-- The SQLite schema at version 10, as created by the models of that release.
+
+CREATE TABLE s3_files (
+	s3_key VARCHAR(1024) NOT NULL, 
+	id INTEGER NOT NULL, 
+	time_created DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	time_updated DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	PRIMARY KEY (id), 
+	UNIQUE (s3_key)
+);
+
+CREATE TABLE transcriptions (
+	audio_hash VARCHAR(64) NOT NULL, 
+	language VARCHAR(16) NOT NULL, 
+	model VARCHAR(32) NOT NULL, 
+	transcription TEXT NOT NULL, 
+	id INTEGER NOT NULL, 
+	time_created DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	time_updated DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	PRIMARY KEY (id), 
+	UNIQUE (audio_hash, language, model)
+);
+
+CREATE TABLE transcription_jobs (
+	status VARCHAR(16) NOT NULL, 
+	language VARCHAR(16) NOT NULL, 
+	chunks_total INTEGER, 
+	chunks_completed INTEGER NOT NULL, 
+	transcription TEXT, 
+	error VARCHAR(1024), 
+	id INTEGER NOT NULL, 
+	time_created DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	time_updated DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	PRIMARY KEY (id)
+);
+
+CREATE TABLE word_bank (
+	version INTEGER NOT NULL, 
+	id INTEGER NOT NULL, 
+	time_created DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	time_updated DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	PRIMARY KEY (id)
+);
+
+CREATE TABLE word_tombstones (
+	word_id INTEGER NOT NULL, 
+	version INTEGER NOT NULL, 
+	id INTEGER NOT NULL, 
+	time_created DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	time_updated DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	PRIMARY KEY (id)
+);
+
+CREATE INDEX ix_word_tombstones_version ON word_tombstones (version);
+
+CREATE TABLE schema_version (
+	version INTEGER NOT NULL, 
+	id INTEGER NOT NULL, 
+	time_created DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	time_updated DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	PRIMARY KEY (id)
+);
+
+CREATE TABLE ingestion_runs (
+	status VARCHAR(16) NOT NULL, 
+	id INTEGER NOT NULL, 
+	time_created DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	time_updated DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	PRIMARY KEY (id)
+);
+
+CREATE TABLE words (
+	word VARCHAR(64) NOT NULL, 
+	description VARCHAR(1024) NOT NULL, 
+	synonyms JSON NOT NULL, 
+	antonyms JSON NOT NULL, 
+	jeopardy VARCHAR(1024) NOT NULL, 
+	language VARCHAR(16) NOT NULL, 
+	age INTEGER NOT NULL, 
+	task_versions JSON, 
+	vector BLOB, 
+	syllables INTEGER, 
+	description_reading_ease FLOAT, 
+	description_grade FLOAT, 
+	jeopardy_reading_ease FLOAT, 
+	jeopardy_grade FLOAT, 
+	version INTEGER DEFAULT '0' NOT NULL, 
+	s3_id INTEGER NOT NULL, 
+	id INTEGER NOT NULL, 
+	time_created DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	time_updated DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(s3_id) REFERENCES s3_files (id)
+);
+
+CREATE INDEX ix_words_description_reading_ease ON words (description_reading_ease);
+
+CREATE INDEX ix_words_jeopardy_reading_ease ON words (jeopardy_reading_ease);
+
+CREATE INDEX ix_words_description_grade ON words (description_grade);
+
+CREATE INDEX ix_words_version ON words (version);
+
+CREATE UNIQUE INDEX uq_words_word_language_age ON words (word, language, age);
+
+CREATE INDEX ix_words_syllables ON words (syllables);
+
+CREATE INDEX ix_words_jeopardy_grade ON words (jeopardy_grade);
+
+CREATE TABLE ingestion_items (
+	run_id INTEGER NOT NULL, 
+	word VARCHAR(64) NOT NULL, 
+	language VARCHAR(16) NOT NULL, 
+	age INTEGER NOT NULL, 
+	state VARCHAR(16) NOT NULL, 
+	description VARCHAR(1024), 
+	synonyms JSON, 
+	antonyms JSON, 
+	jeopardy VARCHAR(1024), 
+	s3_key VARCHAR(1024), 
+	task_versions JSON, 
+	attempts INTEGER NOT NULL, 
+	error VARCHAR(1024), 
+	claimed_by VARCHAR(128), 
+	claimed_until DATETIME, 
+	id INTEGER NOT NULL, 
+	time_created DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	time_updated DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(run_id) REFERENCES ingestion_runs (id)
+);
+
+CREATE INDEX ix_ingestion_items_run_id_state ON ingestion_items (run_id, state);
+
+CREATE INDEX ix_ingestion_items_state_claimed_until ON ingestion_items (state, claimed_until);
@@ -0,0 +1,91 @@
+-- The SQLite schema at version 3, as created by the models of that release.
+
+CREATE TABLE s3_files (
+	s3_key VARCHAR(1024) NOT NULL, 
+	id INTEGER NOT NULL, 
+	time_created DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	time_updated DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	PRIMARY KEY (id), 
+	UNIQUE (s3_key)
+);
+
+CREATE TABLE transcriptions (
+	audio_hash VARCHAR(64) NOT NULL, 
+	language VARCHAR(16) NOT NULL, 
+	model VARCHAR(32) NOT NULL, 
+	transcription TEXT NOT NULL, 
+	id INTEGER NOT NULL, 
+	time_created DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	time_updated DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	PRIMARY KEY (id), 
+	UNIQUE (audio_hash, language, model)
+);
+
+CREATE TABLE transcription_jobs (
+	status VARCHAR(16) NOT NULL, 
+	language VARCHAR(16) NOT NULL, 
+	chunks_total INTEGER, 
+	chunks_completed INTEGER NOT NULL, 
+	transcription TEXT, 
+	error VARCHAR(1024), 
+	id INTEGER NOT NULL, 
+	time_created DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	time_updated DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	PRIMARY KEY (id)
+);
+
+CREATE TABLE schema_version (
+	version INTEGER NOT NULL, 
+	id INTEGER NOT NULL, 
+	time_created DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	time_updated DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	PRIMARY KEY (id)
+);
+
+CREATE TABLE ingestion_runs (
+	status VARCHAR(16) NOT NULL, 
+	id INTEGER NOT NULL, 
+	time_created DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	time_updated DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	PRIMARY KEY (id)
+);
+
+CREATE TABLE words (
+	word VARCHAR(64) NOT NULL, 
+	description VARCHAR(1024) NOT NULL, 
+	synonyms VARCHAR(1024) NOT NULL, 
+	antonyms VARCHAR(1024) NOT NULL, 
+	jeopardy VARCHAR(1024) NOT NULL, 
+	language VARCHAR(16) NOT NULL, 
+	age INTEGER NOT NULL, 
+	s3_id INTEGER NOT NULL, 
+	id INTEGER NOT NULL, 
+	time_created DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	time_updated DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(s3_id) REFERENCES s3_files (id)
+);
+
+CREATE UNIQUE INDEX uq_words_word_language_age ON words (word, language, age);
+
+CREATE TABLE ingestion_items (
+	run_id INTEGER NOT NULL, 
+	word VARCHAR(64) NOT NULL, 
+	language VARCHAR(16) NOT NULL, 
+	age INTEGER NOT NULL, 
+	state VARCHAR(16) NOT NULL, 
+	description VARCHAR(1024), 
+	synonyms VARCHAR(1024), 
+	antonyms VARCHAR(1024), 
+	jeopardy VARCHAR(1024), 
+	s3_key VARCHAR(1024), 
+	attempts INTEGER NOT NULL, 
+	error VARCHAR(1024), 
+	id INTEGER NOT NULL, 
+	time_created DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	time_updated DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL, 
+	PRIMARY KEY (id), 
+	FOREIGN KEY(run_id) REFERENCES ingestion_runs (id)
+);
+
+CREATE INDEX ix_ingestion_items_run_id_state ON ingestion_items (run_id, state);
@@ -0,0 +1,29 @@
+"""Tests for the streamed ZIP archives."""
+import io
+import zipfile
+
+from linguaweb_api.core import archive
+
+
+def _build(entries: dict[str, bytes]) -> archive.ZipStream:
+    """Builds an archive and returns its stream after checking its content."""
+    stream = archive.ZipStream()
+    data = b"".join(stream.add(name, content) for name, content in entries.items())
+    data += stream.finish()
+
+    with zipfile.ZipFile(io.BytesIO(data)) as result:
+        assert {name: result.read(name) for name in result.namelist()} == entries
+    assert stream.size == len(data)
+    return stream
+
+
+def test_zip_stream_is_deterministic() -> None:
+    """Tests that archives with the same content have the same hash."""
+    entries = {"first.mp3": b"first", "second.mp3": b"second"}
+
+    first = _build(entries)
+    second = _build(entries)
+    changed = _build({**entries, "second.mp3": b"changed"})
+
+    assert first.hash.hexdigest() == second.hash.hexdigest()
+    assert first.hash.hexdigest() != changed.hash.hexdigest()
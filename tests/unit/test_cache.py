@@ -0,0 +1,93 @@
+"""Unit tests for the cache module."""
+import asyncio
+
+import pytest
+
+from linguaweb_api.core import cache
+
+
+def test_lru_cache_evicts_least_recently_used() -> None:
+    """Tests that the least recently used entry is evicted first."""
+    lru_cache: cache.LRUCache[str, int] = cache.LRUCache(max_size=2)
+    lru_cache.set("a", 1)
+    lru_cache.set("b", 2)
+    lru_cache.get("a")
+
+    lru_cache.set("c", 3)
+
+    assert lru_cache.get("a") == 1
+    assert lru_cache.get("b") is None
+    assert lru_cache.get("c") == 3  # noqa: PLR2004
+    assert len(lru_cache) == 2  # noqa: PLR2004
+
+
+def test_lru_cache_disabled() -> None:
+    """Tests that a cache without capacity stores nothing."""
+    lru_cache: cache.LRUCache[str, int] = cache.LRUCache(max_size=0)
+
+    lru_cache.set("a", 1)
+
+    assert lru_cache.get("a") is None
+
+
+@pytest.mark.asyncio()
+async def test_single_flight_coalesces_calls() -> None:
+    """Tests that concurrent calls with the same key run only once."""
+    single_flight: cache.SingleFlight[str, int] = cache.SingleFlight()
+    calls = 0
+
+    async def function() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(
+        *[single_flight.run("key", function) for _ in range(3)],
+    )
+
+    assert results == [1, 1, 1]
+    assert calls == 1
+
+
+@pytest.mark.asyncio()
+async def test_single_flight_propagates_exceptions() -> None:
+    """Tests that an exception is raised in all coalesced calls."""
+    single_flight: cache.SingleFlight[str, int] = cache.SingleFlight()
+
+    async def function() -> int:
+        await asyncio.sleep(0.01)
+        raise ValueError
+
+    results = await asyncio.gather(
+        *[single_flight.run("key", function) for _ in range(2)],
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.asyncio()
+async def test_single_flight_leader_cancelled() -> None:
+    """Tests that a joined call runs the function if the first call is cancelled."""
+    single_flight: cache.SingleFlight[str, int] = cache.SingleFlight()
+    started = asyncio.Event()
+    calls = 0
+
+    async def function() -> int:
+        nonlocal calls
+        calls += 1
+        started.set()
+        await asyncio.sleep(0.01)
+        return calls
+
+    leader = asyncio.create_task(single_flight.run("key", function))
+    await started.wait()
+    joiner = asyncio.create_task(single_flight.run("key", function))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert await joiner == 2  # noqa: PLR2004
+    assert calls == 2  # noqa: PLR2004
@@ -0,0 +1,65 @@
+"""Unit tests for the log module."""
+import json
+import logging
+import queue
+
+from linguaweb_api.core import config, log, timing
+
+
+def _make_record(level: int = logging.INFO) -> logging.LogRecord:
+    """Creates a log record for testing."""
+    return logging.LogRecord("test", level, "test.py", 1, "Hello %s", ("world",), None)
+
+
+def test_json_formatter() -> None:
+    """Tests that records are formatted as JSON with request context."""
+    record = _make_record()
+    record.duration_ms = 1.5
+    with timing.request_context("test-id"):
+        timing.record("db", "query", 0.002)
+        log.RequestContextFilter().filter(record)
+
+    document = json.loads(log.JsonFormatter().format(record))
+
+    assert document["message"] == "Hello world"
+    assert document["level"] == "INFO"
+    assert document["request_id"] == "test-id"
+    assert document["timings"] == {"db": 2.0}
+    assert document["duration_ms"] == 1.5  # noqa: PLR2004
+
+
+def test_sampling_filter() -> None:
+    """Tests that only records at or below the sampled level are dropped."""
+    sampling_filter = log.SamplingFilter(rate=0)
+
+    assert not sampling_filter.filter(_make_record(logging.DEBUG))
+    assert sampling_filter.filter(_make_record(logging.INFO))
+
+
+def test_queued_exception_formatted() -> None:
+    """Tests that an exception logged through the queue is kept as a field."""
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    logger = logging.getLogger("test_queued_exception")
+    logger.addHandler(log.QueueHandler(log_queue))
+
+    try:
+        int("not a number")
+    except ValueError:
+        logger.exception("Failed to parse %s.", "input")
+
+    document = json.loads(log.JsonFormatter().format(log_queue.get_nowait()))
+    assert document["message"] == "Failed to parse input."
+    assert document["exception"].startswith("Traceback")
+    assert "ValueError" in document["exception"]
+
+
+def test_initialize_logger_idempotent() -> None:
+    """Tests that initializing the logger twice adds one queue handler."""
+    config.initialize_logger()
+    config.initialize_logger()
+
+    logger = logging.getLogger(config.get_settings().LOGGER_NAME)
+    queue_handlers = [
+        handler for handler in logger.handlers if isinstance(handler, log.QueueHandler)
+    ]
+    assert len(queue_handlers) == 1
@@ -0,0 +1,67 @@
+"""Unit tests for the metrics module."""
+import pytest
+
+from linguaweb_api.core import metrics
+
+
+def test_counter_render() -> None:
+    """Tests that counters are rendered per label set."""
+    counter = metrics.Counter("test_counter", "A test counter.", ("label",))
+
+    counter.inc("a")
+    counter.inc("a")
+    counter.inc("b", amount=3)
+
+    assert counter.render() == [
+        "# HELP test_counter A test counter.",
+        "# TYPE test_counter counter",
+        'test_counter_total{label="a"} 2',
+        'test_counter_total{label="b"} 3',
+    ]
+
+
+def test_gauge_inc_dec() -> None:
+    """Tests that gauges can go up and down."""
+    gauge = metrics.Gauge("test_gauge", "A test gauge.")
+
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+
+    assert gauge.render()[-1] == "test_gauge 1"
+
+
+def test_histogram_render() -> None:
+    """Tests that histograms are rendered with cumulative buckets."""
+    histogram = metrics.Histogram("test_histogram", "A test.", buckets=(0.1, 1.0))
+
+    histogram.observe(0.05)
+    histogram.observe(0.1)
+    histogram.observe(5)
+
+    assert histogram.render()[2:] == [
+        'test_histogram_bucket{le="0.1"} 2',
+        'test_histogram_bucket{le="1.0"} 2',
+        'test_histogram_bucket{le="+Inf"} 3',
+        "test_histogram_sum 5.15",
+        "test_histogram_count 3",
+    ]
+
+
+def test_label_values_escaped() -> None:
+    """Tests that special characters in label values are escaped."""
+    counter = metrics.Counter("test_escape", "A test.", ("label",))
+
+    counter.inc('a"b\\c')
+
+    assert counter.render()[-1] == 'test_escape_total{label="a\\"b\\\\c"} 1'
+
+
+def test_metric_is_abstract() -> None:
+    """Tests that a metric without a sample renderer cannot be created."""
+
+    class Incomplete(metrics._Metric):
+        metric_type = "untyped"
+
+    with pytest.raises(TypeError):
+        Incomplete("test_metric", "An incomplete metric.")  # type: ignore[abstract]
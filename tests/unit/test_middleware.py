@@ -5,10 +5,10 @@ import fastapi
 import pytest
 from fastapi import status, testclient
 
-from linguaweb_api.core import middleware
+from linguaweb_api.core import middleware, timing
 
 app = fastapi.FastAPI()
-app.add_middleware(middleware_class=middleware.RequestLoggerMiddleware)
+app.add_middleware(middleware_class=middleware.RequestTimingMiddleware)
 
 
 @app.get("/test/")
@@ -18,6 +18,7 @@ def example_route() -> dict[str, str]:
     Returns:
         dict: A dictionary containing a message indicating that the test route was hit.
     """
+    timing.record("db", "query", 0.002)
     return {"message": "Test route"}
 
 
@@ -30,5 +31,41 @@ def test_log_middleware(caplog: pytest.LogCaptureFixture) -> None:
         response = client.get("/test/")
 
     assert response.status_code == status.HTTP_200_OK
-    assert "Starting request" in caplog.text
     assert "Finished request" in caplog.text
+    assert "GET /test/ - 200" in caplog.text
+
+
+def test_log_middleware_sampled(
+    caplog: pytest.LogCaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Checking that requests outside of the sample are not logged."""
+    monkeypatch.setattr(middleware, "LOGGER_REQUEST_SAMPLE_RATE", 0)
+
+    with caplog.at_level(logging.INFO):
+        response = client.get("/test/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert "Finished request" not in caplog.text
+
+
+def test_server_timing_header() -> None:
+    """Checking that dependency timings are added to the response."""
+    response = client.get("/test/")
+
+    assert 'db;dur=2.0;desc="count=1"' in response.headers["server-timing"]
+    assert "total;dur=" in response.headers["server-timing"]
+
+
+def test_request_id_propagated() -> None:
+    """Checking that an incoming request ID is returned unchanged."""
+    response = client.get("/test/", headers={"x-request-id": "test-id"})
+
+    assert response.headers["x-request-id"] == "test-id"
+
+
+def test_request_id_generated() -> None:
+    """Checking that a request ID is generated if none is provided."""
+    response = client.get("/test/")
+
+    assert response.headers["x-request-id"]
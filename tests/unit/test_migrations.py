@@ -0,0 +1,241 @@
+"""Tests for the database schema migrations."""
+import pathlib
+
+import pytest
+import pytest_mock
+import sqlalchemy
+
+from linguaweb_api.core import migrations, models
+
+SCHEMAS_DIR = pathlib.Path(__file__).parent / "schemas"
+RELEASED_VERSIONS = range(migrations.LATEST_VERSION)
+
+
+@pytest.fixture()
+def engine(tmp_path: pathlib.Path) -> sqlalchemy.Engine:
+    """Returns an engine for an empty SQLite database."""
+    return sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'database.sqlite'}")
+
+
+def test_migrate_new_database(engine: sqlalchemy.Engine) -> None:
+    """Tests that a new database is created at the latest version."""
+    version = migrations.migrate(engine)
+
+    assert version == migrations.LATEST_VERSION
+    assert migrations.check(engine) == migrations.LATEST_VERSION
+    assert models.Word.__tablename__ in sqlalchemy.inspect(engine).get_table_names()
+
+
+def test_migrate_unversioned_database(engine: sqlalchemy.Engine) -> None:
+    """Tests that a database created without versioning is migrated."""
+    models.Word.metadata.create_all(
+        engine,
+        tables=[models.S3File.__table__, models.Word.__table__],
+    )
+
+    version = migrations.migrate(engine)
+
+    tables = sqlalchemy.inspect(engine).get_table_names()
+    assert version == migrations.LATEST_VERSION
+    assert models.SchemaVersion.__tablename__ in tables
+    assert models.Transcription.__tablename__ in tables
+
+
+def test_migrate_applies_pending_migrations(
+    mocker: pytest_mock.MockFixture,
+    engine: sqlalchemy.Engine,
+) -> None:
+    """Tests that only migrations newer than the schema are applied."""
+    migrations.migrate(engine)
+    upgrade = mocker.Mock()
+    pending = migrations.Migration(migrations.LATEST_VERSION + 1, "Test.", upgrade)
+    mocker.patch.object(migrations, "MIGRATIONS", (*migrations.MIGRATIONS, pending))
+
+    version = migrations.migrate(engine)
+    migrations.migrate(engine)
+
+    assert version == pending.version
+    upgrade.assert_called_once()
+
+
+def test_check_outdated_database(
+    mocker: pytest_mock.MockFixture,
+    engine: sqlalchemy.Engine,
+) -> None:
+    """Tests that an outdated schema is rejected."""
+    migrations.migrate(engine)
+    mocker.patch.object(migrations, "LATEST_VERSION", migrations.LATEST_VERSION + 1)
+
+    with pytest.raises(migrations.SchemaVersionError):
+        migrations.check(engine)
+
+
+def test_check_unversioned_database(engine: sqlalchemy.Engine) -> None:
+    """Tests that a database without a version table is rejected."""
+    with pytest.raises(migrations.SchemaVersionError):
+        migrations.check(engine)
+
+
+def test_migrate_removes_duplicate_words(engine: sqlalchemy.Engine) -> None:
+    """Tests that duplicate words are removed before adding the unique index."""
+    models.Word.metadata.create_all(engine)
+    words = models.Word.__table__
+    with engine.begin() as connection:
+        for index in words.indexes:
+            index.drop(connection)
+        connection.execute(
+            sqlalchemy.insert(models.SchemaVersion).values(version=1),
+        )
+        for description in ("first", "second"):
+            connection.execute(
+                sqlalchemy.insert(words).values(
+                    word="word",
+                    description=description,
+                    synonyms=[],
+                    antonyms=[],
+                    jeopardy="",
+                    language="en-US",
+                    age=12,
+                    s3_id=1,
+                ),
+            )
+
+    migrations.migrate(engine)
+
+    with engine.connect() as connection:
+        descriptions = connection.execute(
+            sqlalchemy.select(words.c.description),
+        ).scalars()
+        assert list(descriptions) == ["first"]
+    indexes = sqlalchemy.inspect(engine).get_indexes(models.Word.__tablename__)
+    assert any(index["unique"] for index in indexes)
+
+
+def test_migrate_converts_terms_to_json(engine: sqlalchemy.Engine) -> None:
+    """Tests that comma separated synonyms are converted to JSON arrays."""
+    models.Word.metadata.create_all(engine)
+    words = models.Word.__table__
+    with engine.begin() as connection:
+        connection.execute(
+            sqlalchemy.insert(models.SchemaVersion).values(version=5),
+        )
+        connection.execute(
+            sqlalchemy.text(
+                "INSERT INTO words (word, description, synonyms, antonyms, "
+                "jeopardy, language, age, s3_id) VALUES ('word', '', "
+                "'first, second,,first', '[\"kept\"]', '', 'en-US', 12, 1)",
+            ),
+        )
+
+    migrations.migrate(engine)
+
+    with engine.connect() as connection:
+        row = connection.execute(
+            sqlalchemy.select(words.c.synonyms, words.c.antonyms),
+        ).one()
+    assert row.synonyms == ["first", "second"]
+    assert row.antonyms == ["kept"]
+
+
+def test_migrate_stamps_word_bank_version(engine: sqlalchemy.Engine) -> None:
+    """Tests that existing words are stamped with the first bank version."""
+    models.Word.metadata.create_all(engine)
+    words = models.Word.__table__
+    with engine.begin() as connection:
+        connection.execute(
+            sqlalchemy.insert(models.SchemaVersion).values(version=9),
+        )
+        connection.execute(
+            sqlalchemy.insert(words).values(
+                word="word",
+                description="",
+                synonyms=[],
+                antonyms=[],
+                jeopardy="",
+                language="en-US",
+                age=12,
+                s3_id=1,
+            ),
+        )
+
+    migrations.migrate(engine)
+
+    with engine.connect() as connection:
+        assert connection.execute(sqlalchemy.select(words.c.version)).scalar() == 1
+        assert (
+            connection.execute(sqlalchemy.select(models.WordBank.version)).scalar() == 1
+        )
+
+
+@pytest.mark.parametrize("version", RELEASED_VERSIONS)
+def test_migrate_released_schema(
+    tmp_path: pathlib.Path,
+    engine: sqlalchemy.Engine,
+    version: int,
+) -> None:
+    """Tests that the schema of each release is migrated to the models.
+
+    The schemas are the literal DDL of each release, version 0 being the
+    baseline before the schema was versioned.
+    """
+    json_terms = version >= 6  # noqa: PLR2004
+    with engine.begin() as connection:
+        connection.connection.executescript(  # type: ignore[attr-defined]
+            (SCHEMAS_DIR / f"v{version}.sql").read_text(),
+        )
+        if version:
+            connection.execute(
+                sqlalchemy.text("INSERT INTO schema_version (version) VALUES (:v)"),
+                {"v": version},
+            )
+        connection.execute(
+            sqlalchemy.text("INSERT INTO s3_files (id, s3_key) VALUES (1, 'key')"),
+        )
+        connection.execute(
+            sqlalchemy.text(
+                "INSERT INTO words (word, description, synonyms, antonyms, "
+                "jeopardy, language, age, s3_id) VALUES ('word', 'A word.', "
+                ":synonyms, :antonyms, 'A word.', 'en-US', 12, 1)",
+            ),
+            {
+                "synonyms": '["first", "second"]' if json_terms else "first, second",
+                "antonyms": '["third"]' if json_terms else "third",
+            },
+        )
+    expected = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'expected.sqlite'}")
+    migrations.migrate(expected)
+
+    assert migrations.migrate(engine) == migrations.LATEST_VERSION
+
+    assert _get_schema(engine) == _get_schema(expected)
+    words = models.Word.__table__
+    with engine.connect() as connection:
+        row = connection.execute(sqlalchemy.select(words)).one()
+    assert row.synonyms == ["first", "second"]
+    assert row.antonyms == ["third"]
+    if version < 8:  # noqa: PLR2004
+        assert row.vector is not None
+    if version < 9:  # noqa: PLR2004
+        assert row.syllables is not None
+
+
+def _get_schema(
+    engine: sqlalchemy.Engine,
+) -> dict[str, tuple[set[str], set[str | None], set[tuple[object, ...]]]]:
+    """Returns the columns, indexes and foreign keys of each table."""
+    inspector = sqlalchemy.inspect(engine)
+    return {
+        table: (
+            {column["name"] for column in inspector.get_columns(table)},
+            {index["name"] for index in inspector.get_indexes(table)},
+            {
+                (
+                    tuple(foreign_key["constrained_columns"]),
+                    foreign_key["referred_table"],
+                    tuple(foreign_key["referred_columns"]),
+                )
+                for foreign_key in inspector.get_foreign_keys(table)
+            },
+        )
+        for table in inspector.get_table_names()
+    }
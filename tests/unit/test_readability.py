@@ -0,0 +1,38 @@
+"""Tests for the readability metrics."""
+from linguaweb_api.core import readability
+
+
+def test_measure_all_texts() -> None:
+    """Tests that the metrics of the word and both texts are computed."""
+    metrics = readability.measure(
+        {
+            "word": "photosynthesis",
+            "description": "A big grey animal with a long nose.",
+            "jeopardy": "This large mammal never forgets.",
+        },
+        "en-US",
+    )
+
+    assert metrics["syllables"] > 3  # noqa: PLR2004
+    assert set(metrics) == {
+        "syllables",
+        "description_reading_ease",
+        "description_grade",
+        "jeopardy_reading_ease",
+        "jeopardy_grade",
+    }
+    assert metrics["description_reading_ease"] > metrics["jeopardy_reading_ease"]
+
+
+def test_measure_empty_text() -> None:
+    """Tests that an empty text is maximally easy."""
+    metrics = readability.measure({"description": ""}, "en-US")
+
+    assert metrics == {"description_reading_ease": 100.0, "description_grade": 0.0}
+
+
+def test_measure_only_present_texts() -> None:
+    """Tests that only the metrics of the given texts are computed."""
+    metrics = readability.measure({"jeopardy": "A short clue."}, "nl-NL")
+
+    assert set(metrics) == {"jeopardy_reading_ease", "jeopardy_grade"}
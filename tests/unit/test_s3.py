@@ -29,6 +29,18 @@ def test_s3_read_nonexistent_key() -> None:
         client.read(test_key)
 
 
+@moto.mock_s3
+def test_s3_delete() -> None:
+    """Test that objects are deleted and missing objects are ignored."""
+    client = s3.S3()
+    client.create("test_key", b"test_data")
+
+    client.delete(["test_key", "nonexistent_key"])
+
+    with pytest.raises(errorfactory.ClientError):
+        client.read("test_key")
+
+
 @moto.mock_s3
 def test__is_existing_bucket() -> None:
     """Test that the bucket exists."""
@@ -0,0 +1,65 @@
+"""Tests for the in-memory search indexes."""
+from linguaweb_api.core import search
+
+
+def test_trigrams() -> None:
+    """Tests that trigrams are padded per word, as by pg_trgm."""
+    assert search.trigrams("Cat") == {"  c", " ca", "cat", "at "}
+
+
+def test_trigram_index_ranks_prefix_matches_first() -> None:
+    """Tests that words starting with the query come before fuzzy matches."""
+    index = search.TrigramIndex([(1, "elephant"), (2, "elegant"), (3, "banana")])
+
+    matches = index.search("elep")
+
+    assert [match.key for match in matches] == [1, 2]
+    assert [match.prefix for match in matches] == [True, False]
+
+
+def test_trigram_index_tolerates_typos() -> None:
+    """Tests that a misspelled query matches the word."""
+    index = search.TrigramIndex([(1, "elephant"), (2, "banana")])
+
+    matches = index.search("elefant")
+
+    assert [match.key for match in matches] == [1]
+    assert not matches[0].prefix
+    assert 0 < matches[0].score < 1
+
+
+def test_trigram_index_keeps_best_match_per_key() -> None:
+    """Tests that a key with several texts is returned once."""
+    index = search.TrigramIndex([(1, "colour"), (1, "color"), (2, "banana")])
+
+    matches = index.search("color")
+
+    assert matches == [search.Match(key=1, score=1.0, prefix=True)]
+
+
+def test_trigram_index_filters_keys() -> None:
+    """Tests that only kept keys are returned."""
+    index = search.TrigramIndex([(1, "apple"), (2, "apples")])
+
+    matches = index.search("apple", keep=lambda key: key == 2)  # noqa: PLR2004
+
+    assert [match.key for match in matches] == [2]
+
+
+def test_levenshtein() -> None:
+    """Tests the edit distance of insertions, deletions and substitutions."""
+    assert search.levenshtein("kitten", "sitting") == 3  # noqa: PLR2004
+    assert search.levenshtein("", "abc") == 3  # noqa: PLR2004
+    assert search.levenshtein("same", "same") == 0
+
+
+def test_bk_tree_search() -> None:
+    """Tests that only entries within the edit distance are found."""
+    tree = search.BKTree([(1, "elephant"), (2, "elegant"), (3, "banana"), (4, "cat")])
+    tree.add(5, "cat")
+
+    assert tree.search("elephamt", 1) == {1}
+    assert tree.search("elefant", 1) == {2}
+    assert tree.search("elefant", 2) == {1, 2}
+    assert tree.search("cat", 0) == {4, 5}
+    assert tree.search("dog", 1) == set()
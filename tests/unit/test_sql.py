@@ -3,10 +3,10 @@ from unittest import mock
 
 import pytest
 import pytest_mock
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, exc
 from sqlalchemy.orm import sessionmaker
 
-from linguaweb_api.core import config
+from linguaweb_api.core import config, timing
 from linguaweb_api.microservices import sql
 
 settings = config.get_settings()
@@ -96,3 +96,16 @@ def test_get_session(mocker: pytest_mock.MockFixture) -> None:
     session = next(session_generator)
 
     assert session == mock_session
+
+
+def test_failed_query_not_timed() -> None:
+    """Test that a failed query does not affect the timing of later queries."""
+    engine = sql._get_engine("sqlite://")
+
+    with timing.request_context("test-id") as context, engine.connect() as connection:
+        with pytest.raises(exc.OperationalError):
+            connection.exec_driver_sql("SELECT * FROM missing_table")
+        connection.exec_driver_sql("SELECT 1")
+
+        assert "query_start" not in connection.info
+    assert context.counts["db"] == 1
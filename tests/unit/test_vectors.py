@@ -0,0 +1,39 @@
+"""Tests for the lexical word vectors."""
+import numpy as np
+
+from linguaweb_api.core import vectors
+
+
+def test_featurize_unit_length() -> None:
+    """Tests that vectors are stored as unit-length float32 arrays."""
+    vector = vectors.decode(vectors.encode("happy", ["glad", "joyful"]))
+
+    assert vector.dtype == np.float32
+    assert vector.shape == (vectors.DIMENSIONS,)
+    assert np.isclose(np.linalg.norm(vector), 1)
+
+
+def test_nearest_ranks_similar_words_first() -> None:
+    """Tests that words sharing spelling or synonyms are nearest."""
+    rows = [
+        (1, vectors.encode("happy", ["glad"])),
+        (2, vectors.encode("glad", ["happy"])),
+        (3, vectors.encode("happily", [])),
+        (4, vectors.encode("volcano", ["mountain"])),
+    ]
+    matrix = vectors.VectorMatrix.from_rows(rows)
+
+    nearest = matrix.nearest(vectors.decode(rows[0][1]), k=2, exclude=1)
+
+    assert [word_id for word_id, _ in nearest] == [2, 3]
+    assert nearest[0][1] >= nearest[1][1]
+
+
+def test_nearest_limits_to_available_words() -> None:
+    """Tests that no more words are returned than exist besides the query."""
+    rows = [(1, vectors.encode("cat")), (2, vectors.encode("hat"))]
+    matrix = vectors.VectorMatrix.from_rows(rows)
+
+    nearest = matrix.nearest(vectors.decode(rows[0][1]), k=5, exclude=1)
+
+    assert [word_id for word_id, _ in nearest] == [2]